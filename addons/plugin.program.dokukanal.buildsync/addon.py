@@ -89,6 +89,10 @@ def _run_action(action, connection=None, topic=None):
             autoclean_service.set_next_run()
             dialogs.show_result(L(30001) if success else ADDON.getAddonInfo('name'), msg)
         dialogs.confirm_then_run(L(30054), L(30303), do_autoclean, yeslabel=L(30313), nolabel=L(30228))
+    elif action == 'autoclean_estimate':
+        from services import autoclean_service
+        success, msg = autoclean_service.estimate()
+        dialogs.show_text(L(30409), msg.replace('\n', '[CR]'))
     elif action == 'settings':
         ADDON.openSettings()
     elif action == 'info' or (action and action.startswith('info_')):
@@ -412,7 +416,7 @@ _param_str = _raw_url.split('?', 1)[1] if '?' in _raw_url else (_raw_url.lstrip(
 p = Params(_param_str)
 action = p.get_action() or p.get_mode()
 DIRECT_ACTIONS = frozenset([
-    'backup', 'restore', 'autoclean', 'settings', 'sync_favourites_now', 'info', 'info_server', 'info_ordner',
+    'backup', 'restore', 'autoclean', 'autoclean_estimate', 'settings', 'sync_favourites_now', 'info', 'info_server', 'info_ordner',
     'info_verbindung', 'info_backup', 'info_empfohlen', 'info_dateimanager', 'test_connection', 'test_image_sources',
     'about', 'debug', 'install_skin', 'wizard', 'first_run_again', 'test_connection_1', 'test_connection_2', 'test_connection_3',
     'instructions', 'open_plugin', 'show_changelog',
@@ -13,7 +13,6 @@ import os
 import random
 import shutil
 import urllib.request
-import re
 import xbmc
 import xbmcvfs
 import time
@@ -27,6 +26,7 @@ def _load_settings():
     global ENABLED, IS_MAIN_SYSTEM, OVERWRITE_STATIC, CUSTOM_FOLDER, SPECIFIC_CUSTOM_FOLDER
     global STATIC_FOLDERS, IMAGE_SOURCE_IDX, IMAGE_LIST_URL, IMAGE_LOCAL_FOLDER, IMAGE_NETWORK_PATH
     global ENABLE_IMAGE_ROTATION, ENABLE_ADDON_SYNC, IMAGE_DISPLAY_MODE, FAVOURITES_SYNC_INTERVAL_MINUTES, FAVOURITES_SYNC_MODE
+    global ADDON_SYNC_INCREMENTAL, STATIC_SYNC_WORKERS, IMAGE_RECURSIVE
     ENABLED = safe_get_bool('enable_sync', False)
     IS_MAIN_SYSTEM = safe_get_bool('is_main_system', True)
     OVERWRITE_STATIC = safe_get_bool('overwrite_static', False)
@@ -34,6 +34,10 @@ def _load_settings():
     SPECIFIC_CUSTOM_FOLDER = safe_get_string('specific_custom_folder', '')
     static_raw = safe_get_string('static_folders', '')
     STATIC_FOLDERS = [f.strip() for f in static_raw.split(',') if f.strip()]
+    try:
+        STATIC_SYNC_WORKERS = max(1, min(8, int(safe_get_string('static_sync_workers', '4') or '4')))
+    except (ValueError, TypeError):
+        STATIC_SYNC_WORKERS = 4
     try:
         IMAGE_SOURCE_IDX = int(safe_get_string('image_source', '0') or '0')
     except (ValueError, TypeError):
@@ -41,8 +45,10 @@ def _load_settings():
     IMAGE_LIST_URL = safe_get_string('image_list_url', '')
     IMAGE_LOCAL_FOLDER = xbmcvfs.translatePath(safe_get_string('image_local_folder', '') or '')
     IMAGE_NETWORK_PATH = (safe_get_string('image_network_path', '') or '').strip()
+    IMAGE_RECURSIVE = safe_get_bool('image_recursive', True)
     ENABLE_IMAGE_ROTATION = safe_get_bool('enable_image_rotation', False)
     ENABLE_ADDON_SYNC = safe_get_bool('addon_sync', True)
+    ADDON_SYNC_INCREMENTAL = safe_get_bool('addon_sync_incremental', True)
     try:
         IMAGE_DISPLAY_MODE = int(safe_get_string('image_display_mode', '0') or '0')
     except (ValueError, TypeError):
@@ -62,16 +68,24 @@ OVERWRITE_STATIC = False
 CUSTOM_FOLDER = ''
 SPECIFIC_CUSTOM_FOLDER = ''
 STATIC_FOLDERS = []
+STATIC_SYNC_WORKERS = 4  # parallel static folder syncs (1 = sequential)
 IMAGE_SOURCE_IDX = 0
 IMAGE_LIST_URL = ''
 IMAGE_LOCAL_FOLDER = ''
 IMAGE_NETWORK_PATH = ''
+IMAGE_RECURSIVE = True  # local folder / network path: include subfolders
 ENABLE_IMAGE_ROTATION = False
 ENABLE_ADDON_SYNC = True
+ADDON_SYNC_INCREMENTAL = True  # manifest-based delta sync instead of full addon_data.zip
 IMAGE_DISPLAY_MODE = 0  # 0 = download, 1 = show directly from URL
 FAVOURITES_SYNC_INTERVAL_MINUTES = 20  # 0 = only at start
 FAVOURITES_SYNC_MODE = 'merge'  # 'merge' | 'overwrite'
 
+# Service start: parallel jobs and per-job deadlines in seconds (resources.lib.task_pipeline)
+STARTUP_WORKERS = 3
+STARTUP_DEADLINES = {'auto_clean': 300, 'image': 60, 'remote_structure': 60, 'addon_data': 900,
+                     'favourites': 300, 'thumbs': 120}
+
 # Image rotation: suppress notification for first 90s after start (no toast on start/settings actions)
 _IMAGE_NOTIFICATION_QUIET_UNTIL = 0.0
 
@@ -79,9 +93,28 @@ _IMAGE_NOTIFICATION_QUIET_UNTIL = 0.0
 LOCAL_FAVOURITES = os.path.join(USERDATA, 'favourites.xml')
 STATIC_FAVOURITES_PATH = os.path.join(USERDATA, 'addon_data', ADDON_ID, 'Static Favourites')
 ICON_PATH = os.path.join(ADDON_PATH, 'resources', 'images', 'icon.png')
-LOCAL_IMAGE_PATH = os.path.join(USERDATA, 'doku_background.jpg')
 BACKGROUND_URL_FILE = os.path.join(USERDATA, 'doku_background_url.txt')
 IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp')
+# Prefetched background images per source (ring cache, refilled in the background by the service)
+IMAGE_CACHE_DIR = os.path.join(USERDATA, 'addon_data', ADDON_ID, 'image_cache')
+IMAGE_LIST_CACHE_FILE = os.path.join(IMAGE_CACHE_DIR, 'image_list.json')
+IMAGE_CACHE_ITEMS = 8
+IMAGE_CACHE_BYTES = 64 * 1024 * 1024
+IMAGE_PREFETCH_INTERVAL = 30 * 60
+IMAGE_PREFETCH_MAX_FAILURES = 3
+IMAGE_CATALOG_PATH = os.path.join(IMAGE_CACHE_DIR, 'catalog_%d.json')
+PICSUM_URL = 'https://picsum.photos/1920/1080'
+# Local hash cache for incremental addon_data sync (excluded from the sync itself)
+ADDON_DATA_INDEX_PATH = os.path.join(USERDATA, 'addon_data', ADDON_ID, 'addon_data_index.json')
+# addon_data sync: this addon's profile holds per-device state and caches (sync index, favourites
+# state, clean estimate, image cache, restore downloads); only the Static Favourites folder is shared
+ADDON_DATA_SYNC_KEEP = 'Static Favourites'
+# Last synced local hash + remote size/mtime per favourites file (skip unchanged round trips)
+FAVOURITES_STATE_PATH = os.path.join(USERDATA, 'addon_data', ADDON_ID, 'favourites_sync_state.json')
+
+# Shared sync backend for the active profile (see _get_backend / close_backend)
+_BACKEND = None
+_BACKEND_KEY = None
 
 
 def _get_profile_settings(connection_number):
@@ -176,19 +209,38 @@ def _has_connection_configured():
 
 
 def _get_backend():
-    """Return sync backend (FTP/SFTP/SMB) from connection settings."""
+    """
+    Return sync backend (FTP/SFTP/SMB) from connection settings.
+    The instance is shared while the active profile is unchanged, so pooled FTP sessions
+    are reused across ensure_remote_structure, sync_addon_data and sync_favourites.
+    """
+    global _BACKEND, _BACKEND_KEY
     from resources.lib import sync_backend
     p = _get_active_profile_settings()
-    return sync_backend.get_backend(
-        p['connection_type'], p['host'], p['user'], p['password'],
-        p['base_path'] or '', p['sftp_port']
-    )
+    key = (p['connection_type'], p['host'], p['user'], p['password'], p['base_path'] or '', p['sftp_port'])
+    if _BACKEND is None or key != _BACKEND_KEY:
+        close_backend()
+        _BACKEND = sync_backend.get_backend(*key)
+        _BACKEND_KEY = key
+    return _BACKEND
+
+
+def close_backend():
+    """Close pooled connections of the shared sync backend (end of a sync run)."""
+    global _BACKEND, _BACKEND_KEY
+    backend, _BACKEND, _BACKEND_KEY = _BACKEND, None, None
+    if backend is not None:
+        try:
+            backend.close()
+        except Exception as e:
+            log("close_backend: %s" % e, xbmc.LOGDEBUG)
 
 
 def get_backend_for_connection(connection_number):
     """
     Return sync backend for connection 1, 2 or 3. For backup/restore via FTP/SFTP/SMB.
     connection_number: 1, 2 or 3. Returns None if not configured or invalid.
+    Not shared: the caller closes it (backend.close()) when done.
     """
     if connection_number not in (1, 2, 3):
         return None
@@ -221,7 +273,10 @@ def test_current_connection():
             p['base_path'] or '', p['sftp_port']
         )
         base_path = (p.get('base_path') or '').strip().strip('/') or '.'
-        backend.folder_exists(base_path)
+        try:
+            backend.folder_exists(base_path)
+        finally:
+            backend.close()
         return True, L(30308)
     except Exception as e:
         log("test_connection: %s" % str(e), xbmc.LOGERROR)
@@ -245,7 +300,10 @@ def test_connection(connection_number):
             p['base_path'] or '', p['sftp_port']
         )
         base_path = (p.get('base_path') or '').strip().strip('/') or '.'
-        backend.folder_exists(base_path)
+        try:
+            backend.folder_exists(base_path)
+        finally:
+            backend.close()
         return True, L(30308)
     except Exception as e:
         log("test_connection(%d): %s" % (connection_number, str(e)), xbmc.LOGERROR)
@@ -386,28 +444,41 @@ def show_notification(message_id, duration=5000, **kwargs):
     Returns:
         None
     """
-    message = L(message_id).format(**kwargs)
-    xbmc.executebuiltin(f'Notification({L(30001)}, {message}, {duration}, {ICON_PATH})')
+    message = L(message_id).format(**kwargs).replace('"', "'")
+    # Quoted: commas in the message would otherwise split it into the time/icon parameters
+    xbmc.executebuiltin(f'Notification({L(30001)}, "{message}", {duration}, {ICON_PATH})')
     time.sleep(duration / 1000)  # Warte, bis die Benachrichtigung abgeschlossen ist
 
 
+def _favourites_state():
+    """Change-detection state for favourites files (resources.lib.sync_state)."""
+    from resources.lib.sync_state import SyncState
+    return SyncState(FAVOURITES_STATE_PATH)
+
+
 def sync_standard_favourites():
     """
     Synchronisiert die Haupt-Favoriten (favourites.xml) mit Union-Merge:
     Alle Geräte gleich; Ergebnis = Vereinigung von lokal und Server (dedupliziert).
     Vor dem Überschreiben wird die aktuelle favourites.xml nach favourites.xml.bak kopiert.
+    Sind lokale Datei (Hash) und Server-Datei (Größe/Zeitstempel) seit dem letzten Sync
+    unverändert, wird ohne Übertragung übersprungen.
 
     Returns:
         bool: True bei Erfolg, sonst False.
     """
     from resources.lib import favourites_merge as fm
+    backend = _get_backend()
+    ftp_path = _remote_path(CUSTOM_FOLDER, 'favourites.xml')
+    state = _favourites_state()
+    if state.is_unchanged(ftp_path, LOCAL_FAVOURITES, backend.stat(ftp_path)):
+        log("favourites.xml unverändert (lokal + Server), überspringe Sync.", xbmc.LOGDEBUG)
+        return True
     if os.path.isfile(LOCAL_FAVOURITES):
         try:
             shutil.copy2(LOCAL_FAVOURITES, LOCAL_FAVOURITES + '.bak')
         except OSError as e:
             log("favourites.xml.bak konnte nicht erstellt werden: %s" % e, xbmc.LOGWARNING)
-    backend = _get_backend()
-    ftp_path = _remote_path(CUSTOM_FOLDER, 'favourites.xml')
     userdata_dir = os.path.dirname(LOCAL_FAVOURITES)
     server_temp = os.path.join(userdata_dir, 'favourites_server.xml')
     try:
@@ -420,7 +491,11 @@ def sync_standard_favourites():
         else:
             merged = fm.merge_union(local_actions, server_actions)
         fm.write_favourites(LOCAL_FAVOURITES, merged)
-        return backend.upload(LOCAL_FAVOURITES, ftp_path)
+        if not backend.upload(LOCAL_FAVOURITES, ftp_path):
+            return False
+        state.record(ftp_path, LOCAL_FAVOURITES, backend.stat(ftp_path))
+        state.save()
+        return True
     finally:
         if os.path.isfile(server_temp):
             try:
@@ -428,71 +503,199 @@ def sync_standard_favourites():
             except OSError:
                 pass
 
+def _sync_static_folder(backend, state, index, folder):
+    """
+    Synchronisiert einen statischen Favoritenordner (Union-Merge bzw. Überschreiben).
+    Eigene Temp-Datei pro Ordner, damit mehrere Ordner parallel laufen können.
+
+    Returns:
+        bool: True bei Erfolg (oder unverändert), sonst False.
+    """
+    from resources.lib import favourites_merge as fm
+    folder_dir = os.path.join(STATIC_FAVOURITES_PATH, folder)
+    if not xbmcvfs.exists(folder_dir):
+        xbmcvfs.mkdirs(folder_dir)
+    local_static_path = os.path.join(folder_dir, 'favourites.xml')
+    remote_static_path = _remote_path(CUSTOM_FOLDER, folder, 'favourites.xml')
+    if state.is_unchanged(remote_static_path, local_static_path, backend.stat(remote_static_path)):
+        return True
+    server_temp = os.path.join(os.path.dirname(LOCAL_FAVOURITES), 'favourites_server_static_%d.xml' % index)
+    try:
+        local_actions = fm.parse_favourites(local_static_path) if xbmcvfs.exists(local_static_path) else []
+        server_actions = []
+        if backend.download(remote_static_path, server_temp):
+            server_actions = fm.parse_favourites(server_temp)
+        if FAVOURITES_SYNC_MODE == 'overwrite':
+            merged = server_actions
+        else:
+            merged = fm.merge_union(local_actions, server_actions)
+        fm.write_favourites(local_static_path, merged)
+        if not backend.upload(local_static_path, remote_static_path):
+            return False
+        state.record(remote_static_path, local_static_path, backend.stat(remote_static_path))
+        return True
+    except Exception as e:
+        log("Static favourites %s: %s" % (folder, e), xbmc.LOGERROR)
+        return False
+    finally:
+        if os.path.isfile(server_temp):
+            try:
+                os.remove(server_temp)
+            except OSError:
+                pass
+
+
 def sync_static_favourites():
     """
     Synchronisiert statische Favoritenordner (z.B. Anime, Horror) mit Union-Merge.
     Speicherort: addon_data/plugin.program.dokukanal.buildsync/Static Favourites/<folder>/favourites.xml
+    Bis zu STATIC_SYNC_WORKERS Ordner laufen parallel (gemeinsames Backend, FTP-Sessions aus dem Pool).
 
     Returns:
-        bool: True wenn mindestens ein Ordner verarbeitet wurde.
+        dict: {ordner: bool} pro Ordner; leer (falsy) wenn keine statischen Ordner konfiguriert sind.
     """
-    from resources.lib import favourites_merge as fm
     if not STATIC_FOLDERS:
-        return False
+        return {}
     backend = _get_backend()
-    userdata_dir = os.path.dirname(LOCAL_FAVOURITES)
-    server_temp = os.path.join(userdata_dir, 'favourites_server_static.xml')
-    for folder in STATIC_FOLDERS:
-        folder_dir = os.path.join(STATIC_FAVOURITES_PATH, folder)
-        if not xbmcvfs.exists(folder_dir):
-            xbmcvfs.mkdirs(folder_dir)
-        local_static_path = os.path.join(folder_dir, 'favourites.xml')
-        remote_static_path = _remote_path(CUSTOM_FOLDER, folder, 'favourites.xml')
-        try:
-            local_actions = fm.parse_favourites(local_static_path) if xbmcvfs.exists(local_static_path) else []
-            server_actions = []
-            if backend.download(remote_static_path, server_temp):
-                server_actions = fm.parse_favourites(server_temp)
-            if FAVOURITES_SYNC_MODE == 'overwrite':
-                merged = server_actions
-            else:
-                merged = fm.merge_union(local_actions, server_actions)
-            fm.write_favourites(local_static_path, merged)
-            backend.upload(local_static_path, remote_static_path)
-        finally:
-            if os.path.isfile(server_temp):
-                try:
-                    os.remove(server_temp)
-                except OSError:
-                    pass
-    return True
+    state = _favourites_state()
+    workers = min(STATIC_SYNC_WORKERS, len(STATIC_FOLDERS))
+    if workers <= 1:
+        results = {folder: _sync_static_folder(backend, state, i, folder) for i, folder in enumerate(STATIC_FOLDERS)}
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {folder: pool.submit(_sync_static_folder, backend, state, i, folder)
+                       for i, folder in enumerate(STATIC_FOLDERS)}
+        results = {folder: future.result() for folder, future in futures.items()}
+    state.save()
+    failed = [folder for folder, ok in results.items() if not ok]
+    if failed:
+        log("Statische Favoriten fehlgeschlagen: %s" % ', '.join(failed), xbmc.LOGWARNING)
+    return results
 
-def _update_background_skin_string():
-    """Aktualisiert Skin.String(home.slideshowpath) damit das Skin das neue Hintergrundbild anzeigt.
-    Immer lokaler Pfad (doku_background.jpg), da Kodi/Skin HTTP-URLs in Bildpfaden oft nicht unterstützt."""
+def _copy_image_to_targets(source_path):
+    """Activate source_path as background (atomic swap, alternating names, see resources.lib.background).
+    Immer lokaler Pfad, da Kodi/Skin HTTP-URLs in Bildpfaden oft nicht unterstützt."""
+    from resources.lib import background
     try:
-        xbmc.executebuiltin('Skin.SetString(home.slideshowpath,special://userdata/doku_background.jpg)')
+        return background.activate(source_path)
     except Exception as e:
-        log("_update_background_skin_string: %s" % e, xbmc.LOGDEBUG)
+        log(f"Failed to copy image to target: {e}", xbmc.LOGERROR)
+        return False
 
 
-def _copy_image_to_targets(source_path):
-    """Copy image file from source_path to LOCAL_IMAGE_PATH (doku_background.jpg)."""
+def _image_cache():
+    """Shared ring cache for the current image source (own folder per source, cleared when its URL/path changes)."""
+    from resources.lib import image_cache
+    location = {0: IMAGE_LIST_URL, 2: IMAGE_NETWORK_PATH, 3: PICSUM_URL}.get(IMAGE_SOURCE_IDX, '')
+    return image_cache.get_cache(os.path.join(IMAGE_CACHE_DIR, str(IMAGE_SOURCE_IDX)), location,
+                                 IMAGE_CACHE_ITEMS, IMAGE_CACHE_BYTES)
+
+
+def _image_catalog():
+    """Persistent catalog of the local folder (source 1) or network path (source 2), None otherwise."""
+    from resources.lib.image_catalog import ImageCatalog
+    root = {1: IMAGE_LOCAL_FOLDER, 2: IMAGE_NETWORK_PATH}.get(IMAGE_SOURCE_IDX)
+    if not root:
+        return None
+    return ImageCatalog(IMAGE_CATALOG_PATH % IMAGE_SOURCE_IDX, root, IMAGE_EXTENSIONS, IMAGE_RECURSIVE)
+
+
+def _fetch_image_list():
+    """[img]…[/img] URLs from IMAGE_LIST_URL (conditional request, cached list on 304/offline)."""
+    from resources.lib import image_cache
+    return image_cache.fetch_image_list(IMAGE_LIST_URL, IMAGE_LIST_CACHE_FILE)
+
+
+def _prefetch_image(cache, image_urls=None):
+    """Fetch one new image of the current source into the cache. Returns True if one was added."""
+    from resources.lib import image_cache
+    cached = cache.sources()
+    if IMAGE_SOURCE_IDX == 0:
+        candidates = [u for u in (image_urls or []) if u not in cached]
+        if not candidates:
+            return False
+        source = random.choice(candidates)
+    elif IMAGE_SOURCE_IDX == 2:
+        source = _image_catalog().next(exclude=cached)
+        if not source:
+            return False
+    else:
+        source = '%s?random=%d%03d' % (PICSUM_URL, int(time.time()), random.randint(0, 999))
+    temp_path = cache.new_path(source)
     try:
-        with open(source_path, 'rb') as f:
-            img_data = f.read()
-        with open(LOCAL_IMAGE_PATH, 'wb') as f:
-            f.write(img_data)
-        _update_background_skin_string()
+        if IMAGE_SOURCE_IDX == 2:
+            src = xbmcvfs.File(source, 'rb')
+            written = 0
+            try:
+                with open(temp_path, 'wb') as out:
+                    for chunk in iter(lambda: bytes(src.readBytes(image_cache.FETCH_CHUNK_SIZE)), b''):
+                        written += len(chunk)
+                        if written > image_cache.MAX_IMAGE_BYTES:
+                            raise image_cache.ImageTooLarge(source)
+                        out.write(chunk)
+            finally:
+                src.close()
+            if not written:
+                raise IOError("empty file: %s" % source)
+        else:
+            image_cache.fetch_url(source, temp_path)
+        cache.add(temp_path, source)
         return True
     except Exception as e:
-        log(f"Failed to copy image to target: {e}", xbmc.LOGERROR)
+        cache.discard(temp_path)
+        log("Image prefetch %s: %s" % (source, e), xbmc.LOGDEBUG)
         return False
 
 
+def refill_image_cache(monitor=None):
+    """
+    Lädt Bilder der aktuellen Quelle (URL-Liste, Netzwerkpfad, Picsum) in den Ring-Cache, bis
+    IMAGE_CACHE_ITEMS ungezeigte Bilder bereitliegen. Returns: Anzahl neu geladener Bilder.
+    """
+    if not ENABLE_IMAGE_ROTATION or IMAGE_SOURCE_IDX not in (0, 2, 3):
+        return 0
+    if (IMAGE_SOURCE_IDX == 0 and not IMAGE_LIST_URL) or (IMAGE_SOURCE_IDX == 2 and not IMAGE_NETWORK_PATH):
+        return 0
+    cache = _image_cache()
+    image_urls = None
+    if IMAGE_SOURCE_IDX == 0:
+        image_urls = _fetch_image_list()
+        if not image_urls:
+            return 0
+    added = 0
+    failures = 0
+    while cache.needs_refill() and failures < IMAGE_PREFETCH_MAX_FAILURES:
+        if monitor is not None and monitor.abortRequested():
+            break
+        if _prefetch_image(cache, image_urls):
+            added += 1
+        else:
+            failures += 1
+    if added:
+        log("Image cache: %d images prefetched" % added, xbmc.LOGINFO)
+    return added
+
+
+def _image_prefetch_loop():
+    """Service thread: refill the image cache now and every IMAGE_PREFETCH_INTERVAL seconds."""
+    from resources.lib.settings_snapshot import SettingsMonitor
+    monitor = SettingsMonitor()
+    while not monitor.abortRequested():
+        try:
+            _load_settings()
+            refill_image_cache(monitor)
+        except Exception as e:
+            log("Image prefetch: %s" % e, xbmc.LOGERROR)
+        if monitor.waitForAbort(IMAGE_PREFETCH_INTERVAL):
+            break
+
+
 def download_random_image():
     """
-    Lädt ein zufälliges Bild (URL-Liste, lokaler Ordner oder Netzwerkpfad) und speichert es lokal.
+    Zeigt ein zufälliges Bild (URL-Liste, lokaler Ordner oder Netzwerkpfad) als Hintergrund.
+    Netzwerkquellen kommen aus dem Ring-Cache (sofort, offline-fähig); nur bei leerem Cache wird
+    ein Bild direkt geladen (mit Timeout).
 
     Returns:
         bool: True bei Erfolg, False wenn kein Bild geladen wurde.
@@ -500,38 +703,37 @@ def download_random_image():
     if not ENABLE_IMAGE_ROTATION:
         return False
 
-    # Bildquelle 0 = URL-Liste
-    if IMAGE_SOURCE_IDX == 0:
-        if not IMAGE_LIST_URL:
+    # Bildquelle 0 = URL-Liste, 2 = Netzwerkpfad (SMB/NFS), 3 = Picsum.photos (Random)
+    if IMAGE_SOURCE_IDX in (0, 2, 3):
+        if (IMAGE_SOURCE_IDX == 0 and not IMAGE_LIST_URL) or (IMAGE_SOURCE_IDX == 2 and not IMAGE_NETWORK_PATH):
             return False
         try:
-            with urllib.request.urlopen(IMAGE_LIST_URL) as response:
-                content = response.read().decode('utf-8')
-                image_urls = re.findall(r'\[img\](.*?)\[/img\]', content)
-                if not image_urls:
+            cache = _image_cache()
+            path, source = cache.pick()
+            if path is None:
+                # First start / nothing prefetched yet: one direct fetch
+                image_urls = _fetch_image_list() if IMAGE_SOURCE_IDX == 0 else None
+                if IMAGE_SOURCE_IDX == 0 and not image_urls:
                     log("No image URLs found in the list", xbmc.LOGERROR)
                     return False
-                random_image_url = random.choice(image_urls)
-                with urllib.request.urlopen(random_image_url) as img_response:
-                    img_data = img_response.read()
-                    with open(LOCAL_IMAGE_PATH, 'wb') as f:
-                        f.write(img_data)
-                if IMAGE_DISPLAY_MODE == 1:
-                    try:
-                        with open(BACKGROUND_URL_FILE, 'w') as f:
-                            f.write(random_image_url)
-                    except Exception:
-                        pass
-                    if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
-                        show_notification(30180, 5000)
-                else:
-                    if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
-                        show_notification(30031, 5000)
-                _update_background_skin_string()
-                xbmc.executebuiltin('ReloadSkin()')
-                return True
+                if _prefetch_image(cache, image_urls):
+                    path, source = cache.pick()
+            if path is None or not _copy_image_to_targets(path):
+                return False
+            if IMAGE_DISPLAY_MODE == 1 and source and source.startswith('http'):
+                try:
+                    with open(BACKGROUND_URL_FILE, 'w') as f:
+                        f.write(source)
+                except Exception:
+                    pass
+                if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
+                    show_notification(30180, 5000)
+            else:
+                if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
+                    show_notification(30031, 5000)
+            return True
         except Exception as e:
-            log(f"Failed to download random image from URL: {e}", xbmc.LOGERROR)
+            log(f"Failed to load random image: {e}", xbmc.LOGERROR)
             return False
 
     # Bildquelle 1 = Lokaler Ordner
@@ -539,74 +741,17 @@ def download_random_image():
         if not IMAGE_LOCAL_FOLDER or not os.path.isdir(IMAGE_LOCAL_FOLDER):
             return False
         try:
-            files = [f for f in os.listdir(IMAGE_LOCAL_FOLDER)
-                     if f.lower().endswith(IMAGE_EXTENSIONS)]
-            if not files:
+            chosen = _image_catalog().next()
+            if not chosen:
                 return False
-            chosen = os.path.join(IMAGE_LOCAL_FOLDER, random.choice(files))
             if _copy_image_to_targets(chosen):
                 if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
                     show_notification(30031, 5000)
-                xbmc.executebuiltin('ReloadSkin()')
                 return True
         except Exception as e:
             log(f"Failed to pick image from local folder: {e}", xbmc.LOGERROR)
         return False
 
-    # Bildquelle 2 = Netzwerkpfad (SMB/NFS)
-    if IMAGE_SOURCE_IDX == 2:
-        if not IMAGE_NETWORK_PATH:
-            return False
-        path = IMAGE_NETWORK_PATH.rstrip('/') + '/'
-        try:
-            dirs, files = xbmcvfs.listdir(path)
-            images = [f for f in files if f.lower().endswith(IMAGE_EXTENSIONS)]
-            if not images:
-                return False
-            chosen_name = random.choice(images)
-            source_url = path + chosen_name
-            f = xbmcvfs.File(source_url, 'rb')
-            img_data = f.read()
-            f.close()
-            with open(LOCAL_IMAGE_PATH, 'wb') as out:
-                out.write(img_data)
-            _update_background_skin_string()
-            if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
-                show_notification(30031, 5000)
-            xbmc.executebuiltin('ReloadSkin()')
-            return True
-        except Exception as e:
-            log(f"Failed to pick image from network path: {e}", xbmc.LOGERROR)
-        return False
-
-    # Bildquelle 3 = Picsum.photos (Random)
-    if IMAGE_SOURCE_IDX == 3:
-        try:
-            url = 'https://picsum.photos/1920/1080'
-            req = urllib.request.Request(url, headers={'User-Agent': 'Kodi-AutoFTPSync/1.0'})
-            with urllib.request.urlopen(req) as response:
-                img_data = response.read()
-            with open(LOCAL_IMAGE_PATH, 'wb') as f:
-                f.write(img_data)
-            if IMAGE_DISPLAY_MODE == 1:
-                try:
-                    url_saved = 'https://picsum.photos/1920/1080?random=%d' % int(time.time())
-                    with open(BACKGROUND_URL_FILE, 'w') as f:
-                        f.write(url_saved)
-                except Exception:
-                    pass
-                if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
-                    show_notification(30180, 5000)
-            else:
-                if time.time() >= _IMAGE_NOTIFICATION_QUIET_UNTIL:
-                    show_notification(30031, 5000)
-            _update_background_skin_string()
-            xbmc.executebuiltin('ReloadSkin()')
-            return True
-        except Exception as e:
-            log("Failed to download image from Picsum: %s" % e, xbmc.LOGERROR)
-        return False
-
     return False
 
 
@@ -695,6 +840,12 @@ def sync_favourites(no_notification=False):
         result_std = sync_standard_favourites()
         result_stat = sync_static_favourites()
 
+        failed_static = sorted(folder for folder, ok in (result_stat or {}).items() if not ok)
+        if failed_static:
+            # No commas: the message is passed to the Notification() builtin
+            folders = ' / '.join(failed_static)
+            _notify(30423, 5000, folders=folders)
+            return (False, 30423, {'folders': folders})
         if result_std or result_stat:
             _notify(30024, 5000)
             ct_map = {0: 'FTP', 1: 'SFTP', 2: 'SMB'}
@@ -713,9 +864,48 @@ def sync_favourites(no_notification=False):
         _notify(30146, 5000)
         return (False, 30315, {'error': str(e)})
 
+def _sync_addon_data_incremental(backend, local_base_path):
+    """
+    Manifest-basierter Delta-Sync von addon_data (resources.lib.addon_data_sync).
+    Hauptsystem: nur geänderte Dateien + Manifest hochladen. Andere Systeme: nur Abweichungen laden.
+
+    Returns:
+        bool: Ergebnis; None wenn auf dem Server kein Manifest liegt (Fallback auf ZIP).
+    """
+    from resources.lib import addon_data_sync
+    if not backend.folder_exists(_remote_path(CUSTOM_FOLDER)):
+        log("sync_addon_data: Remote-Ordner fehlt.", xbmc.LOGWARNING)
+        show_notification(30123, 5000)
+        return False
+    remote_dir = _remote_path(CUSTOM_FOLDER, 'addon_data')
+    temp_dir = xbmcvfs.translatePath('special://temp')
+    exclude = [ADDON_ID + '/']
+    keep = [ADDON_ID + '/' + ADDON_DATA_SYNC_KEEP + '/']
+    if IS_MAIN_SYSTEM:
+        uploaded, failed = addon_data_sync.push(backend, local_base_path, remote_dir, ADDON_DATA_INDEX_PATH, temp_dir,
+                                                exclude, keep)
+        if failed:
+            show_notification(30029, 5000)
+            return False
+        if uploaded:
+            show_notification(30020, 5000)
+        return True
+    result = addon_data_sync.pull(backend, local_base_path, remote_dir, ADDON_DATA_INDEX_PATH, temp_dir, exclude, keep)
+    if result is None:
+        return None
+    downloaded, failed = result
+    if failed:
+        show_notification(30021, 5000)
+        return False
+    if downloaded:
+        show_notification(30025, 5000)
+    return True
+
+
 def sync_addon_data():
     """
-    Synchronisiert den addon_data-Ordner (lokal -> FTP / FTP -> lokal) mittels einer ZIP-Datei.
+    Synchronisiert den addon_data-Ordner (lokal -> FTP / FTP -> lokal): inkrementell über ein
+    Manifest (addon_sync_incremental) oder, als Fallback/Altmodus, mittels einer ZIP-Datei.
 
     Returns:
         bool: False, wenn die Funktion nicht ausgeführt wurde (z.B. deaktiviert). Sonst kein bestimmter Rückgabewert bei Erfolg.
@@ -744,12 +934,20 @@ def sync_addon_data():
         """
         try:
             log(f"Starte die Erstellung der ZIP-Datei: {zip_path}", xbmc.LOGINFO)
+            # Bilder/Archive/Videos werden nur gespeichert statt erneut komprimiert (backup_restore.json)
+            from resources.lib import compression_policy
+            policy = compression_policy.load_policy()
             with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+                own_profile = os.path.join(source_dir, ADDON_ID)
                 for root, dirs, files in os.walk(source_dir):
+                    # This addon's profile is per device (image cache, sync state): only Static Favourites
+                    if root == own_profile:
+                        dirs[:] = [d for d in dirs if d == ADDON_DATA_SYNC_KEEP]
+                        continue
                     for file in files:
                         file_path = os.path.join(root, file)
                         arcname = os.path.relpath(file_path, source_dir)
-                        zipf.write(file_path, arcname)
+                        zipf.write(file_path, arcname, compress_type=policy.compress_type(file_path))
                         log(f"Datei zur ZIP hinzugefügt: {file_path} -> {arcname}", xbmc.LOGINFO)
             log(f"ZIP-Datei erstellt: {zip_path}", xbmc.LOGINFO)
         except Exception as e:
@@ -774,6 +972,12 @@ def sync_addon_data():
             log(f"Fehler beim Entpacken der ZIP-Datei: {str(e)}", xbmc.LOGERROR)
 
     backend = _get_backend()
+    if ADDON_SYNC_INCREMENTAL and os.path.exists(local_base_path):
+        result = _sync_addon_data_incremental(backend, local_base_path)
+        if result is not None:
+            return result
+        log("sync_addon_data: kein Remote-Manifest, nutze ZIP-Variante.", xbmc.LOGINFO)
+
     if IS_MAIN_SYSTEM:
         # ================
         # Upload-Zweig
@@ -829,8 +1033,10 @@ def run_startup():
     Hauptablauf beim Service-Start (Kodi startet service.py).
     Wird nur von service.py aufgerufen; beim "import auto_ftp_sync" nicht ausgefuehrt.
     """
+    from resources.lib.settings_snapshot import SettingsMonitor
     try:
-        monitor = xbmc.Monitor()
+        # SettingsMonitor: settings are cached for the service and refreshed on onSettingsChanged
+        monitor = SettingsMonitor()
         if monitor.waitForAbort(3):
             pass
     except Exception as e:
@@ -858,57 +1064,44 @@ def run_startup():
         else:
             global _IMAGE_NOTIFICATION_QUIET_UNTIL
             _IMAGE_NOTIFICATION_QUIET_UNTIL = time.time() + 90
-            from resources.lib import auto_clean
-            _mon = xbmc.Monitor()
+            from resources.lib import auto_clean, background, task_pipeline
+            _mon = SettingsMonitor()
             log("Funktionen werden ausgefuehrt.", xbmc.LOGINFO)
-            if _mon.abortRequested():
-                pass
-            else:
-                try:
-                    auto_clean.run_if_due()
-                except Exception as e:
-                    log("auto_clean.run_if_due: %s" % e, xbmc.LOGERROR)
-            if _mon.abortRequested():
-                pass
-            elif _has_connection_configured():
-                try:
-                    ensure_remote_structure()
-                except Exception as e:
-                    log("ensure_remote_structure: %s" % e, xbmc.LOGERROR)
-            if _mon.abortRequested():
-                pass
-            elif _has_connection_configured():
-                try:
-                    sync_addon_data()
-                except Exception as e:
-                    log("sync_addon_data: %s" % e, xbmc.LOGERROR)
-            if _mon.abortRequested():
-                pass
-            else:
-                try:
-                    sync_favourites(no_notification=True)
-                except Exception as e:
-                    log("sync_favourites: %s" % e, xbmc.LOGERROR)
-            if _mon.abortRequested():
-                pass
-            else:
-                try:
-                    download_random_image()
-                except Exception as e:
-                    log("download_random_image: %s" % e, xbmc.LOGERROR)
-            if _mon.abortRequested():
-                pass
-            else:
-                try:
-                    auto_clean.clear_thumbs()
-                    xbmc.executebuiltin('ReloadSkin()')
-                    xbmc.executebuiltin('Container.Refresh()')
-                except Exception as e:
-                    log("clear_thumbs/ReloadSkin: %s" % e, xbmc.LOGERROR)
+
+            def evict_thumbs():
+                # LRU down to the configured budget instead of wiping Textures13.db on every boot
+                budget = auto_clean._thumbs_budget_bytes()
+                if budget > 0 and auto_clean.evict_thumbs(budget)[0]:
+                    background.request_refresh(container=True)
+
+            # Independent jobs run concurrently; addon_data waits for auto-clean (both touch addon_data),
+            # favourites wait for addon_data (Static Favourites live there)
+            T = task_pipeline.Task
+            tasks = [T('auto_clean', auto_clean.run_if_due, timeout=STARTUP_DEADLINES['auto_clean']),
+                     T('image', download_random_image, timeout=STARTUP_DEADLINES['image'])]
+            if _has_connection_configured():
+                tasks += [T('remote_structure', ensure_remote_structure, timeout=STARTUP_DEADLINES['remote_structure']),
+                          T('addon_data', sync_addon_data, deps=('remote_structure', 'auto_clean'),
+                            timeout=STARTUP_DEADLINES['addon_data'])]
+            tasks += [T('favourites', lambda: sync_favourites(no_notification=True),
+                        deps=('remote_structure', 'addon_data'), timeout=STARTUP_DEADLINES['favourites']),
+                      T('thumbs', evict_thumbs, deps=('auto_clean', 'image'),
+                        timeout=STARTUP_DEADLINES['thumbs'])]
+            results = task_pipeline.run_pipeline(tasks, _mon, STARTUP_WORKERS)
+            # All UI refreshes of the startup as one builtin
+            if not _mon.abortRequested():
+                background.flush_refresh()
+            # Refill the image ring cache in the background (next rotation is instant)
+            if ENABLE_IMAGE_ROTATION and not _mon.abortRequested():
+                import threading
+                threading.Thread(target=_image_prefetch_loop, name='image-prefetch', daemon=True).start()
+            # A job past its deadline may still use the shared backend
+            if not any(r['status'] == task_pipeline.TIMEOUT for r in results.values()):
+                close_backend()
 
             if not _mon.abortRequested() and FAVOURITES_SYNC_INTERVAL_MINUTES > 0:
                 interval_sec = FAVOURITES_SYNC_INTERVAL_MINUTES * 60
-                period_monitor = xbmc.Monitor()
+                period_monitor = SettingsMonitor()
                 while True:
                     if period_monitor.waitForAbort(interval_sec):
                         break
@@ -922,6 +1115,7 @@ def run_startup():
                         sync_favourites(no_notification=True)
                     except Exception as e:
                         log("sync_favourites (periodic): %s" % e, xbmc.LOGERROR)
+                    close_backend()
     except Exception as e:
         log("startup: %s" % e, xbmc.LOGERROR)
 
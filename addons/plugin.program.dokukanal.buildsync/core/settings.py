@@ -1,10 +1,12 @@
 # -*- coding: utf-8 -*-
 """
 Read/write settings and localization.
-get_string/get_bool repair on Invalid setting type (like safe_get_*).
+get_string/get_bool repair on Invalid setting type (like safe_get_*); values come from the
+shared snapshot (resources.lib.settings_snapshot), invalidated on onSettingsChanged.
 Optional ensure_settings_initialized from settings_init.
 """
 from core import config
+from resources.lib.settings_snapshot import SNAPSHOT
 
 ADDON = config.ADDON
 
@@ -18,44 +20,29 @@ def get_string(setting_id, default=''):
     """
     Read string setting. On error (e.g. Invalid setting type): write default back, then return default.
     """
-    try:
-        return ADDON.getSettingString(setting_id) or default
-    except (TypeError, Exception):
-        try:
-            ADDON.setSettingString(setting_id, default)
-        except Exception:
-            pass
-        return default
+    return SNAPSHOT.get_string(setting_id, default)
 
 
 def get_bool(setting_id, default=False):
     """
     Liest Bool-Setting. Bei Fehler: Default zurückschreiben, dann default zurückgeben.
     """
-    try:
-        return ADDON.getSettingBool(setting_id)
-    except (TypeError, Exception):
-        try:
-            ADDON.setSettingBool(setting_id, default)
-        except Exception:
-            pass
-        return default
+    return SNAPSHOT.get_bool(setting_id, default)
+
+
+def get_int(setting_id, default=0):
+    """String setting (spinner) as int; default if empty or invalid."""
+    return SNAPSHOT.get_int(setting_id, default)
 
 
 def set_string(setting_id, value):
     """Write string setting. On error: silent."""
-    try:
-        ADDON.setSettingString(setting_id, str(value) if value is not None else '')
-    except (TypeError, Exception):
-        pass
+    SNAPSHOT.set_string(setting_id, value)
 
 
 def set_bool(setting_id, value):
     """Write bool setting. On error: silent."""
-    try:
-        ADDON.setSettingBool(setting_id, bool(value))
-    except (TypeError, Exception):
-        pass
+    SNAPSHOT.set_bool(setting_id, value)
 
 
 def ensure_settings_initialized():
@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+"""
+Incremental addon_data sync via a per-file manifest (path, size, mtime, sha1).
+Main system: upload only changed files, then the updated manifest (manifest last, so
+receivers never see entries whose content is missing). Secondary systems: diff the
+remote manifest against the local index and fetch only changed files.
+The local index caches hashes: files with unchanged size + mtime are not re-hashed.
+Files deleted on the main system are deleted remotely and kept as tombstones ('deleted': rel -> sha1,
+time) in the manifest for TOMBSTONE_TTL; receivers delete their copy if it still has that sha1.
+Uses resources.lib.common for log.
+"""
+import hashlib
+import json
+import os
+import time
+
+import xbmc
+
+from resources.lib.common import log
+
+MANIFEST_NAME = 'addon_data_manifest.json'
+MANIFEST_VERSION = 1
+HASH_CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = '.part'
+# Never synced: transfer and atomic-write leftovers
+TEMP_SUFFIXES = (PART_SUFFIX, '.tmp')
+TOMBSTONE_TTL = 30 * 86400
+
+
+def _file_sha1(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _load(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('version') == MANIFEST_VERSION and isinstance(data.get('files'), dict):
+            return data
+    except (OSError, ValueError) as e:
+        log("addon_data index %s not loaded: %s" % (path, e), xbmc.LOGDEBUG)
+    return {}
+
+
+def load_index(path):
+    """Load an index/manifest JSON file. Returns {rel_path: {size, mtime, sha1}} ({} on error)."""
+    return _load(path).get('files') or {}
+
+
+def load_manifest(path):
+    """Load a manifest. Returns (files, deleted): deleted = {rel_path: {sha1, time}} (tombstones)."""
+    data = _load(path)
+    deleted = data.get('deleted')
+    return data.get('files') or {}, deleted if isinstance(deleted, dict) else {}
+
+
+def save_index(path, files, deleted=None):
+    """Write an index/manifest atomically (temp file + os.replace); deleted: tombstones (manifest only)."""
+    tmp = path + PART_SUFFIX
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {'version': MANIFEST_VERSION, 'files': files}
+    if deleted:
+        data['deleted'] = deleted
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'), sort_keys=True)
+    os.replace(tmp, path)
+
+
+def _matcher(exclude, keep):
+    """
+    excluded(rel) for exclude (rel paths; entries ending in '/' cover a whole folder) and keep
+    (folders ending in '/' that are synced even inside an excluded folder).
+    """
+    exclude = set(exclude)
+    exclude_dirs = tuple(e for e in exclude if e.endswith('/'))
+    keep = tuple(keep)
+
+    def excluded(rel):
+        if keep and rel.startswith(keep):
+            return False
+        return rel in exclude or bool(exclude_dirs and rel.startswith(exclude_dirs))
+    return excluded
+
+
+def build_index(source_dir, previous=None, exclude=(), keep=()):
+    """
+    Scan source_dir and return {rel_path: {size, mtime, sha1}} with '/' separators.
+    previous: earlier index; its sha1 is reused when size and mtime are unchanged.
+    exclude/keep: see _matcher (e.g. the index file itself, this addon's profile except Static Favourites/).
+    """
+    previous = previous or {}
+    excluded = _matcher(exclude, keep)
+    files = {}
+    for root, dirs, names in os.walk(source_dir):
+        for name in names:
+            if name.endswith(TEMP_SUFFIXES):
+                continue
+            abs_path = os.path.join(root, name)
+            rel = os.path.relpath(abs_path, source_dir).replace(os.sep, '/')
+            if excluded(rel):
+                continue
+            try:
+                st = os.stat(abs_path)
+                old = previous.get(rel)
+                if old and old.get('size') == st.st_size and old.get('mtime') == st.st_mtime and old.get('sha1'):
+                    sha1 = old['sha1']
+                else:
+                    sha1 = _file_sha1(abs_path)
+            except OSError as e:
+                log("addon_data index skip %s: %s" % (rel, e), xbmc.LOGDEBUG)
+                continue
+            files[rel] = {'size': st.st_size, 'mtime': st.st_mtime, 'sha1': sha1}
+    return files
+
+
+def _stat_entry(path, sha1):
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime': st.st_mtime, 'sha1': sha1}
+
+
+def push(backend, local_dir, remote_dir, state_path, temp_dir, exclude=(), keep=()):
+    """
+    Upload files that differ from the remote manifest, then the updated manifest. Files no longer
+    present locally (or now excluded) are deleted remotely and recorded as tombstones.
+    Returns (uploaded, failed); failed files keep their old manifest entry and are retried next run.
+    """
+    local = build_index(local_dir, load_index(state_path), exclude, keep)
+    save_index(state_path, local)
+
+    manifest_temp = os.path.join(temp_dir, MANIFEST_NAME)
+    remote = {}
+    tombstones = {}
+    if backend.download(remote_dir + '/' + MANIFEST_NAME, manifest_temp):
+        remote, tombstones = load_manifest(manifest_temp)
+    now = time.time()
+    expired = [rel for rel, t in tombstones.items()
+               if rel in local or not isinstance(t, dict) or now - t.get('time', 0) > TOMBSTONE_TTL]
+    changed = sorted(rel for rel, entry in local.items()
+                     if (remote.get(rel) or {}).get('sha1') != entry['sha1'])
+    deleted = [rel for rel in remote if rel not in local]
+    if not changed and not deleted and not expired:
+        _remove_quietly(manifest_temp)
+        return 0, 0
+
+    backend.ensure_folder(remote_dir)
+    ensured = set()
+    uploaded = failed = 0
+    for rel in changed:
+        parent = rel.rsplit('/', 1)[0] if '/' in rel else ''
+        if parent and parent not in ensured:
+            backend.ensure_folder(remote_dir + '/' + parent)
+            ensured.add(parent)
+        if backend.upload(os.path.join(local_dir, *rel.split('/')), remote_dir + '/' + rel):
+            remote[rel] = local[rel]
+            uploaded += 1
+        else:
+            failed += 1
+    for rel in expired:
+        tombstones.pop(rel, None)
+    for rel in deleted:
+        # Excluded now (e.g. per-device state) is removed like a deletion; receivers only drop unchanged copies
+        if not backend.delete(remote_dir + '/' + rel):
+            log("addon_data push: remote %s not deleted" % rel, xbmc.LOGDEBUG)
+        tombstones[rel] = {'sha1': remote.pop(rel).get('sha1'), 'time': now}
+    save_index(manifest_temp, remote, tombstones)
+    try:
+        if not backend.upload(manifest_temp, remote_dir + '/' + MANIFEST_NAME):
+            log("addon_data manifest upload failed", xbmc.LOGERROR)
+            failed += 1
+    finally:
+        _remove_quietly(manifest_temp)
+    log("addon_data push: %d uploaded, %d failed, %d deleted" % (uploaded, failed, len(deleted)), xbmc.LOGINFO)
+    return uploaded, failed
+
+
+def _safe_rel(rel):
+    return not ('..' in rel.split('/') or rel.startswith('/'))
+
+
+def pull(backend, local_dir, remote_dir, state_path, temp_dir, exclude=(), keep=()):
+    """
+    Download files whose remote sha1 differs from the local copy, and delete local files that the
+    main system deleted (tombstone) if they are still the version it had.
+    Returns (downloaded, failed), or None if there is no remote manifest (caller falls back to ZIP).
+    Other local files missing from the manifest are left untouched (same as the ZIP extract).
+    """
+    manifest_temp = os.path.join(temp_dir, MANIFEST_NAME)
+    try:
+        if not backend.download(remote_dir + '/' + MANIFEST_NAME, manifest_temp):
+            return None
+        remote, tombstones = load_manifest(manifest_temp)
+    finally:
+        _remove_quietly(manifest_temp)
+    if not remote:
+        return None
+
+    local = build_index(local_dir, load_index(state_path), exclude, keep)
+    excluded = _matcher(exclude, keep)
+    removed = 0
+    for rel, tomb in sorted(tombstones.items()):
+        if rel in remote or excluded(rel) or not _safe_rel(rel) or not isinstance(tomb, dict):
+            continue
+        if rel in local and local[rel].get('sha1') == tomb.get('sha1'):
+            try:
+                os.remove(os.path.join(local_dir, *rel.split('/')))
+                del local[rel]
+                removed += 1
+            except OSError as e:
+                log("addon_data pull: delete %s: %s" % (rel, e), xbmc.LOGDEBUG)
+    downloaded = failed = 0
+    for rel, entry in sorted(remote.items()):
+        if excluded(rel) or not _safe_rel(rel):
+            continue
+        if (local.get(rel) or {}).get('sha1') == entry.get('sha1'):
+            continue
+        target = os.path.join(local_dir, *rel.split('/'))
+        part = target + PART_SUFFIX
+        try:
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if not backend.download(remote_dir + '/' + rel, part):
+                failed += 1
+                continue
+            sha1 = _file_sha1(part)
+            if sha1 != entry.get('sha1'):
+                log("addon_data pull: checksum mismatch for %s" % rel, xbmc.LOGERROR)
+                failed += 1
+                continue
+            os.replace(part, target)
+            local[rel] = _stat_entry(target, sha1)
+            downloaded += 1
+        except OSError as e:
+            log("addon_data pull %s: %s" % (rel, e), xbmc.LOGERROR)
+            failed += 1
+        finally:
+            _remove_quietly(part)
+    save_index(state_path, local)
+    log("addon_data pull: %d downloaded, %d failed, %d deleted" % (downloaded, failed, removed), xbmc.LOGINFO)
+    return downloaded, failed
+
+
+def _remove_quietly(path):
+    try:
+        if os.path.isfile(path):
+            os.remove(path)
+    except OSError:
+        pass
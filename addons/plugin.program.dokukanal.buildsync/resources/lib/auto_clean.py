@@ -4,15 +4,19 @@ Auto-Clean: clear cache, packages, optional thumb cache on a schedule.
 Uses addon settings for enable/frequency/sub-options; next run stored in settings.
 Nutzt resources.lib.common für ADDON, Pfade, log, safe_get_string, safe_set_string.
 """
+import json
 import os
 import shutil
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 
 import xbmc
 import xbmcvfs
 
 from resources.lib.common import ADDON, ADDON_ID, HOME, USERDATA, TEMP, log, safe_get_string, safe_set_string
+from resources.lib.common import ADDON_DATA as PROFILE_DIR
 
 CACHE = os.path.join(HOME, 'cache')
 PACKAGES = os.path.join(HOME, 'addons', 'packages')
@@ -23,6 +27,23 @@ LOG_FILES = ['kodi.log', 'kodi.old.log', 'xbmc.log', 'xbmc.old.log']
 USERDATA_LOG_FILES = ['kodi.log', 'kodi.old.log']
 CACHE_SUBDIR_NAMES = frozenset(['cache', 'Cache', 'log', 'logs', 'temp', 'tmp', 'thumbnails', 'Thumbnails'])
 PACKAGES_MIN_AGE_MINUTES = 3
+# Texture cache eviction: rows deleted per statement, incremental_vacuum pages per run (0 = all free pages)
+THUMBS_DELETE_BATCH = 500
+THUMBS_VACUUM_PAGES = 0
+# Files in special://thumbnails without a texture row are deleted once older than this (Kodi writes the file first)
+THUMBS_ORPHAN_MIN_AGE = 3600
+# Dry-run estimate: cached in the addon profile (shared between plugin and service), max age in seconds
+ESTIMATE_FILE = 'clean_estimate.json'
+ESTIMATE_TTL = 300
+ESTIMATE_CATEGORIES = ('cache', 'packages', 'thumbnails', 'logs', 'addon_caches')
+_estimate_lock = threading.Lock()
+# Disk-pressure trigger (service loop): check interval in seconds; the cache/packages/thumbnails
+# low watermark is this fraction of autoclean_pressure_cache
+PRESSURE_CHECK_INTERVAL = 300
+PRESSURE_CACHE_LOW_RATIO = 0.5
+# After a clean that could not reach the low watermark, retry only once the cleanable bytes grew by this much
+PRESSURE_RETRY_BYTES = 64 * 1024 * 1024
+_pressure_backoff = {'managed': None}
 
 
 def _get_setting(key, default=None):
@@ -36,51 +57,107 @@ def _set_setting(key, value):
     safe_set_string(key, value)
 
 
-def clear_cache():
-    """Clear special://home/cache and special://temp (excluding archive_cache and log files). Returns (deleted_count, deleted_bytes)."""
+def _remove_entry(entry):
+    """
+    Delete a DirEntry (file, symlink or whole tree) in one os.scandir pass.
+    Sizes come from the DirEntry's cached stat, so each file costs one stat and one unlink.
+    Returns freed bytes; errors are skipped (rmtree ignore_errors semantics).
+    """
+    freed = 0
+    try:
+        if entry.is_dir(follow_symlinks=False):
+            with os.scandir(entry.path) as it:
+                for child in it:
+                    freed += _remove_entry(child)
+            os.rmdir(entry.path)
+        else:
+            try:
+                freed = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+            os.unlink(entry.path)
+    except OSError:
+        pass
+    return freed
+
+
+def _clean_cache_dir(base_path):
+    """Top level of cache/temp: delete files (except log files) and subdirs (except EXCLUDE_DIRS). Returns (count, bytes)."""
     deleted = 0
     total_bytes = 0
-    for base_path in (CACHE, TEMP):
-        if not os.path.isdir(base_path):
-            continue
+    with os.scandir(base_path) as it:
+        for entry in it:
+            if entry.name in (EXCLUDE_DIRS if entry.is_dir(follow_symlinks=False) else LOG_FILES):
+                continue
+            total_bytes += _remove_entry(entry)
+            deleted += 1
+    return deleted, total_bytes
+
+
+def _clean_addon_caches(path):
+    """Remove CACHE_SUBDIR_NAMES dirs below an addon_data folder (no descent into removed dirs). Returns (dirs, bytes)."""
+    removed = 0
+    total_bytes = 0
+    with os.scandir(path) as it:
+        for entry in it:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            if entry.name in CACHE_SUBDIR_NAMES:
+                total_bytes += _remove_entry(entry)
+                removed += 1
+            else:
+                try:
+                    sub_removed, sub_bytes = _clean_addon_caches(entry.path)
+                except OSError:
+                    continue
+                removed += sub_removed
+                total_bytes += sub_bytes
+    return removed, total_bytes
+
+
+def clean_caches(cache=True, addon_caches=False, exclude_addon_ids=None, temp=True):
+    """
+    Cache-Reinigung in einem Durchlauf (os.scandir, ein stat + unlink pro Datei):
+    cache: special://home/cache und (temp=True) special://temp (ohne archive_cache/meta_cache und Logdateien);
+    addon_caches: cache/log/temp-Unterordner in addon_data (außer exclude_addon_ids).
+    Returns: (cache_count, cache_bytes, addon_dirs, addon_bytes).
+    """
+    cache_count = cache_bytes = addon_dirs = addon_bytes = 0
+    if cache:
+        for base_path in ((CACHE, TEMP) if temp else (CACHE,)):
+            if not os.path.isdir(base_path):
+                continue
+            try:
+                count, freed = _clean_cache_dir(base_path)
+                cache_count += count
+                cache_bytes += freed
+            except OSError as e:
+                log("clear_cache %s: %s" % (base_path, e), xbmc.LOGERROR)
+    if addon_caches and os.path.isdir(ADDON_DATA):
+        exclude_addon_ids = set(exclude_addon_ids or ())
         try:
-            for root, dirs, files in os.walk(base_path, topdown=True):
-                dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
-                for f in files:
-                    if f in LOG_FILES:
-                        continue
-                    try:
-                        path = os.path.join(root, f)
-                        try:
-                            total_bytes += os.path.getsize(path)
-                        except OSError:
-                            pass
-                        os.unlink(path)
-                        deleted += 1
-                    except OSError:
-                        pass
-                for d in dirs:
-                    try:
-                        path = os.path.join(root, d)
-                        if os.path.isdir(path):
-                            try:
-                                for _root, _dirs, _files in os.walk(path):
-                                    for _f in _files:
-                                        p = os.path.join(_root, _f)
-                                        try:
-                                            total_bytes += os.path.getsize(p)
-                                        except OSError:
-                                            pass
-                            except OSError:
-                                pass
-                            shutil.rmtree(path, ignore_errors=True)
-                            deleted += 1
-                    except OSError:
-                        pass
-        except Exception as e:
-            log("clear_cache %s: %s" % (base_path, e), xbmc.LOGERROR)
-    if deleted > 0:
-        log("Cache cleared, %s items removed" % deleted, xbmc.LOGINFO)
+            with os.scandir(ADDON_DATA) as it:
+                addon_entries = [e for e in it if e.name not in exclude_addon_ids and e.is_dir(follow_symlinks=False)]
+        except OSError as e:
+            log("clear_addon_data_caches: %s" % e, xbmc.LOGERROR)
+            addon_entries = []
+        for entry in addon_entries:
+            try:
+                dirs, freed = _clean_addon_caches(entry.path)
+                addon_dirs += dirs
+                addon_bytes += freed
+            except OSError as e:
+                log("clear_addon_data_caches %s: %s" % (entry.name, e), xbmc.LOGERROR)
+    if cache_count > 0:
+        log("Cache cleared, %s items removed" % cache_count, xbmc.LOGINFO)
+    if addon_dirs > 0:
+        log("Addon data caches cleared: %s dirs" % addon_dirs, xbmc.LOGINFO)
+    return cache_count, cache_bytes, addon_dirs, addon_bytes
+
+
+def clear_cache():
+    """Clear special://home/cache and special://temp (excluding archive_cache and log files). Returns (deleted_count, deleted_bytes)."""
+    deleted, total_bytes, _dirs, _bytes = clean_caches(cache=True)
     return (deleted, total_bytes)
 
 
@@ -131,36 +208,7 @@ def clear_userdata_logs():
 
 def clear_addon_data_caches(exclude_addon_ids=None):
     """Clear cache/log/temp subdirs under special://userdata/addon_data for each addon (except excluded)."""
-    if exclude_addon_ids is None:
-        exclude_addon_ids = set()
-    else:
-        exclude_addon_ids = set(exclude_addon_ids)
-    if not os.path.isdir(ADDON_DATA):
-        return 0
-    total_deleted = 0
-    for addon_id in os.listdir(ADDON_DATA):
-        if addon_id in exclude_addon_ids:
-            continue
-        addon_path = os.path.join(ADDON_DATA, addon_id)
-        if not os.path.isdir(addon_path):
-            continue
-        try:
-            for root, dirs, files in os.walk(addon_path, topdown=True):
-                for d in list(dirs):
-                    if d in CACHE_SUBDIR_NAMES:
-                        path = os.path.join(root, d)
-                        try:
-                            if os.path.isdir(path):
-                                shutil.rmtree(path, ignore_errors=True)
-                                total_deleted += 1
-                        except OSError:
-                            pass
-                        dirs.remove(d)
-        except Exception as e:
-            log("clear_addon_data_caches %s: %s" % (addon_id, e), xbmc.LOGERROR)
-    if total_deleted > 0:
-        log("Addon data caches cleared: %s dirs" % total_deleted, xbmc.LOGINFO)
-    return total_deleted
+    return clean_caches(cache=False, addon_caches=True, exclude_addon_ids=exclude_addon_ids)[2]
 
 
 def clear_thumbs():
@@ -185,6 +233,158 @@ def clear_thumbs():
         return 0
 
 
+def forget_textures(urls):
+    """
+    Remove the cached textures of the given image URLs (rows + files), so Kodi loads them fresh.
+    Returns number of textures removed.
+    """
+    db_path = xbmcvfs.translatePath('special://database/Textures13.db')
+    thumbs_dir = xbmcvfs.translatePath('special://thumbnails')
+    if not urls or not os.path.exists(db_path):
+        return 0
+    try:
+        import sqlite3
+        conn = sqlite3.connect(db_path, timeout=10)
+        try:
+            cur = conn.cursor()
+            cur.execute("SELECT id, cachedurl FROM texture WHERE url IN (%s)" % ','.join('?' * len(urls)), list(urls))
+            victims = cur.fetchall()
+            cur.executemany("DELETE FROM sizes WHERE idtexture = ?", [(texture_id,) for texture_id, _rel in victims])
+            cur.executemany("DELETE FROM texture WHERE id = ?", [(texture_id,) for texture_id, _rel in victims])
+            conn.commit()
+        finally:
+            conn.close()
+    except Exception as e:
+        log("forget_textures: %s" % e, xbmc.LOGWARNING)
+        return 0
+    for _texture_id, rel in victims:
+        if rel:
+            try:
+                os.unlink(os.path.join(thumbs_dir, *rel.replace('\\', '/').split('/')))
+            except OSError:
+                pass
+    return len(victims)
+
+
+def _thumbnail_sizes(thumbs_dir):
+    """{cachedurl ('0/abc.jpg'): bytes} for all files under special://thumbnails (os.scandir, cached stat)."""
+    sizes = {}
+    try:
+        with os.scandir(thumbs_dir) as it:
+            folders = [e for e in it if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return sizes
+    for folder in folders:
+        try:
+            with os.scandir(folder.path) as it:
+                for entry in it:
+                    if entry.is_file(follow_symlinks=False):
+                        sizes[folder.name + '/' + entry.name] = entry.stat(follow_symlinks=False).st_size
+        except OSError:
+            pass
+    return sizes
+
+
+def _lru_victims(cur, file_sizes, budget_bytes):
+    """
+    Textures to evict, oldest lastusetime / lowest usecount first, until the files with a texture row
+    fit budget_bytes. Files without a row (orphans) do not count against the budget; they are returned
+    separately. Returns ([(id, cachedurl)], bytes, [orphan cachedurl]).
+    """
+    cur.execute(
+        "SELECT t.id, t.cachedurl FROM texture t LEFT JOIN sizes s ON s.idtexture = t.id "
+        "GROUP BY t.id ORDER BY COALESCE(MAX(s.lastusetime), '') ASC, COALESCE(SUM(s.usecount), 0) ASC")
+    rows = [(texture_id, (cachedurl or '').replace('\\', '/')) for texture_id, cachedurl in cur.fetchall()]
+    referenced = set(rel for _id, rel in rows)
+    orphans = [rel for rel in file_sizes if rel not in referenced]
+    total = sum(file_sizes.get(rel, 0) for rel in referenced)
+    victims = []
+    freed = 0
+    for texture_id, rel in rows:
+        if total <= budget_bytes:
+            break
+        size = file_sizes.get(rel, 0)
+        victims.append((texture_id, rel))
+        total -= size
+        freed += size
+    return victims, freed, orphans
+
+
+def _thumbs_budget_bytes():
+    """Setting autoclean_thumbs_budget in bytes; 0 = clear the whole texture cache."""
+    try:
+        return int(_get_setting('autoclean_thumbs_budget', '250') or '0') * 1024 * 1024
+    except ValueError:
+        return 250 * 1024 * 1024
+
+
+def evict_thumbs(budget_bytes):
+    """
+    LRU-Verdrängung im Texture-Cache statt Komplettlöschung: Texturen nach sizes.lastusetime/usecount
+    (älteste, seltenste zuerst) samt Datei in special://thumbnails entfernen, bis der Cache <= budget_bytes ist;
+    Dateien ohne Datenbankeintrag (älter als THUMBS_ORPHAN_MIN_AGE) werden mitgelöscht.
+    Danach PRAGMA incremental_vacuum statt blockierendem VACUUM (einmalig ein VACUUM, um die Datenbank
+    auf auto_vacuum=INCREMENTAL umzustellen). Returns (removed_count, freed_bytes).
+    """
+    db_path = xbmcvfs.translatePath('special://database/Textures13.db')
+    thumbs_dir = xbmcvfs.translatePath('special://thumbnails')
+    if not os.path.exists(db_path):
+        return (0, 0)
+    file_sizes = _thumbnail_sizes(thumbs_dir)
+    if sum(file_sizes.values()) <= budget_bytes:
+        return (0, 0)
+    removed = 0
+    try:
+        import sqlite3
+        conn = sqlite3.connect(db_path, timeout=10)
+        try:
+            cur = conn.cursor()
+            victims, freed, orphans = _lru_victims(cur, file_sizes, budget_bytes)
+            for i in range(0, len(victims), THUMBS_DELETE_BATCH):
+                ids = [(texture_id,) for texture_id, _rel in victims[i:i + THUMBS_DELETE_BATCH]]
+                cur.executemany("DELETE FROM sizes WHERE idtexture = ?", ids)
+                cur.executemany("DELETE FROM texture WHERE id = ?", ids)
+                conn.commit()
+            # Files only after the rows are gone: Kodi never references a missing file
+            for _texture_id, rel in victims:
+                if rel:
+                    try:
+                        os.unlink(os.path.join(thumbs_dir, *rel.split('/')))
+                    except OSError:
+                        pass
+            removed = len(victims)
+            cutoff = time.time() - THUMBS_ORPHAN_MIN_AGE
+            for rel in orphans:
+                path = os.path.join(thumbs_dir, *rel.split('/'))
+                try:
+                    if os.path.getmtime(path) < cutoff:
+                        os.unlink(path)
+                        removed += 1
+                        freed += file_sizes[rel]
+                except OSError:
+                    pass
+            # incremental_vacuum needs auto_vacuum=INCREMENTAL, which Kodi's Textures13.db does not use:
+            # switching takes effect only with a full VACUUM, run once here; afterwards each run is incremental.
+            try:
+                if victims and cur.execute("PRAGMA auto_vacuum").fetchone()[0] == 2:
+                    cur.execute("PRAGMA incremental_vacuum(%d)" % THUMBS_VACUUM_PAGES)
+                    cur.fetchall()
+                    conn.commit()
+                elif victims:
+                    cur.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                    cur.execute("VACUUM")
+            except sqlite3.Error as e:
+                log("evict_thumbs vacuum: %s" % e, xbmc.LOGWARNING)
+        finally:
+            conn.close()
+    except Exception as e:
+        log("evict_thumbs: %s" % e, xbmc.LOGERROR)
+        return (0, 0)
+    if removed:
+        log("Thumbnail cache: %d textures evicted, %s freed" % (removed, _format_size(freed)), xbmc.LOGINFO)
+    return (removed, freed)
+
+
 def _format_size(bytes_val):
     """Format bytes as MB or KB for display."""
     if bytes_val >= 1024 * 1024:
@@ -194,11 +394,308 @@ def _format_size(bytes_val):
     return "%d B" % bytes_val
 
 
+def _tree_size(path):
+    """(files, bytes) below path without deleting (os.scandir, cached stat); a file counts as one."""
+    files = 0
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        sub_files, sub_bytes = _tree_size(entry.path)
+                        files += sub_files
+                        total += sub_bytes
+                    else:
+                        files += 1
+                        total += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    pass
+    except NotADirectoryError:
+        return 1, os.path.getsize(path)
+    except OSError:
+        pass
+    return files, total
+
+
+def _estimate_cache(temp=True):
+    files = total = 0
+    for base_path in ((CACHE, TEMP) if temp else (CACHE,)):
+        try:
+            with os.scandir(base_path) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name in EXCLUDE_DIRS:
+                        continue
+                    sub_files, sub_bytes = _tree_size(entry.path)
+                    files += sub_files
+                    total += sub_bytes
+                elif entry.name not in LOG_FILES:
+                    files += 1
+                    total += entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                pass
+    return files, total
+
+
+def _estimate_packages():
+    cutoff = time.time() - PACKAGES_MIN_AGE_MINUTES * 60
+    files = total = 0
+    try:
+        with os.scandir(PACKAGES) as it:
+            entries = list(it)
+    except OSError:
+        return 0, 0
+    for entry in entries:
+        try:
+            if entry.stat(follow_symlinks=False).st_mtime > cutoff:
+                continue
+            sub_files, sub_bytes = _tree_size(entry.path)
+            files += sub_files
+            total += sub_bytes
+        except OSError:
+            pass
+    return files, total
+
+
+def _estimate_thumbnails():
+    """Budget mode: what evict_thumbs would remove (read-only DB); otherwise the whole texture cache."""
+    file_sizes = _thumbnail_sizes(xbmcvfs.translatePath('special://thumbnails'))
+    budget = _thumbs_budget_bytes()
+    if budget <= 0:
+        return len(file_sizes), sum(file_sizes.values())
+    if sum(file_sizes.values()) <= budget:
+        return 0, 0
+    db_path = xbmcvfs.translatePath('special://database/Textures13.db')
+    import sqlite3
+    conn = sqlite3.connect('file:%s?mode=ro' % db_path.replace('\\', '/'), uri=True, timeout=10)
+    try:
+        victims, freed, orphans = _lru_victims(conn.cursor(), file_sizes, budget)
+    finally:
+        conn.close()
+    return (sum(1 for _id, rel in victims if rel in file_sizes) + len(orphans),
+            freed + sum(file_sizes[rel] for rel in orphans))
+
+
+def _estimate_logs():
+    files = total = 0
+    for name in USERDATA_LOG_FILES:
+        try:
+            total += os.path.getsize(os.path.join(USERDATA, name))
+            files += 1
+        except OSError:
+            pass
+    return files, total
+
+
+def _estimate_addon_caches(path=None, top=True):
+    files = total = 0
+    try:
+        with os.scandir(path or ADDON_DATA) as it:
+            entries = [e for e in it if e.is_dir(follow_symlinks=False) and not (top and e.name == ADDON_ID)]
+    except OSError:
+        return 0, 0
+    for entry in entries:
+        if not top and entry.name in CACHE_SUBDIR_NAMES:
+            sub_files, sub_bytes = _tree_size(entry.path)
+        else:
+            sub_files, sub_bytes = _estimate_addon_caches(entry.path, top=False)
+        files += sub_files
+        total += sub_bytes
+    return files, total
+
+
+def estimate_auto_clean(max_age=ESTIMATE_TTL):
+    """
+    Trockenlauf: was würde jede Kategorie freigeben, ohne etwas zu löschen. Alle Kategorien werden
+    parallel gescannt; das Ergebnis wird max_age Sekunden im Addon-Profil gecacht (0 = neu scannen).
+    Returns: {'cache'|'packages'|'thumbnails'|'logs'|'addon_caches': (files, bytes), 'time': epoch}.
+    """
+    cache_path = os.path.join(PROFILE_DIR, ESTIMATE_FILE)
+    with _estimate_lock:
+        if max_age > 0:
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    cached = json.load(f)
+                if time.time() - cached.get('time', 0) < max_age:
+                    return dict((k, tuple(v)) if k != 'time' else (k, v) for k, v in cached.items())
+            except (OSError, ValueError, AttributeError, TypeError):
+                pass
+        scanners = {
+            'cache': _estimate_cache,
+            'packages': _estimate_packages,
+            'thumbnails': _estimate_thumbnails,
+            'logs': _estimate_logs,
+            'addon_caches': _estimate_addon_caches,
+        }
+        result = {}
+        with ThreadPoolExecutor(max_workers=len(scanners)) as pool:
+            futures = {name: pool.submit(fn) for name, fn in scanners.items()}
+            for name, future in futures.items():
+                try:
+                    result[name] = future.result()
+                except Exception as e:
+                    log("estimate %s: %s" % (name, e), xbmc.LOGERROR)
+                    result[name] = (0, 0)
+        result['time'] = time.time()
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(result, f)
+            os.replace(cache_path + '.tmp', cache_path)
+        except OSError as e:
+            log("estimate cache not written: %s" % e, xbmc.LOGDEBUG)
+        return result
+
+
+def format_estimate(result):
+    """Per-category report lines for estimate_auto_clean() (categories disabled in settings are marked)."""
+    enabled = {
+        'cache': _get_setting('autoclean_clearcache', 'true') == 'true',
+        'packages': _get_setting('autoclean_clearpackages', 'true') == 'true',
+        'thumbnails': _get_setting('autoclean_clearthumbs', 'false') == 'true',
+        'logs': _get_setting('autoclean_clearlogs', 'false') == 'true',
+        'addon_caches': _get_setting('autoclean_clearaddoncaches', 'false') == 'true',
+    }
+    labels = {'cache': 30057, 'packages': 30058, 'thumbnails': 30059, 'logs': 30077, 'addon_caches': 30078}
+    lines = []
+    total = 0
+    for name in ESTIMATE_CATEGORIES:
+        files, size = result.get(name, (0, 0))
+        line = "%s: %s (%d)" % (ADDON.getLocalizedString(labels[name]), _format_size(size), files)
+        if enabled[name]:
+            total += size
+        else:
+            line = "[COLOR grey]%s[/COLOR]" % line
+        lines.append(line)
+    lines.append("")
+    lines.append(ADDON.getLocalizedString(30408).format(size=_format_size(total)))
+    return "\n".join(lines)
+
+
+def _pressure_categories():
+    """Categories the watermark clean may touch: the auto-clean toggles (cache, packages, thumbnails, addon_caches)."""
+    return set(name for name, key, default in (
+        ('cache', 'autoclean_clearcache', 'true'),
+        ('packages', 'autoclean_clearpackages', 'true'),
+        ('thumbnails', 'autoclean_clearthumbs', 'false'),
+        ('addon_caches', 'autoclean_clearaddoncaches', 'false'),
+    ) if _get_setting(key, default) == 'true')
+
+
+def pressure_state(categories=('cache', 'packages', 'thumbnails')):
+    """
+    Füllstand für den Watermark-Trigger: Dateisystem von special://home (total/used) und
+    Größe von cache, packages und Thumbnails, soweit in categories (read-only Scan). special://temp
+    zählt nicht mit: dort liegen laufende Backup-/Restore-Transfers, die die Reinigung nicht anfassen darf.
+    Returns dict (bytes).
+    """
+    usage = shutil.disk_usage(HOME)
+    thumbs = 0
+    if 'thumbnails' in categories:
+        thumbs = sum(_thumbnail_sizes(xbmcvfs.translatePath('special://thumbnails')).values())
+    managed = thumbs
+    if 'cache' in categories:
+        managed += _estimate_cache(temp=False)[1]
+    if 'packages' in categories:
+        managed += _estimate_packages()[1]
+    return {'total': usage.total, 'used': usage.total - usage.free, 'managed': managed, 'thumbs': thumbs}
+
+
+def _pressure_settings():
+    """(high_pct, low_pct, cache_high_bytes) from settings; low is clamped below high."""
+    try:
+        high = int(_get_setting('autoclean_pressure_high', '90') or '90')
+        low = int(_get_setting('autoclean_pressure_low', '80') or '80')
+        cache_mb = int(_get_setting('autoclean_pressure_cache', '1000') or '0')
+    except ValueError:
+        high, low, cache_mb = 90, 80, 1000
+    return high, min(low, high - 5), cache_mb * 1024 * 1024
+
+
+def run_pressure_clean():
+    """
+    Watermark-Reinigung: startet erst, wenn der Füllstand von special://home über autoclean_pressure_high
+    oder cache+packages+Thumbnails über autoclean_pressure_cache liegt, und hört nach dem Schritt auf,
+    der beide unter die Low-Watermark bringt (packages, cache, Thumbnails LRU, Addon-Caches; nur die in
+    den Auto-Clean-Einstellungen aktivierten). Erreicht eine Reinigung die Low-Watermark nicht, wird erst
+    wieder gereinigt, wenn die reinigbaren Daten um PRESSURE_RETRY_BYTES gewachsen sind.
+    Returns: Statistik-Text oder None, wenn kein Druck bestand (oder noch Backoff).
+    """
+    high, low, cache_high = _pressure_settings()
+    cache_low = int(cache_high * PRESSURE_CACHE_LOW_RATIO)
+    categories = _pressure_categories()
+    state = pressure_state(categories)
+
+    def over(st, pct, cache_limit):
+        return st['used'] * 100 >= st['total'] * pct or (cache_limit > 0 and st['managed'] >= cache_limit)
+
+    if not over(state, high, cache_high):
+        _pressure_backoff['managed'] = None
+        return None
+    last = _pressure_backoff['managed']
+    if last is not None and state['managed'] < last + PRESSURE_RETRY_BYTES:
+        return None
+    log("Disk pressure: %d%% used, caches %s - cleaning to %d%%" % (
+        state['used'] * 100 // max(state['total'], 1), _format_size(state['managed']), low), xbmc.LOGINFO)
+    lines = []
+    steps = [step for step in ('packages', 'cache', 'thumbnails', 'addon_caches') if step in categories]
+    for step in steps:
+        if not over(state, low, cache_low):
+            break
+        if step == 'packages':
+            n = clear_packages_startup()
+            if n > 0:
+                lines.append("Packages: %d Dateien" % n)
+        elif step == 'cache':
+            # Without special://temp: a backup/restore in the plugin may be streaming into it right now
+            cnt, b, _dirs, _bytes = clean_caches(cache=True, temp=False)
+            if cnt > 0:
+                lines.append("Cache: %d %s, %s" % (cnt, "Einträge" if cnt != 1 else "Eintrag", _format_size(b)))
+        elif step == 'thumbnails':
+            # Only the thumbnails' share of the overage: the cache watermark, or a disk overage that the
+            # cleanable bytes can cover at all (a disk full of media must not empty the texture cache)
+            disk_needed = state['used'] - state['total'] * low // 100
+            needed = max(state['managed'] - cache_low if cache_high > 0 else 0,
+                         disk_needed if disk_needed <= state['managed'] else 0)
+            if needed > 0:
+                budget = max(0, state['thumbs'] - needed)
+                if _thumbs_budget_bytes() > 0:
+                    budget = min(budget, _thumbs_budget_bytes())
+                n, b = evict_thumbs(budget)
+                if n > 0:
+                    lines.append("Thumbnails: %d entfernt, %s" % (n, _format_size(b)))
+        else:
+            n = clear_addon_data_caches(exclude_addon_ids=[ADDON_ID])
+            if n > 0:
+                lines.append("Addon-Caches: %d Ordner geleert" % n)
+        state = pressure_state(categories)
+    try:
+        os.remove(os.path.join(PROFILE_DIR, ESTIMATE_FILE))
+    except OSError:
+        pass
+    if over(state, low, cache_low):
+        log("Disk pressure remains after clean: %d%% used, pausing until caches grow" % (
+            state['used'] * 100 // max(state['total'], 1)), xbmc.LOGWARNING)
+        _pressure_backoff['managed'] = state['managed']
+    else:
+        _pressure_backoff['managed'] = None
+    return "\n".join(lines) if lines else ADDON.getLocalizedString(30319)
+
+
 def run_auto_clean():
     """Run clean actions according to settings. Returns a short statistics string for display."""
     lines = []
-    if _get_setting('autoclean_clearcache', 'true') == 'true':
-        cnt, b = clear_cache()
+    clean_cache = _get_setting('autoclean_clearcache', 'true') == 'true'
+    clean_addon_caches = _get_setting('autoclean_clearaddoncaches', 'false') == 'true'
+    addon_dirs = 0
+    if clean_cache or clean_addon_caches:
+        # cache/temp and addon_data caches in one pass
+        cnt, b, addon_dirs, _addon_bytes = clean_caches(clean_cache, clean_addon_caches, exclude_addon_ids=[ADDON_ID])
         if cnt > 0:
             lines.append("Cache: %d %s, %s" % (cnt, "Einträge" if cnt != 1 else "Eintrag", _format_size(b)))
     if _get_setting('autoclean_clearpackages', 'true') == 'true':
@@ -206,17 +703,26 @@ def run_auto_clean():
         if n > 0:
             lines.append("Packages: %d Dateien" % n)
     if _get_setting('autoclean_clearthumbs', 'false') == 'true':
-        n = clear_thumbs()
-        if n > 0:
-            lines.append("Thumbnails: Datenbank geleert")
+        budget = _thumbs_budget_bytes()
+        if budget > 0:
+            n, b = evict_thumbs(budget)
+            if n > 0:
+                lines.append("Thumbnails: %d entfernt, %s" % (n, _format_size(b)))
+        else:
+            n = clear_thumbs()
+            if n > 0:
+                lines.append("Thumbnails: Datenbank geleert")
     if _get_setting('autoclean_clearlogs', 'false') == 'true':
         n = clear_userdata_logs()
         if n > 0:
             lines.append("Logs: %d Dateien geleert" % n)
-    if _get_setting('autoclean_clearaddoncaches', 'false') == 'true':
-        n = clear_addon_data_caches(exclude_addon_ids=[ADDON_ID])
-        if n > 0:
-            lines.append("Addon-Caches: %d Ordner geleert" % n)
+    if addon_dirs > 0:
+        lines.append("Addon-Caches: %d Ordner geleert" % addon_dirs)
+    # Freed space changes the estimate; next report rescans
+    try:
+        os.remove(os.path.join(PROFILE_DIR, ESTIMATE_FILE))
+    except OSError:
+        pass
     if lines:
         return "\n".join(lines)
     return ADDON.getLocalizedString(30319)
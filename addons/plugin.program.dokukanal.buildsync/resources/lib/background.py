@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Hintergrundbild aktivieren ohne ReloadSkin: das neue Bild wird neben dem aktiven bereitgestellt
+(Hardlink, Kopie nur als Fallback) und per os.replace atomar eingesetzt, abwechselnd unter zwei
+Dateinamen. Skin.String(home.slideshowpath) zeigt danach auf den neuen Namen, das Skin lädt das
+Bild ohne Neuladen. UI-Refreshes (ReloadSkin/Container.Refresh) werden mit request_refresh gesammelt
+und von flush_refresh höchstens einmal ausgeführt.
+Uses resources.lib.common for USERDATA, log.
+"""
+import os
+import shutil
+import threading
+
+import xbmc
+
+from resources.lib.common import USERDATA, log
+
+BACKGROUND_NAMES = ('doku_background_a.jpg', 'doku_background_b.jpg')
+# Single background file of earlier versions; removed on the first activation
+LEGACY_BACKGROUND_NAME = 'doku_background.jpg'
+SKIN_STRING = 'home.slideshowpath'
+
+_refresh_lock = threading.Lock()
+_pending_refresh = {'reload_skin': False, 'container': False}
+
+
+def _skin_path(name):
+    return 'special://userdata/' + name
+
+
+def _next_name():
+    """The background name that is not active right now."""
+    active = xbmc.getInfoLabel('Skin.String(%s)' % SKIN_STRING) or ''
+    return BACKGROUND_NAMES[1] if active.endswith(BACKGROUND_NAMES[0]) else BACKGROUND_NAMES[0]
+
+
+def _stage(source_path, staged_path):
+    """Hardlink source_path to staged_path (no data copy); streamed copy if linking is not possible."""
+    try:
+        os.remove(staged_path)
+    except OSError:
+        pass
+    try:
+        os.link(source_path, staged_path)
+    except (OSError, AttributeError):
+        shutil.copyfile(source_path, staged_path)
+
+
+def activate(source_path):
+    """
+    Setzt source_path als Hintergrund: atomar unter dem gerade inaktiven Namen ablegen,
+    dessen alte Textur aus dem Texture-Cache entfernen und home.slideshowpath umstellen.
+    Returns: True bei Erfolg.
+    """
+    name = _next_name()
+    target = os.path.join(USERDATA, name)
+    staged = target + '.tmp'
+    try:
+        _stage(source_path, staged)
+        os.replace(staged, target)
+    except OSError as e:
+        log("Background activation failed: %s" % e, xbmc.LOGERROR)
+        try:
+            os.remove(staged)
+        except OSError:
+            pass
+        return False
+    # Kodi checks local image hashes only once a day: drop the texture cached for this name
+    from resources.lib import auto_clean
+    auto_clean.forget_textures([_skin_path(name), target])
+    xbmc.executebuiltin('Skin.SetString(%s,%s)' % (SKIN_STRING, _skin_path(name)))
+    _remove_legacy()
+    return True
+
+
+def _remove_legacy():
+    """Delete the pre-rotation doku_background.jpg (and its texture) once the skin points elsewhere."""
+    legacy = os.path.join(USERDATA, LEGACY_BACKGROUND_NAME)
+    if not os.path.exists(legacy):
+        return
+    try:
+        os.remove(legacy)
+    except OSError as e:
+        log("Old background not removed: %s" % e, xbmc.LOGDEBUG)
+        return
+    from resources.lib import auto_clean
+    auto_clean.forget_textures([_skin_path(LEGACY_BACKGROUND_NAME), legacy])
+
+
+def request_refresh(reload_skin=False, container=False):
+    """Merkt einen UI-Refresh vor; ausgeführt wird er erst von flush_refresh."""
+    with _refresh_lock:
+        _pending_refresh['reload_skin'] = _pending_refresh['reload_skin'] or reload_skin
+        _pending_refresh['container'] = _pending_refresh['container'] or container
+
+
+def flush_refresh():
+    """
+    Führt vorgemerkte Refreshes als ein einziges Builtin aus (ReloadSkin schließt Container.Refresh ein).
+    Returns: ausgeführtes Builtin oder None.
+    """
+    with _refresh_lock:
+        reload_skin = _pending_refresh['reload_skin']
+        container = _pending_refresh['container']
+        _pending_refresh['reload_skin'] = _pending_refresh['container'] = False
+    builtin = 'ReloadSkin()' if reload_skin else ('Container.Refresh()' if container else None)
+    if builtin:
+        xbmc.executebuiltin(builtin)
+    return builtin
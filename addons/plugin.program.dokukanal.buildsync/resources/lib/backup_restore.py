@@ -5,17 +5,25 @@ Uses addon settings for paths. Supports restore from local file or URL.
 Uses resources.lib.common for ADDON, paths, log.
 Validation: manifest (creator + version) and path whitelist (userdata/ and addons/ only).
 """
+import hashlib
 import json
 import os
+import shutil
+import threading
+import time
 import zipfile
+import zlib
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 
 import xbmc
 import xbmcgui
 import xbmcvfs
 
+from resources.lib import backup_store, compression_policy, parallel_zip, sync_backend
 from resources.lib.common import ADDON, ADDON_ID, ADDON_PATH, HOME, USERDATA, log
+from resources.lib.common import ADDON_DATA as PROFILE_DIR
 
 ADDONS_DIR = os.path.join(HOME, 'addons')
 
@@ -24,6 +32,10 @@ EXCLUDE_DIRS = ['cache', 'temp', 'packages', 'archive_cache']
 ADDONS_EXCLUDE = ['packages']  # addons subdirs to skip in build backup
 EXCLUDE_FILES = ['kodi.log', 'kodi.old.log', 'xbmc.log', 'xbmc.old.log', '.DS_Store']
 DATA_PATH = os.path.join(USERDATA, 'addon_data')
+# Restore downloads from a connection (resumable .part files): in the addon profile, not special://temp,
+# which _wipe_temp and the cache cleaner empty. Abandoned .part files older than this are removed.
+RESTORE_DOWNLOAD_DIR = os.path.join(PROFILE_DIR, 'restore_downloads')
+RESTORE_PART_MAX_AGE = 7 * 86400
 
 # Only files with this prefix count as build backup (create_backup_core writes doku_backup_DDMMYYYY_HHMM.zip)
 BACKUP_FILENAME_PREFIX = "doku_backup_"
@@ -32,10 +44,30 @@ BACKUP_MANIFEST_FILENAME = "doku_backup_manifest.json"
 BACKUP_MANIFEST_VERSION = 1
 # Allowed top-level paths in backup (no path traversal, no other folders)
 BACKUP_ALLOWED_PREFIXES = ("userdata/", "userdata\\", "addons/", "addons\\")
+# Setting backup_format: classic ZIP or deduplicating snapshot store (backup_store)
+BACKUP_FORMAT_ZIP = "0"
+BACKUP_FORMAT_STORE = "1"
+# Setting backup_mode; per ZIP backup a small summary index (doku_backup_*.json, listing/validation,
+# uploaded next to the ZIP) and the file map (doku_backup_*.files.json, local, reference for the next one)
+BACKUP_MODE_FULL = "0"
+BACKUP_MODE_INCREMENTAL = "1"
+BACKUP_MODE_DIFFERENTIAL = "2"
+BACKUP_INDEX_SUFFIX = ".json"
+BACKUP_FILES_SUFFIX = ".files.json"
+BACKUP_INDEX_VERSION = 2
+# Remote catalog next to the uploaded ZIPs: one small download lists all backups with metadata
+BACKUP_CATALOG_FILENAME = "doku_backup_catalog.json"
+BACKUP_CATALOG_VERSION = 1
+# Restore: parallel extraction workers, copy buffer per member
+RESTORE_WORKERS = 4
+RESTORE_BUFFER_SIZE = 1024 * 1024
 
 
 def _load_backup_config():
-    """Load configurable backup list from resources/backup_restore.json. Returns None on error."""
+    """
+    Load configurable backup list from resources/backup_restore.json. Returns None on error.
+    Accepts a plain list or {"items": [...], "compression": {...}} (see compression_policy).
+    """
     try:
         json_path = os.path.join(ADDON_PATH, 'resources', 'backup_restore.json')
         if not os.path.exists(json_path):
@@ -43,6 +75,8 @@ def _load_backup_config():
         import json
         with open(json_path, 'r', encoding='utf-8', errors='ignore') as f:
             data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get('items')
         return data if isinstance(data, list) else None
     except Exception as e:
         log("Load backup config: %s" % e, xbmc.LOGDEBUG)
@@ -79,7 +113,7 @@ def _collect_backup_items_from_config(config, include_addon_data=True):
             if not os.path.isdir(folder_path):
                 continue
             for root, dirs, files in os.walk(folder_path):
-                dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
+                dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS and not _is_restore_download_dir(root, d)]
                 for f in files:
                     if f in EXCLUDE_FILES or f.startswith('._'):
                         continue
@@ -189,22 +223,8 @@ def _format_size(size):
     return f"{size:.1f} TB"
 
 
-def create_backup_core(include_addon_data=True, target_base=None, progress_callback=None):
-    """
-    Build-Backup ohne Dialoge. progress_callback(i, total, arcname) optional.
-    Returns: (True, success_message) or (False, error_message).
-    """
-    backup_base = target_base or _get_backup_path()
-    try:
-        if not os.path.isdir(backup_base):
-            os.makedirs(backup_base, exist_ok=True)
-    except OSError as e:
-        log("Cannot create backup dir: %s" % e, xbmc.LOGERROR)
-        return False, ADDON.getLocalizedString(30043)
-
-    name = "doku_backup_%s.zip" % datetime.now().strftime('%d%m%Y_%H%M')
-    zip_path = os.path.join(backup_base, name)
-
+def _collect_backup_items(include_addon_data=True):
+    """(abs_path, arcname) for a build backup: userdata (config or full walk) + addons."""
     config = _load_backup_config()
     if config:
         userdata_items = _collect_backup_items_from_config(config, include_addon_data)
@@ -215,7 +235,7 @@ def create_backup_core(include_addon_data=True, target_base=None, progress_callb
             exclude_dirs.append('addon_data')
         userdata_items = []
         for root, dirs, files in os.walk(source_root):
-            dirs[:] = [d for d in dirs if d not in exclude_dirs]
+            dirs[:] = [d for d in dirs if d not in exclude_dirs and not _is_restore_download_dir(root, d)]
             rel_root = os.path.relpath(root, source_root)
             if rel_root == '.':
                 rel_root = ''
@@ -226,40 +246,481 @@ def create_backup_core(include_addon_data=True, target_base=None, progress_callb
 
     to_add = [(p, os.path.join('userdata', a)) for p, a in userdata_items]
     to_add.extend(_collect_addons_for_backup())
+    return to_add
+
+
+def get_backup_mode():
+    """Setting backup_mode: BACKUP_MODE_FULL, BACKUP_MODE_INCREMENTAL or BACKUP_MODE_DIFFERENTIAL."""
+    mode = (ADDON.getSettingString('backup_mode') or BACKUP_MODE_FULL).strip()
+    return mode if mode in (BACKUP_MODE_FULL, BACKUP_MODE_INCREMENTAL, BACKUP_MODE_DIFFERENTIAL) else BACKUP_MODE_FULL
+
+
+def _index_path(index_dir, zip_name):
+    return os.path.join(index_dir, zip_name[:-len('.zip')] + BACKUP_INDEX_SUFFIX)
+
+
+def _files_path(index_dir, zip_name):
+    return os.path.join(index_dir, zip_name[:-len('.zip')] + BACKUP_FILES_SUFFIX)
+
+
+def _content_hash(written):
+    """sha256 over the sorted (name, crc32, size) of all archive entries (from the central directory)."""
+    h = hashlib.sha256()
+    for name in sorted(written):
+        crc, size = written[name]
+        h.update(("%s:%08x:%d\n" % (name, crc, size)).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _prefix_summary(names):
+    """{"userdata/": n, "addons/": n} for the archive entries; None if any entry is outside the whitelist."""
+    summary = {}
+    for name in names:
+        if name == BACKUP_MANIFEST_FILENAME or name.endswith('/'):
+            continue
+        norm = name.replace('\\', '/')
+        prefix = next((p for p in ("userdata/", "addons/") if norm.startswith(p)), None)
+        if '..' in norm or prefix is None:
+            return None
+        summary[prefix] = summary.get(prefix, 0) + 1
+    return summary
+
+
+def _is_valid_backup_index(index, zip_size=None):
+    """
+    Validation from the sidecar index alone (no ZIP access): manifest creator/version and the
+    path-prefix summary written at backup time. zip_size: archive size on disk, must match.
+    None if the index cannot decide (older index without summary, size mismatch) -> open the ZIP.
+    """
+    if not index or not isinstance(index.get('manifest'), dict) or 'prefixes' not in index:
+        return None
+    manifest = index['manifest']
+    if manifest.get('creator') != ADDON_ID or manifest.get('version') != BACKUP_MANIFEST_VERSION:
+        return False
+    if zip_size is not None and index.get('size') != zip_size:
+        return None
+    return isinstance(index['prefixes'], dict)
+
+
+def _load_backup_index(path):
+    """Summary index (see create_backup_core) or None. Version 1 indexes still carry the file map."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and (data.get('version') == BACKUP_INDEX_VERSION
+                                       or (data.get('version') == 1 and isinstance(data.get('files'), dict))):
+            return data
+    except (OSError, ValueError) as e:
+        log("Backup index %s not loaded: %s" % (path, e), xbmc.LOGDEBUG)
+    return None
+
+
+def _load_backup_files(index_dir, index):
+    """File map {arcname: {size, mtime, crc}} of a backup (only read for incremental chaining) or None."""
+    if isinstance(index.get('files'), dict):
+        return index['files']
+    path = _files_path(index_dir, index.get('name') or '')
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('name') == index.get('name') and isinstance(data.get('files'), dict):
+            return data['files']
+    except (OSError, ValueError) as e:
+        log("Backup file map %s not loaded: %s" % (path, e), xbmc.LOGDEBUG)
+    return None
+
+
+def _find_reference_index(index_dir, mode, archive_dir=None, exclude_name=None):
+    """
+    Index to compare against (with its file map as 'files'): incremental -> newest backup of any type,
+    differential -> newest full backup. None if there is none (then a full backup is made).
+    archive_dir: if set, the reference ZIP and its base must still exist there.
+    exclude_name: ZIP about to be (re)written (same minute), never its own reference.
+    """
+    try:
+        names = [f for f in os.listdir(index_dir)
+                 if f.startswith(BACKUP_FILENAME_PREFIX) and f.endswith(BACKUP_INDEX_SUFFIX)
+                 and not f.endswith(BACKUP_FILES_SUFFIX) and f != BACKUP_CATALOG_FILENAME]
+    except OSError:
+        return None
+    names.sort(key=lambda n: backup_store.snapshot_time(n[:-len(BACKUP_INDEX_SUFFIX)]), reverse=True)
+    for n in names:
+        index = _load_backup_index(os.path.join(index_dir, n))
+        if index is None or index.get('name') == exclude_name:
+            continue
+        if archive_dir and not all(os.path.isfile(os.path.join(archive_dir, z))
+                                   for z in (index.get('name'), index.get('base')) if z):
+            continue
+        if mode == BACKUP_MODE_INCREMENTAL or index.get('type') == 'full':
+            files = _load_backup_files(index_dir, index)
+            if files is not None:
+                return dict(index, files=files)
+    return None
+
+
+def _file_crc32(path):
+    crc = 0
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            crc = zlib.crc32(chunk, crc)
+    return crc & 0xFFFFFFFF
+
+
+def _is_unchanged(abs_path, st, ref):
+    """Quick check size + mtime; same size with new mtime is confirmed via CRC32 (touched, not modified)."""
+    if not ref or ref.get('size') != st.st_size:
+        return False
+    if ref.get('mtime') == st.st_mtime:
+        return True
+    try:
+        return ref.get('crc') is not None and _file_crc32(abs_path) == ref['crc']
+    except OSError:
+        return False
+
+
+def create_backup_core(include_addon_data=True, target_base=None, progress_callback=None, mode=None, stream=None,
+                       name=None):
+    """
+    Build-Backup ohne Dialoge. progress_callback(i, total, arcname) optional.
+    mode: BACKUP_MODE_* (default: setting backup_mode). Incremental/differential ZIPs only contain
+    files added or changed since the reference backup; its manifest names base/parent and lists
+    deleted files. Per backup the file map (path, size, mtime, crc) is stored as doku_backup_*.files.json
+    in the configured backup folder, also when the ZIP goes to a connection, plus a small summary index
+    doku_backup_*.json (manifest, entry/file count, archive size, content hash, path-prefix summary).
+    stream: writable file object (e.g. sync_backend.BoundedPipe); the ZIP is written there instead
+    of target_base and the returned zip_path is just the file name. name: ZIP file name (default: by date).
+    Returns: (True, success_message, zip_path) or (False, error_message, None).
+    """
+    backup_base = target_base or _get_backup_path()
+    index_dir = _get_backup_path()
+    try:
+        for folder in (backup_base, index_dir):
+            if not os.path.isdir(folder):
+                os.makedirs(folder, exist_ok=True)
+    except OSError as e:
+        log("Cannot create backup dir: %s" % e, xbmc.LOGERROR)
+        return False, ADDON.getLocalizedString(30043), None
+
+    name = name or "doku_backup_%s.zip" % datetime.now().strftime('%d%m%Y_%H%M')
+    zip_path = os.path.join(backup_base, name)
+
+    to_add = _collect_backup_items(include_addon_data)
 
     total = len(to_add)
     if total == 0:
         return False, ADDON.getLocalizedString(30044), None
 
+    mode = mode or get_backup_mode()
+    reference = None
+    if mode != BACKUP_MODE_FULL:
+        reference = _find_reference_index(index_dir, mode, archive_dir=None if (target_base or stream) else index_dir,
+                                          exclude_name=name)
+    ref_files = reference['files'] if reference else {}
+    files = {}
+    changed = []
+    for abs_path, arcname in to_add:
+        key = arcname.replace(os.sep, '/')
+        try:
+            st = os.stat(abs_path)
+        except OSError as e:
+            log("Skip %s: %s" % (arcname, e), xbmc.LOGERROR)
+            continue
+        ref = ref_files.get(key)
+        if reference and _is_unchanged(abs_path, st, ref):
+            files[key] = dict(ref, mtime=st.st_mtime)
+        else:
+            files[key] = {'size': st.st_size, 'mtime': st.st_mtime, 'crc': None}
+            changed.append((abs_path, arcname))
+    deleted = sorted(k for k in ref_files if k not in files)
+
+    # Manifest: origin + version for restore validation (against foreign/renamed ZIPs)
+    manifest = {
+        "creator": ADDON_ID,
+        "version": BACKUP_MANIFEST_VERSION,
+        "timestamp": datetime.now().isoformat(),
+        "type": "full",
+    }
+    if reference:
+        manifest.update({
+            "type": "incremental" if mode == BACKUP_MODE_INCREMENTAL else "differential",
+            "base": reference.get('base') or reference['name'],
+            "parent": reference['name'],
+            "deleted": deleted,
+        })
+
     try:
-        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True) as zf:
-            for i, (abs_path, zip_arcname) in enumerate(to_add):
-                if progress_callback and callable(progress_callback):
-                    if progress_callback(i, total, zip_arcname):
-                        if os.path.exists(zip_path):
-                            try:
-                                os.remove(zip_path)
-                            except OSError:
-                                pass
-                        return False, ADDON.getLocalizedString(30146), None
+        # Parallel deflate on worker threads; entries are still written in to_add order
+        with parallel_zip.ParallelZipWriter(stream or zip_path, policy=compression_policy.load_policy()) as zw:
+            completed = zw.add_files(changed, progress_callback=progress_callback if callable(progress_callback) else None)
+            if completed:
+                zw.writestr(BACKUP_MANIFEST_FILENAME, json.dumps(manifest, indent=None))
+            written = zw.written()
+        size = zw.bytes_written
+        if not completed:
+            if not stream and os.path.exists(zip_path):
                 try:
-                    zf.write(abs_path, zip_arcname)
-                except Exception as e:
-                    log("Skip %s: %s" % (zip_arcname, e), xbmc.LOGERROR)
-            # Manifest: origin + version for restore validation (against foreign/renamed ZIPs)
-            manifest = {
-                "creator": ADDON_ID,
-                "version": BACKUP_MANIFEST_VERSION,
-                "timestamp": datetime.now().isoformat(),
-            }
-            zf.writestr(BACKUP_MANIFEST_FILENAME, json.dumps(manifest, indent=None))
-        size = os.path.getsize(zip_path)
+                    os.remove(zip_path)
+                except OSError:
+                    pass
+            return False, ADDON.getLocalizedString(30146), None
+        for abs_path, arcname in changed:
+            key = arcname.replace(os.sep, '/')
+            if key in written:
+                files[key]['crc'] = written[key][0]
+            else:
+                # Skipped (unreadable): drop from the index so the next backup retries it
+                files.pop(key, None)
+        index = {
+            "version": BACKUP_INDEX_VERSION,
+            "name": name,
+            "type": manifest['type'],
+            "base": manifest.get('base'),
+            "parent": manifest.get('parent'),
+            # Listing/validation without opening the ZIP (see _is_valid_backup_index)
+            "manifest": manifest,
+            "entries": len(written),
+            "size": size,
+            "content_hash": _content_hash(written),
+            "prefixes": _prefix_summary(written),
+            "file_count": len(files),
+        }
+        try:
+            # File map first: a summary index always has its file map next to it
+            for path, data in ((_files_path(index_dir, name), {"version": BACKUP_INDEX_VERSION, "name": name,
+                                                                "files": files}),
+                               (_index_path(index_dir, name), index)):
+                with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                    json.dump(data, f, separators=(',', ':'))
+                os.replace(path + '.tmp', path)
+        except OSError as e:
+            # Without index the next incremental falls back to the previous one (or a full backup)
+            log("Backup index not written: %s" % e, xbmc.LOGERROR)
+        if stream:
+            return True, ADDON.getLocalizedString(30041).format(path=name, size=_format_size(size)), name
         return True, ADDON.getLocalizedString(30041).format(path=zip_path, size=_format_size(size)), zip_path
     except Exception as e:
         log("Backup failed: %s" % e, xbmc.LOGERROR)
         return False, ADDON.getLocalizedString(30042).format(err=str(e)), None
 
 
+def discard_backup_index(zip_name):
+    """Remove the index of a backup that did not reach its destination (keeps incremental chains valid)."""
+    index_dir = _get_backup_path()
+    for path in (_index_path(index_dir, os.path.basename(zip_name)), _files_path(index_dir, os.path.basename(zip_name))):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _catalog_entry(index):
+    """Catalog entry for a backup from its sidecar index."""
+    manifest = index.get('manifest') or {}
+    return {
+        "size": index.get('size'),
+        "timestamp": manifest.get('timestamp'),
+        "type": index.get('type'),
+        "parent": index.get('parent'),
+        "files": index.get('file_count', len(index.get('files') or {})),
+        "entries": index.get('entries'),
+        "content_hash": index.get('content_hash'),
+        "valid": _is_valid_backup_index(index) is not False,
+    }
+
+
+def _load_remote_catalog(backend, remote_path):
+    """Remote catalog {zip_name: entry} (one small download) or None if missing/unreadable."""
+    local = os.path.join(xbmcvfs.translatePath('special://temp'), 'restore_' + BACKUP_CATALOG_FILENAME)
+    if not backend.download(remote_path + '/' + BACKUP_CATALOG_FILENAME, local):
+        return None
+    try:
+        with open(local, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('version') == BACKUP_CATALOG_VERSION and isinstance(data.get('backups'), dict):
+            return data['backups']
+    except (OSError, ValueError) as e:
+        log("Backup catalog unreadable: %s" % e, xbmc.LOGWARNING)
+    finally:
+        try:
+            os.remove(local)
+        except OSError:
+            pass
+    return None
+
+
+def publish_backup_metadata(backend, remote_path, zip_name):
+    """
+    After a successful upload: put the sidecar index next to the ZIP and add the backup to the
+    remote catalog (entries whose ZIP is gone from the server are dropped). Failures are only
+    logged; the picker then falls back to listdir + sidecar indexes.
+    """
+    zip_name = os.path.basename(zip_name)
+    local = _index_path(_get_backup_path(), zip_name)
+    index = _load_backup_index(local)
+    if index is None:
+        return False
+    if not backend.upload(local, remote_path + '/' + os.path.basename(local)):
+        log("Backup index not uploaded: %s" % local, xbmc.LOGWARNING)
+    backups = _load_remote_catalog(backend, remote_path) or {}
+    present = set(backend.listdir(remote_path) or ())
+    if present:
+        backups = {n: e for n, e in backups.items() if n in present}
+    backups[zip_name] = _catalog_entry(index)
+    catalog_path = os.path.join(xbmcvfs.translatePath('special://temp'), BACKUP_CATALOG_FILENAME)
+    try:
+        with open(catalog_path, 'w', encoding='utf-8') as f:
+            json.dump({"version": BACKUP_CATALOG_VERSION, "backups": backups}, f, separators=(',', ':'))
+        ok = backend.upload(catalog_path, remote_path + '/' + BACKUP_CATALOG_FILENAME)
+    except OSError as e:
+        log("Backup catalog not written: %s" % e, xbmc.LOGWARNING)
+        ok = False
+    finally:
+        try:
+            os.remove(catalog_path)
+        except OSError:
+            pass
+    if not ok:
+        log("Backup catalog not updated: %s" % remote_path, xbmc.LOGWARNING)
+    return ok
+
+
+def create_stream_backup(include_addon_data=True, progress_callback=None):
+    """
+    ZIP-Backup direkt auf die Verbindung streamen (ohne Temp-ZIP): der ZIP-Writer schreibt in eine
+    BoundedPipe, ein Upload-Thread liest daraus (upload_stream). Lokal wird nur der Pipe-Puffer benötigt.
+    progress_callback(i, total, arcname) -> True = cancel. Returns: (success, message).
+    """
+    try:
+        backend, conn_num, remote_path = _get_backup_connection()
+    except Exception as e:
+        log("Backup stream: %s" % e, xbmc.LOGERROR)
+        return False, ADDON.getLocalizedString(30068) + "\n%s" % str(e)
+    if not backend:
+        return False, ADDON.getLocalizedString(30043) + " (Verbindung %s)" % conn_num
+    try:
+        backend.ensure_folder(remote_path)
+        name = "doku_backup_%s.zip" % datetime.now().strftime('%d%m%Y_%H%M')
+        remote_file = remote_path + '/' + name
+        pipe = sync_backend.BoundedPipe()
+        upload = {'ok': False}
+
+        def upload_worker():
+            try:
+                upload['ok'] = backend.upload_stream(pipe, remote_file)
+            finally:
+                if not upload['ok']:
+                    pipe.abort("upload to %s failed" % remote_file)
+
+        thread = threading.Thread(target=upload_worker, name='backup-stream-upload')
+        thread.start()
+        try:
+            success, msg, _name = create_backup_core(include_addon_data, progress_callback=progress_callback,
+                                                     stream=pipe, name=name)
+        except Exception as e:
+            log("Backup stream: %s" % e, xbmc.LOGERROR)
+            success, msg = False, ADDON.getLocalizedString(30042).format(err=str(e))
+        if success:
+            pipe.close()
+        else:
+            pipe.abort("backup aborted")
+        thread.join()
+        if not success:
+            return False, msg
+        if not upload['ok']:
+            discard_backup_index(name)
+            return False, ADDON.getLocalizedString(30068)
+        publish_backup_metadata(backend, remote_path, name)
+        return True, ADDON.getLocalizedString(30041).format(path="Verbindung %s: %s" % (conn_num, remote_file),
+                                                            size=_format_size(pipe.bytes_written))
+    finally:
+        close_backend(backend)
+
+
+def use_stream_upload():
+    """True if ZIP backups for a connection are streamed (backup_save_to_connection + backup_stream_upload)."""
+    return ADDON.getSettingBool('backup_save_to_connection') and ADDON.getSettingBool('backup_stream_upload')
+
+
+def use_backup_store():
+    """True if backups go to the deduplicating snapshot store (setting backup_format) instead of ZIPs."""
+    return (ADDON.getSettingString('backup_format') or BACKUP_FORMAT_ZIP) == BACKUP_FORMAT_STORE
+
+
+def _get_local_store():
+    return backup_store.LocalStore(os.path.join(_get_backup_path(), backup_store.STORE_DIRNAME))
+
+
+def close_backend(backend):
+    """Close a backend from get_backend_for_connection (pooled FTP sessions, SFTP/SMB handles)."""
+    if backend is None:
+        return
+    try:
+        backend.close()
+    except Exception as e:
+        log("close backend: %s" % e, xbmc.LOGDEBUG)
+
+
+def _get_backup_connection():
+    """Backend for backup_connection (close with close_backend). Returns (backend or None, conn_num, remote_path)."""
+    conn_num = (ADDON.getSettingString('backup_connection') or '1').strip() or '1'
+    conn_int = int(conn_num) if conn_num in ('1', '2', '3') else 1
+    remote_path = (ADDON.getSettingString('backup_remote_path') or 'backups').strip().rstrip('/') or 'backups'
+    import sys
+    addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    if addon_path not in sys.path:
+        sys.path.insert(0, addon_path)
+    import auto_ftp_sync
+    return auto_ftp_sync.get_backend_for_connection(conn_int), conn_num, remote_path
+
+
+def _get_remote_store(backend, remote_path):
+    return backup_store.RemoteStore(backend, remote_path + '/' + backup_store.STORE_DIRNAME,
+                                    xbmcvfs.translatePath('special://temp'))
+
+
+def create_store_backup(include_addon_data=True, progress_callback=None):
+    """
+    Snapshot-Backup in den Dedup-Store ohne Dialoge: lokal im Backup-Ordner oder, bei
+    backup_save_to_connection, direkt auf die Verbindung (nur neue Chunks werden übertragen).
+    progress_callback(i, total, arcname) -> True = cancel. Returns: (success, message).
+    """
+    to_add = _collect_backup_items(include_addon_data)
+    if not to_add:
+        return False, ADDON.getLocalizedString(30044)
+    backend = None
+    try:
+        if ADDON.getSettingBool('backup_save_to_connection'):
+            backend, conn_num, remote_path = _get_backup_connection()
+            if not backend:
+                return False, ADDON.getLocalizedString(30043) + " (Verbindung %s)" % conn_num
+            backend.ensure_folder(remote_path)
+            store = _get_remote_store(backend, remote_path)
+            location = "Verbindung %s: %s" % (conn_num, store.remote_dir)
+        else:
+            store = _get_local_store()
+            location = store.root
+        name = "doku_backup_%s" % datetime.now().strftime('%d%m%Y_%H%M')
+        manifest = {
+            "creator": ADDON_ID,
+            "version": BACKUP_MANIFEST_VERSION,
+            "timestamp": datetime.now().isoformat(),
+        }
+        completed, stats = backup_store.create_snapshot(store, to_add, name, manifest, progress_callback,
+                                                        compression_policy.load_policy())
+        if not completed:
+            return False, ADDON.getLocalizedString(30146)
+        # Retention: remote gc lists every chunk folder, so it only runs when snapshots were dropped
+        if store.prune() or isinstance(store, backup_store.LocalStore):
+            store.gc()
+        return True, ADDON.getLocalizedString(30041).format(path="%s/%s" % (location, name),
+                                                            size=_format_size(stats['new_bytes']))
+    except Exception as e:
+        log("Snapshot backup failed: %s" % e, xbmc.LOGERROR)
+        return False, ADDON.getLocalizedString(30042).format(err=str(e))
+    finally:
+        close_backend(backend)
+
+
 def create_backup(include_addon_data=True, target_base=None):
     """
     Build backup: ZIP with userdata and addons. Shows progress and result dialog.
@@ -276,6 +737,18 @@ def create_backup(include_addon_data=True, target_base=None):
         progress.update(pct, "%d / %d\n%s" % (i + 1, total, arcname))
         return False
 
+    if use_backup_store() or use_stream_upload():
+        if use_backup_store():
+            success, msg = create_store_backup(include_addon_data, progress_callback=progress_cb)
+        else:
+            success, msg = create_stream_backup(include_addon_data, progress_callback=progress_cb)
+        try:
+            progress.close()
+        except Exception:
+            pass
+        dialog.ok(ADDON.getLocalizedString(30001), msg)
+        return success
+
     success, msg, zip_path = create_backup_core(include_addon_data, target_base, progress_callback=progress_cb)
     try:
         progress.close()
@@ -292,6 +765,7 @@ def create_backup(include_addon_data=True, target_base=None):
         except (ValueError, TypeError):
             conn_int = 1
         remote_path = (ADDON.getSettingString('backup_remote_path') or 'backups').strip().rstrip('/') or 'backups'
+        backend = None
         try:
             import sys
             addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -300,6 +774,7 @@ def create_backup(include_addon_data=True, target_base=None):
             import auto_ftp_sync
             backend = auto_ftp_sync.get_backend_for_connection(conn_int)
             if not backend:
+                discard_backup_index(zip_path)
                 dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30043) + " (Verbindung %s)" % conn_num)
                 if zip_path and os.path.exists(zip_path):
                     try:
@@ -309,7 +784,8 @@ def create_backup(include_addon_data=True, target_base=None):
                 return False
             backend.ensure_folder(remote_path)
             remote_file = remote_path + '/' + os.path.basename(zip_path)
-            if backend.upload(zip_path, remote_file):
+            if backend.upload_resumable(zip_path, remote_file):
+                publish_backup_metadata(backend, remote_path, zip_path)
                 size_str = _format_size(os.path.getsize(zip_path)) if zip_path and os.path.exists(zip_path) else ""
                 try:
                     os.remove(zip_path)
@@ -317,20 +793,200 @@ def create_backup(include_addon_data=True, target_base=None):
                     pass
                 dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30041).format(path="Verbindung %s: %s" % (conn_num, remote_file), size=size_str))
             else:
+                discard_backup_index(zip_path)
                 dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30068))
                 return False
         except Exception as e:
+            discard_backup_index(zip_path)
             log("Backup upload to connection: %s" % e, xbmc.LOGERROR)
             dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30068) + "\n%s" % str(e))
             return False
+        finally:
+            close_backend(backend)
     else:
         dialog.ok(ADDON.getLocalizedString(30001), msg)
     return True
 
 
-def restore_from_zip_core(zip_path, wipe_first=False, is_from_url=False, progress_callback=None):
+def _is_restore_download_dir(root, name):
+    """True for RESTORE_DOWNLOAD_DIR (os.walk root + dir name): never part of a backup."""
+    return os.path.normpath(os.path.join(root, name)) == os.path.normpath(RESTORE_DOWNLOAD_DIR)
+
+
+def _restore_download_dir():
+    """Create RESTORE_DOWNLOAD_DIR and drop abandoned downloads. Returns the directory."""
+    os.makedirs(RESTORE_DOWNLOAD_DIR, exist_ok=True)
+    cutoff = time.time() - RESTORE_PART_MAX_AGE
+    try:
+        with os.scandir(RESTORE_DOWNLOAD_DIR) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False) and entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+    except OSError as e:
+        log("Restore downloads: %s" % e, xbmc.LOGDEBUG)
+    return RESTORE_DOWNLOAD_DIR
+
+
+def _wipe_temp():
+    """Empty special://temp (except archive_cache) before a restore."""
+    cache_path = xbmcvfs.translatePath('special://temp')
+    if os.path.exists(cache_path):
+        try:
+            import shutil
+            for entry in os.listdir(cache_path):
+                full = os.path.join(cache_path, entry)
+                if os.path.isfile(full):
+                    os.remove(full)
+                elif os.path.isdir(full) and entry != 'archive_cache':
+                    shutil.rmtree(full, ignore_errors=True)
+        except Exception as e:
+            log("Wipe temp: %s" % e, xbmc.LOGERROR)
+
+
+def _restore_target(name, extract_root):
+    """
+    Target path for a backup entry, or None if it must be skipped: outside userdata/ or addons/,
+    path traversal, or this addon's own addon_data.
+    """
+    norm = name.replace('\\', '/')
+    if '..' in norm or not any(norm.startswith(p.replace('\\', '/')) for p in BACKUP_ALLOWED_PREFIXES):
+        log("Restore skip disallowed path: %s" % name, xbmc.LOGDEBUG)
+        return None
+    if ADDON_ID in name and 'addon_data' in name:
+        return None
+    target = os.path.normpath(os.path.join(extract_root, name))
+    if not target.startswith(extract_root):
+        log("Restore path traversal skip: %s" % name, xbmc.LOGDEBUG)
+        return None
+    return target
+
+
+def _read_backup_manifest(zip_path):
+    """doku_backup_manifest.json of a ZIP as dict ({} for legacy ZIPs without manifest / on error)."""
+    try:
+        with zipfile.ZipFile(zip_path, 'r', allowZip64=True) as zf:
+            data = json.loads(zf.read(BACKUP_MANIFEST_FILENAME).decode('utf-8'))
+        return data if isinstance(data, dict) else {}
+    except (KeyError, ValueError, UnicodeDecodeError, zipfile.BadZipFile, OSError):
+        return {}
+
+
+def _resolve_backup_chain(zip_path, fetch_archive=None):
+    """
+    ZIPs to apply in order for restoring zip_path: [full] for full backups, [full, diff] for
+    differential, [full, inc1, ..., incN] for incremental (following the parent links).
+    fetch_archive(name) -> local path or None; default: file next to zip_path.
+    Returns (paths, None) or (None, missing_name).
+    """
+    if fetch_archive is None:
+        folder = os.path.dirname(zip_path)
+
+        def fetch_archive(name):
+            path = os.path.join(folder, name)
+            return path if os.path.isfile(path) else None
+
+    chain = [zip_path]
+    manifest = _read_backup_manifest(zip_path)
+    if manifest.get('type') == 'differential':
+        manifest = dict(manifest, parent=manifest.get('base'))
+    seen = {os.path.basename(zip_path)}
+    while manifest.get('type') in ('incremental', 'differential'):
+        parent = os.path.basename(manifest.get('parent') or '')
+        if not parent or parent in seen:
+            return None, parent or '?'
+        seen.add(parent)
+        path = fetch_archive(parent)
+        if not path or not _is_valid_build_backup(path):
+            return None, parent
+        chain.insert(0, path)
+        manifest = _read_backup_manifest(path)
+    return chain, None
+
+
+def _in_subtrees(name, subtrees):
+    """True if no subtrees are given or name is one of them / lies below one."""
+    return not subtrees or any(name == t or name.startswith(t + '/') for t in subtrees)
+
+
+def _plan_restore(chain, extract_root, subtrees=None):
+    """
+    Final state after applying the chain (later archives win, deleted lists applied in order),
+    filtered by subtrees and the restore whitelist. Path checks run once per name here.
+    Returns (members, deleted): members [(archive_index, ZipInfo, target)], deleted [(name, target)].
+    """
+    latest = {}
+    removed = set()
+    for k, path in enumerate(chain):
+        if k > 0:
+            for name in _read_backup_manifest(path).get('deleted') or ():
+                latest.pop(name, None)
+                removed.add(name)
+        with zipfile.ZipFile(path, 'r', allowZip64=True) as zf:
+            for info in zf.infolist():
+                name = info.filename
+                if name.endswith('/') or name == BACKUP_MANIFEST_FILENAME:
+                    continue
+                latest[name] = (k, info)
+                removed.discard(name)
+    subtrees = [t.replace('\\', '/').strip('/') for t in subtrees or () if t.strip('/')]
+    members = []
+    for name, (k, info) in latest.items():
+        if not _in_subtrees(name, subtrees):
+            continue
+        target = _restore_target(name, extract_root)
+        if target is not None:
+            members.append((k, info, target))
+    deleted = []
+    for name in sorted(removed):
+        if _in_subtrees(name, subtrees):
+            target = _restore_target(name, extract_root)
+            if target is not None:
+                deleted.append((name, target))
+    return members, deleted
+
+
+def _is_identical(target, info):
+    """Local file matches the ZIP entry (size, then CRC32 from the central directory)."""
+    try:
+        if os.path.getsize(target) != info.file_size:
+            return False
+        return _file_crc32(target) == info.CRC
+    except OSError:
+        return False
+
+
+def list_backup_subtrees(zip_path, fetch_archive=None):
+    """
+    Selectable parts of a backup (incl. its chain): addons/<id>, userdata/addon_data/<id>
+    and the remaining top-level entries of userdata/. Sorted; [] if the chain is incomplete.
+    """
+    chain, _missing = _resolve_backup_chain(zip_path, fetch_archive)
+    if chain is None:
+        return []
+    parts = set()
+    for path in chain:
+        with zipfile.ZipFile(path, 'r', allowZip64=True) as zf:
+            for name in zf.namelist():
+                segments = name.replace('\\', '/').strip('/').split('/')
+                if name == BACKUP_MANIFEST_FILENAME or len(segments) < 2:
+                    continue
+                depth = 3 if segments[:2] == ['userdata', 'addon_data'] and len(segments) > 3 else 2
+                parts.add('/'.join(segments[:depth]))
+    return sorted(parts)
+
+
+def restore_from_zip_core(zip_path, wipe_first=False, is_from_url=False, progress_callback=None, fetch_archive=None,
+                          subtrees=None):
     """
     Restore from ZIP ohne Dialoge. progress_callback(i, total, name) -> True = cancel.
+    Incremental/differential backups are restored as chain (full backup first, then the increments,
+    applying their deleted-file lists); fetch_archive(name) locates chain members (see _resolve_backup_chain).
+    Members are extracted in parallel (RESTORE_WORKERS, one ZipFile handle per worker); files that are
+    already identical on disk (size + CRC32) are skipped. subtrees: only restore these paths
+    (e.g. ['userdata/addon_data/plugin.video.x']); None = everything.
     Returns: (True, success_message) or (False, error_message). Ruft _restart_kodi() bei Erfolg.
     """
     if not zip_path or not zip_path.endswith('.zip'):
@@ -338,47 +994,70 @@ def restore_from_zip_core(zip_path, wipe_first=False, is_from_url=False, progres
     zip_path = xbmcvfs.translatePath(zip_path) if zip_path.startswith('special://') else zip_path
     if not os.path.exists(zip_path):
         return False, ADDON.getLocalizedString(30042).format(err="File not found")
+    chain, missing = _resolve_backup_chain(zip_path, fetch_archive)
+    if chain is None:
+        return False, ADDON.getLocalizedString(30389).format(name=missing)
 
     if wipe_first:
-        cache_path = xbmcvfs.translatePath('special://temp')
-        if os.path.exists(cache_path):
-            try:
-                import shutil
-                for entry in os.listdir(cache_path):
-                    full = os.path.join(cache_path, entry)
-                    if os.path.isfile(full):
-                        os.remove(full)
-                    elif os.path.isdir(full) and entry != 'archive_cache':
-                        shutil.rmtree(full, ignore_errors=True)
-            except Exception as e:
-                log("Wipe temp: %s" % e, xbmc.LOGERROR)
+        _wipe_temp()
 
     extract_root = os.path.normpath(HOME)
     errors = []
     try:
-        with zipfile.ZipFile(zip_path, 'r', allowZip64=True) as zf:
-            names = [n for n in zf.namelist() if not n.endswith('/')]
-            total = len(names)
-            for i, name in enumerate(names):
-                if progress_callback and callable(progress_callback) and progress_callback(i, total, name):
-                    return False, ADDON.getLocalizedString(30146)
-                if name == BACKUP_MANIFEST_FILENAME:
-                    continue
-                norm = name.replace('\\', '/')
-                if '..' in norm or not any(norm.startswith(p.replace('\\', '/')) for p in BACKUP_ALLOWED_PREFIXES):
-                    log("Restore skip disallowed path: %s" % name, xbmc.LOGDEBUG)
-                    continue
-                if ADDON_ID in name and 'addon_data' in name:
-                    continue
+        members, deleted = _plan_restore(chain, extract_root, subtrees)
+        for name, target in deleted:
+            if os.path.isfile(target):
                 try:
-                    target = os.path.normpath(os.path.join(extract_root, name))
-                    if not target.startswith(extract_root):
-                        log("Restore path traversal skip: %s" % name, xbmc.LOGDEBUG)
-                        continue
-                    zf.extract(name, extract_root)
-                except Exception as e:
-                    errors.append("%s: %s" % (name, e))
-                    log("Extract error %s: %s" % (name, e), xbmc.LOGERROR)
+                    os.remove(target)
+                except OSError as e:
+                    log("Restore delete %s: %s" % (name, e), xbmc.LOGDEBUG)
+
+        handles = threading.local()
+        opened = []
+        opened_lock = threading.Lock()
+        made_dirs = set()
+
+        def extract(k, info, target):
+            if _is_identical(target, info):
+                return False
+            archives = getattr(handles, 'archives', None)
+            if archives is None:
+                archives = handles.archives = {}
+            zf = archives.get(k)
+            if zf is None:
+                zf = archives[k] = zipfile.ZipFile(chain[k], 'r', allowZip64=True)
+                with opened_lock:
+                    opened.append(zf)
+            folder = os.path.dirname(target)
+            if folder not in made_dirs:
+                os.makedirs(folder, exist_ok=True)
+                made_dirs.add(folder)
+            with zf.open(info) as src, open(target, 'wb') as dst:
+                shutil.copyfileobj(src, dst, RESTORE_BUFFER_SIZE)
+            return True
+
+        total = len(members)
+        extracted = 0
+        try:
+            with ThreadPoolExecutor(max_workers=RESTORE_WORKERS) as pool:
+                futures = {pool.submit(extract, k, info, target): info.filename for k, info, target in members}
+                for i, future in enumerate(as_completed(futures)):
+                    name = futures[future]
+                    if progress_callback and callable(progress_callback) and progress_callback(i, total, name):
+                        for f in futures:
+                            f.cancel()
+                        return False, ADDON.getLocalizedString(30146)
+                    try:
+                        if future.result():
+                            extracted += 1
+                    except Exception as e:
+                        errors.append("%s: %s" % (name, e))
+                        log("Extract error %s: %s" % (name, e), xbmc.LOGERROR)
+        finally:
+            for zf in opened:
+                zf.close()
+        log("Restore: %d extracted, %d unchanged, %d deleted, %d errors" % (
+            extracted, total - extracted - len(errors), len(deleted), len(errors)), xbmc.LOGINFO)
         msg = ADDON.getLocalizedString(30141)
         if errors:
             msg += "\n" + ADDON.getLocalizedString(30048).format(count=len(errors))
@@ -392,11 +1071,12 @@ def restore_from_zip_core(zip_path, wipe_first=False, is_from_url=False, progres
         return False, ADDON.getLocalizedString(30042).format(err=str(e))
 
 
-def restore_from_zip(zip_path=None, wipe_first=False, is_from_url=False):
+def restore_from_zip(zip_path=None, wipe_first=False, is_from_url=False, fetch_archive=None):
     """
     Restore from a ZIP file into userdata (or home).
     zip_path: full path to zip; if None, show browse dialog.
     is_from_url: True if ZIP came from URL (temp file); no "delete backup?" question, temp is removed by caller.
+    fetch_archive: locates earlier backups of an incremental/differential chain (see _resolve_backup_chain).
     """
     dialog = xbmcgui.Dialog()
     progress = xbmcgui.DialogProgress()
@@ -412,6 +1092,16 @@ def restore_from_zip(zip_path=None, wipe_first=False, is_from_url=False):
         dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30325))
         return False
 
+    subtrees = None
+    if dialog.yesno(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30395),
+                    nolabel=ADDON.getLocalizedString(30396), yeslabel=ADDON.getLocalizedString(30397)):
+        parts = list_backup_subtrees(zip_path, fetch_archive)
+        if parts:
+            chosen = dialog.multiselect(ADDON.getLocalizedString(30398), parts)
+            if not chosen:
+                return False
+            subtrees = [parts[i] for i in chosen]
+
     progress.create(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30046))
 
     def progress_cb(i, total, name):
@@ -421,7 +1111,8 @@ def restore_from_zip(zip_path=None, wipe_first=False, is_from_url=False):
         progress.update(pct, "%d / %d\n%s" % (i + 1, total, name))
         return False
 
-    success, msg = restore_from_zip_core(zip_path, wipe_first, is_from_url, progress_callback=progress_cb)
+    success, msg = restore_from_zip_core(zip_path, wipe_first, is_from_url, progress_callback=progress_cb,
+                                         fetch_archive=fetch_archive, subtrees=subtrees)
     try:
         progress.close()
     except Exception:
@@ -436,22 +1127,84 @@ def restore_from_zip(zip_path=None, wipe_first=False, is_from_url=False):
     return success
 
 
+def restore_from_snapshot_core(store, name, wipe_first=False, progress_callback=None):
+    """
+    Restore a snapshot from the dedup store (LocalStore/RemoteStore) ohne Dialoge.
+    progress_callback(i, total, name) -> True = cancel.
+    Returns: (True, success_message) or (False, error_message). Ruft _restart_kodi() bei Erfolg.
+    """
+    snapshot = store.load_snapshot(name)
+    if not snapshot or snapshot.get('creator') != ADDON_ID or snapshot.get('version') != BACKUP_MANIFEST_VERSION:
+        return False, ADDON.getLocalizedString(30325)
+    if wipe_first:
+        _wipe_temp()
+
+    extract_root = os.path.normpath(HOME)
+    errors = []
+    entries = sorted(snapshot['files'].items())
+    total = len(entries)
+    for i, (arcname, entry) in enumerate(entries):
+        if progress_callback and callable(progress_callback) and progress_callback(i, total, arcname):
+            return False, ADDON.getLocalizedString(30146)
+        target = _restore_target(arcname, extract_root)
+        if target is None:
+            continue
+        try:
+            backup_store.extract_file(store, entry, target)
+        except Exception as e:
+            errors.append("%s: %s" % (arcname, e))
+            log("Extract error %s: %s" % (arcname, e), xbmc.LOGERROR)
+    msg = ADDON.getLocalizedString(30141)
+    if errors:
+        msg += "\n" + ADDON.getLocalizedString(30048).format(count=len(errors))
+    _restart_kodi()
+    return True, msg
+
+
+def restore_from_snapshot(store, name, wipe_first=False):
+    """Restore a store snapshot with progress and result dialog."""
+    dialog = xbmcgui.Dialog()
+    progress = xbmcgui.DialogProgress()
+    progress.create(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30046))
+
+    def progress_cb(i, total, arcname):
+        if progress.iscanceled():
+            return True
+        pct = int((i + 1) / total * 100) if total else 0
+        progress.update(pct, "%d / %d\n%s" % (i + 1, total, arcname))
+        return False
+
+    success, msg = restore_from_snapshot_core(store, name, wipe_first, progress_callback=progress_cb)
+    try:
+        progress.close()
+    except Exception:
+        pass
+    dialog.ok(ADDON.getLocalizedString(30001), msg)
+    return success
+
+
 def run_backup():
     """Entry: create backup; include addon_data from setting."""
     include_addon_data = ADDON.getSettingBool('backup_include_addon_data')
     create_backup(include_addon_data=include_addon_data)
 
 
-def _is_valid_build_backup(zip_path):
+def _is_valid_build_backup(zip_path, use_index=False):
     """
     Prüft, ob die ZIP ein gültiges Build-Backup ist:
     - Bevorzugt: doku_backup_manifest.json mit creator=ADDON_ID und version=BACKUP_MANIFEST_VERSION.
     - Legacy (ohne Manifest): mindestens ein Eintrag userdata/, alle Einträge unter userdata/ oder addons/, kein '..'.
     - Jeder Eintrag muss unter userdata/ oder addons/ liegen, kein Path-Traversal.
     Verhindert: umbenannte Fremd-ZIPs, schädliche Pfade, Einschleusen von Code.
+    use_index: für Listen – Sidecar-Index (doku_backup_*.json) statt ZIP lesen, wenn vorhanden und Größe passt.
     """
     if not zip_path or not str(zip_path).lower().endswith('.zip') or not os.path.exists(zip_path):
         return False
+    if use_index:
+        index = _load_backup_index(_index_path(os.path.dirname(zip_path), os.path.basename(zip_path)))
+        verdict = _is_valid_backup_index(index, os.path.getsize(zip_path))
+        if verdict is not None:
+            return verdict
     try:
         with zipfile.ZipFile(zip_path, 'r', allowZip64=True) as zf:
             names = zf.namelist()
@@ -499,7 +1252,7 @@ def _get_local_backup_zips():
         files = [f for f in os.listdir(backup_dir)
                  if f.startswith(BACKUP_FILENAME_PREFIX) and f.lower().endswith('.zip')]
         paths = [os.path.join(backup_dir, f) for f in files]
-        valid = [p for p in paths if _is_valid_build_backup(p)]
+        valid = [p for p in paths if _is_valid_build_backup(p, use_index=True)]
         valid.sort(key=lambda p: os.path.getmtime(p), reverse=True)
         return valid
     except OSError as e:
@@ -507,6 +1260,57 @@ def _get_local_backup_zips():
         return []
 
 
+def _filter_remote_backups(backend, remote_path, zips, names):
+    """
+    Drop remote ZIPs whose sidecar index marks them invalid; the summary index (a few KB, no file map)
+    is downloaded instead of the archive. ZIPs without index are kept and validated after download.
+    """
+    temp_dir = xbmcvfs.translatePath('special://temp')
+    valid = []
+    for zip_name in zips:
+        index_name = zip_name[:-len('.zip')] + BACKUP_INDEX_SUFFIX
+        if index_name not in names:
+            valid.append(zip_name)
+            continue
+        local = os.path.join(temp_dir, 'restore_index_' + index_name)
+        index = _load_backup_index(local) if backend.download(remote_path + '/' + index_name, local) else None
+        try:
+            os.remove(local)
+        except OSError:
+            pass
+        if _is_valid_backup_index(index) is not False:
+            valid.append(zip_name)
+        else:
+            log("Remote backup rejected by index: %s" % zip_name, xbmc.LOGDEBUG)
+    return valid
+
+
+def _catalog_label(name, entry):
+    """Picker label: name (size, date, file count); corrupt archives are flagged."""
+    label = "%s  (%s)" % (name, ADDON.getLocalizedString(30401).format(
+        size=_format_size(entry.get('size') or 0),
+        date=(entry.get('timestamp') or '')[:16].replace('T', ' '),
+        count=entry.get('files') or 0))
+    if not entry.get('valid', True):
+        label = "[%s] %s" % (ADDON.getLocalizedString(30399), label)
+    return label
+
+
+def _matches_catalog(zip_path, entry):
+    """Downloaded ZIP has the catalogued size and content hash (central directory)."""
+    try:
+        if entry.get('size') is not None and os.path.getsize(zip_path) != entry['size']:
+            return False
+        if entry.get('content_hash'):
+            with zipfile.ZipFile(zip_path, 'r', allowZip64=True) as zf:
+                written = {i.filename: (i.CRC, i.file_size) for i in zf.infolist()}
+            return _content_hash(written) == entry['content_hash']
+        return True
+    except (zipfile.BadZipFile, OSError) as e:
+        log("Backup check %s: %s" % (zip_path, e), xbmc.LOGDEBUG)
+        return False
+
+
 def run_restore():
     """Entry: Local / URL / From connection. Back = cancel. Local: backup path or browse. URL: restore_url or ask. Connection: list remote, download, restore."""
     dialog = xbmcgui.Dialog()
@@ -535,14 +1339,19 @@ def run_restore():
     if idx == 0:
         # Local: check backup folder from settings first
         zip_list = _get_local_backup_zips()
-        if zip_list:
+        store = _get_local_store()
+        snapshots = store.list_snapshots()
+        if zip_list or snapshots:
             choice_labels = [os.path.basename(p) for p in zip_list]
+            choice_labels.extend("%s (%s)" % (n, ADDON.getLocalizedString(30387)) for n in snapshots)
             choice_labels.append(ADDON.getLocalizedString(30324))  # Choose other file...
             sel = dialog.select(ADDON.getLocalizedString(30064), choice_labels)
             if sel < 0:
                 return
-            if sel == len(zip_list):
+            if sel == len(choice_labels) - 1:
                 restore_from_zip(zip_path=None, wipe_first=wipe, is_from_url=False)
+            elif sel >= len(zip_list):
+                restore_from_snapshot(store, snapshots[sel - len(zip_list)], wipe_first=wipe)
             else:
                 restore_from_zip(zip_path=zip_list[sel], wipe_first=wipe, is_from_url=False)
         else:
@@ -557,6 +1366,7 @@ def run_restore():
         except (ValueError, TypeError):
             conn_int = 1
         remote_path = (ADDON.getSettingString('backup_remote_path') or 'backups').strip().rstrip('/') or 'backups'
+        backend = None
         try:
             import sys
             addon_path = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -569,37 +1379,80 @@ def run_restore():
                 return
             names = backend.listdir(remote_path) or []
             zips = [n for n in names if n.startswith(BACKUP_FILENAME_PREFIX) and n.lower().endswith('.zip')]
-            if not zips:
+            # Catalog (one download) for size/date/file count; uncatalogued ZIPs via their sidecar index
+            catalog = _load_remote_catalog(backend, remote_path) if BACKUP_CATALOG_FILENAME in names else None
+            catalog = {n: e for n, e in (catalog or {}).items() if n in zips}
+            zips = sorted(catalog, key=lambda n: catalog[n].get('timestamp') or '', reverse=True) + sorted(
+                _filter_remote_backups(backend, remote_path, [n for n in zips if n not in catalog], names),
+                key=lambda n: backup_store.snapshot_time(n[:-len('.zip')]), reverse=True)
+            store = _get_remote_store(backend, remote_path)
+            snapshots = store.list_snapshots() if backup_store.STORE_DIRNAME in names else []
+            if not zips and not snapshots:
                 dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30044) + "\n(%s: %s)" % (ADDON.getLocalizedString(30329), remote_path))
                 return
-            zips.sort(reverse=True)  # newest first (filename contains date)
-            sel = dialog.select(ADDON.getLocalizedString(30329), zips)
+            labels = [_catalog_label(n, catalog[n]) if n in catalog else n for n in zips]
+            labels.extend("%s (%s)" % (n, ADDON.getLocalizedString(30387)) for n in snapshots)
+            sel = dialog.select(ADDON.getLocalizedString(30329), labels)
             if sel < 0:
                 return
+            if sel >= len(zips):
+                restore_from_snapshot(store, snapshots[sel - len(zips)], wipe_first=wipe)
+                return
             remote_file = remote_path + '/' + zips[sel]
-            temp_dir = xbmcvfs.translatePath('special://temp')
-            temp_zip = os.path.join(temp_dir, 'restore_connection.zip')
+            entry = catalog.get(zips[sel])
+            if entry:
+                # Flag corrupt/truncated archives before the large transfer
+                remote_stat = backend.stat(remote_file)
+                if not entry.get('valid', True) or (remote_stat and entry.get('size') is not None
+                                                    and remote_stat[0] != entry['size']):
+                    dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30400))
+                    return
+            temp_dir = _restore_download_dir()
+            # Per-backup name: an interrupted download's .part is only resumed for the same archive
+            temp_zip = os.path.join(temp_dir, 'restore_connection_' + zips[sel])
             progress = xbmcgui.DialogProgress()
             progress.create(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30067))
-            if not backend.download(remote_file, temp_zip):
+
+            def download_cb(done, total):
+                if total:
+                    progress.update(min(100, int(done * 100 / total)), "%s\n%s / %s" % (
+                        ADDON.getLocalizedString(30067), _format_size(done), _format_size(total)))
+                return progress.iscanceled()
+            if not backend.download_resumable(remote_file, temp_zip, progress_callback=download_cb):
                 progress.close()
                 dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30068))
                 return
             progress.close()
-            if not _is_valid_build_backup(temp_zip):
-                dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30325))
-                return
+            # Completed downloads are removed on every path; only an interrupted .part stays for resume
+            fetched = [temp_zip]
             try:
-                restore_from_zip(zip_path=temp_zip, wipe_first=wipe, is_from_url=True)
+                if entry and not _matches_catalog(temp_zip, entry):
+                    dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30400))
+                    return
+                if not _is_valid_build_backup(temp_zip):
+                    dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30325))
+                    return
+
+                # Incremental/differential: fetch the earlier chain members from the same remote folder
+                def fetch_archive(name):
+                    local = os.path.join(temp_dir, 'restore_connection_' + name)
+                    if backend.download_resumable(remote_path + '/' + name, local):
+                        fetched.append(local)
+                        return local
+                    return None
+                restore_from_zip(zip_path=temp_zip, wipe_first=wipe, is_from_url=True, fetch_archive=fetch_archive)
             finally:
-                if os.path.exists(temp_zip):
-                    try:
-                        os.remove(temp_zip)
-                    except OSError:
-                        pass
+                for path in fetched:
+                    if os.path.exists(path):
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
         except Exception as e:
             log("Restore from connection: %s" % e, xbmc.LOGERROR)
             dialog.ok(ADDON.getLocalizedString(30001), ADDON.getLocalizedString(30068) + "\n%s" % str(e))
+        finally:
+            close_backend(backend)
         return
 
     # idx == 1: URL
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+Content-addressed backup store (alternative to doku_backup_*.zip).
+Layout below the store root:
+  chunks/<2 hex>/<sha256>   file content in CHUNK_SIZE pieces: 1 byte codec ('z' zlib, 's' stored) + data
+  snapshots/<name>.json     per-snapshot manifest: arcname -> size, mtime, mode, chunk hashes
+Chunks are immutable and named by the sha256 of their raw content, so unchanged files and chunks
+are stored once across all snapshots. The snapshot manifest is written last, so a visible snapshot
+never references missing chunks. Files with unchanged size + mtime reuse the chunk list of the
+previous snapshot without being read. prune() keeps the newest SNAPSHOT_KEEP snapshots, gc() then
+deletes the chunks no remaining snapshot references.
+LocalStore works on a directory, RemoteStore on a sync_backend backend (FTP/SFTP/SMB).
+Uses resources.lib.common for log.
+"""
+import hashlib
+import json
+import os
+import threading
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import xbmc
+
+from resources.lib.common import log
+
+STORE_DIRNAME = 'doku_store'
+STORE_VERSION = 1
+CHUNK_SIZE = 1024 * 1024
+SNAPSHOT_SUFFIX = '.json'
+STORE_WORKERS = 4
+SNAPSHOT_KEEP = 10
+_CODEC_ZLIB = b'z'
+_CODEC_STORED = b's'
+
+
+class StoreError(Exception):
+    """Writing to / reading from the store failed (not a problem with a single source file)."""
+
+
+def encode_chunk(raw, compress=True):
+    """Chunk object bytes: zlib if that shrinks the data, else stored."""
+    if compress:
+        comp = zlib.compress(raw, 6)
+        if len(comp) < len(raw):
+            return _CODEC_ZLIB + comp
+    return _CODEC_STORED + raw
+
+
+def decode_chunk(h, blob):
+    """Raw chunk data; raises StoreError if the codec is unknown or the sha256 does not match."""
+    codec, data = blob[:1], blob[1:]
+    try:
+        if codec == _CODEC_ZLIB:
+            raw = zlib.decompress(data)
+        elif codec == _CODEC_STORED:
+            raw = data
+        else:
+            raise StoreError("chunk %s: unknown codec" % h)
+    except zlib.error as e:
+        raise StoreError("chunk %s: %s" % (h, e))
+    if hashlib.sha256(raw).hexdigest() != h:
+        raise StoreError("chunk %s: checksum mismatch" % h)
+    return raw
+
+
+def snapshot_time(name):
+    """Creation time from a snapshot name ending in DDMMYYYY_HHMM (datetime.min if not parseable)."""
+    try:
+        return datetime.strptime(name[-13:], '%d%m%Y_%H%M')
+    except ValueError:
+        return datetime.min
+
+
+class _Store:
+    """Common part: set of chunk hashes known to exist (filled from snapshots and own writes)."""
+    def __init__(self):
+        self._known = set()
+        self._lock = threading.Lock()
+
+    def mark_known(self, hashes):
+        with self._lock:
+            self._known.update(hashes)
+
+    def has_chunk(self, h):
+        with self._lock:
+            if h in self._known:
+                return True
+        if self._chunk_exists(h):
+            self.mark_known((h,))
+            return True
+        return False
+
+    def add_chunk(self, h, raw, compress=True):
+        """Store a chunk unless present. Returns True if it was written."""
+        if self.has_chunk(h):
+            return False
+        with self._lock:
+            # Reserve the hash so parallel workers hitting the same content write it once
+            if h in self._known:
+                return False
+            self._known.add(h)
+        try:
+            self._put_chunk(h, encode_chunk(raw, compress))
+        except Exception:
+            with self._lock:
+                self._known.discard(h)
+            raise
+        return True
+
+    def latest_snapshot(self):
+        names = self.list_snapshots()
+        return names[0] if names else None
+
+    def _sorted(self, names):
+        names = [n[:-len(SNAPSHOT_SUFFIX)] for n in names if n.endswith(SNAPSHOT_SUFFIX)]
+        names.sort(key=snapshot_time, reverse=True)
+        return names
+
+    def prune(self, keep=SNAPSHOT_KEEP):
+        """Delete all but the newest `keep` snapshots (their chunks go with the next gc). Returns the number removed."""
+        removed = 0
+        for name in self.list_snapshots()[max(1, keep):]:
+            if self._delete_snapshot(name):
+                removed += 1
+        if removed:
+            log("Backup store: %d old snapshots removed" % removed, xbmc.LOGINFO)
+        return removed
+
+    def gc(self):
+        """Delete chunks no snapshot references (and leftover temp files). Returns the number removed."""
+        referenced = set()
+        for name in self.list_snapshots():
+            snap = self.load_snapshot(name)
+            if snap is None:
+                # Unreadable snapshot: its chunks are unknown, so do not delete anything
+                return 0
+            for entry in snap['files'].values():
+                referenced.update(entry.get('chunks') or ())
+        removed = set()
+        for prefix in self._chunk_prefixes():
+            for h in self._chunk_names(prefix):
+                if h not in referenced and self._delete_chunk(prefix, h):
+                    removed.add(h)
+        with self._lock:
+            self._known -= removed
+        if removed:
+            log("Backup store gc: %d chunks removed" % len(removed), xbmc.LOGINFO)
+        return len(removed)
+
+    @staticmethod
+    def _parse_snapshot(raw, name):
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            log("Snapshot %s invalid: %s" % (name, e), xbmc.LOGERROR)
+            return None
+        if not isinstance(data, dict) or not isinstance(data.get('files'), dict):
+            return None
+        return data
+
+
+class LocalStore(_Store):
+    """Store in a local directory (e.g. <backup_path>/doku_store)."""
+    def __init__(self, root):
+        super().__init__()
+        self.root = root
+
+    def _chunk_path(self, h):
+        return os.path.join(self.root, 'chunks', h[:2], h)
+
+    def _chunk_exists(self, h):
+        return os.path.isfile(self._chunk_path(h))
+
+    def _put_chunk(self, h, blob):
+        path = self._chunk_path(h)
+        tmp = '%s.%d.tmp' % (path, threading.get_ident())
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, 'wb') as f:
+                f.write(blob)
+            os.replace(tmp, path)
+        except OSError as e:
+            raise StoreError("write chunk %s: %s" % (h, e))
+
+    def get_chunk(self, h):
+        try:
+            with open(self._chunk_path(h), 'rb') as f:
+                return decode_chunk(h, f.read())
+        except OSError as e:
+            raise StoreError("read chunk %s: %s" % (h, e))
+
+    def list_snapshots(self):
+        """Snapshot names, newest first."""
+        try:
+            return self._sorted(os.listdir(os.path.join(self.root, 'snapshots')))
+        except OSError:
+            return []
+
+    def load_snapshot(self, name):
+        try:
+            with open(os.path.join(self.root, 'snapshots', name + SNAPSHOT_SUFFIX), 'r', encoding='utf-8') as f:
+                return self._parse_snapshot(f.read(), name)
+        except OSError as e:
+            log("Snapshot %s not readable: %s" % (name, e), xbmc.LOGERROR)
+            return None
+
+    def save_snapshot(self, name, data):
+        path = os.path.join(self.root, 'snapshots', name + SNAPSHOT_SUFFIX)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            raise StoreError("write snapshot %s: %s" % (name, e))
+
+    def _delete_snapshot(self, name):
+        try:
+            os.remove(os.path.join(self.root, 'snapshots', name + SNAPSHOT_SUFFIX))
+            return True
+        except OSError as e:
+            log("Delete snapshot %s: %s" % (name, e), xbmc.LOGERROR)
+            return False
+
+    def _chunk_prefixes(self):
+        try:
+            return os.listdir(os.path.join(self.root, 'chunks'))
+        except OSError:
+            return []
+
+    def _chunk_names(self, prefix):
+        try:
+            return os.listdir(os.path.join(self.root, 'chunks', prefix))
+        except OSError:
+            return []
+
+    def _delete_chunk(self, prefix, name):
+        try:
+            os.remove(os.path.join(self.root, 'chunks', prefix, name))
+            return True
+        except OSError:
+            return False
+
+
+class RemoteStore(_Store):
+    """
+    Store on a connection (sync_backend). Chunks not known from a snapshot are looked up in a
+    listing of their chunks/<2 hex> folder (fetched once per folder and instance, i.e. per run)
+    and uploaded if missing; temp_dir holds one chunk file per transfer.
+    """
+    def __init__(self, backend, remote_dir, temp_dir):
+        super().__init__()
+        self.backend = backend
+        self.remote_dir = remote_dir.rstrip('/')
+        self.temp_dir = temp_dir
+        self._ensured = set()
+        self._listed = {}
+
+    def _chunk_remote(self, h):
+        return '%s/chunks/%s/%s' % (self.remote_dir, h[:2], h)
+
+    def _chunk_exists(self, h):
+        prefix = h[:2]
+        with self._lock:
+            names = self._listed.get(prefix)
+        if names is None:
+            names = set(self._chunk_names(prefix))
+            with self._lock:
+                names = self._listed.setdefault(prefix, names)
+        return h in names
+
+    def _delete_snapshot(self, name):
+        if self.backend.delete('%s/snapshots/%s%s' % (self.remote_dir, name, SNAPSHOT_SUFFIX)):
+            return True
+        log("Delete snapshot %s failed" % name, xbmc.LOGERROR)
+        return False
+
+    def _remote_names(self, folder, length):
+        # Only store objects of the expected name length; FTP NLST may return paths
+        names = (n.rsplit('/', 1)[-1] for n in self.backend.listdir(folder) or [])
+        return [n for n in names if len(n) == length]
+
+    def _chunk_prefixes(self):
+        return self._remote_names(self.remote_dir + '/chunks', 2)
+
+    def _chunk_names(self, prefix):
+        return self._remote_names('%s/chunks/%s' % (self.remote_dir, prefix), 64)
+
+    def _delete_chunk(self, prefix, name):
+        if not self.backend.delete('%s/chunks/%s/%s' % (self.remote_dir, prefix, name)):
+            return False
+        with self._lock:
+            self._listed.get(prefix, set()).discard(name)
+        return True
+
+    def _ensure(self, folder):
+        with self._lock:
+            if folder in self._ensured:
+                return
+        self.backend.ensure_folder(folder)
+        with self._lock:
+            self._ensured.add(folder)
+
+    def _temp_path(self, tag):
+        return os.path.join(self.temp_dir, 'store_%s_%d.tmp' % (tag, threading.get_ident()))
+
+    def _put_chunk(self, h, blob):
+        self._ensure('%s/chunks/%s' % (self.remote_dir, h[:2]))
+        tmp = self._temp_path(h)
+        try:
+            with open(tmp, 'wb') as f:
+                f.write(blob)
+            if not self.backend.upload(tmp, self._chunk_remote(h)):
+                raise StoreError("upload chunk %s failed" % h)
+        except OSError as e:
+            raise StoreError("upload chunk %s: %s" % (h, e))
+        finally:
+            _remove_quietly(tmp)
+
+    def get_chunk(self, h):
+        tmp = self._temp_path(h)
+        try:
+            if not self.backend.download(self._chunk_remote(h), tmp):
+                raise StoreError("download chunk %s failed" % h)
+            with open(tmp, 'rb') as f:
+                return decode_chunk(h, f.read())
+        except OSError as e:
+            raise StoreError("download chunk %s: %s" % (h, e))
+        finally:
+            _remove_quietly(tmp)
+
+    def list_snapshots(self):
+        return self._sorted(self.backend.listdir(self.remote_dir + '/snapshots') or [])
+
+    def load_snapshot(self, name):
+        tmp = self._temp_path('snapshot')
+        try:
+            if not self.backend.download('%s/snapshots/%s%s' % (self.remote_dir, name, SNAPSHOT_SUFFIX), tmp):
+                return None
+            with open(tmp, 'r', encoding='utf-8') as f:
+                return self._parse_snapshot(f.read(), name)
+        except OSError as e:
+            log("Snapshot %s not readable: %s" % (name, e), xbmc.LOGERROR)
+            return None
+        finally:
+            _remove_quietly(tmp)
+
+    def save_snapshot(self, name, data):
+        self._ensure(self.remote_dir + '/snapshots')
+        tmp = self._temp_path('snapshot')
+        try:
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            if not self.backend.upload(tmp, '%s/snapshots/%s%s' % (self.remote_dir, name, SNAPSHOT_SUFFIX)):
+                raise StoreError("upload snapshot %s failed" % name)
+        except OSError as e:
+            raise StoreError("upload snapshot %s: %s" % (name, e))
+        finally:
+            _remove_quietly(tmp)
+
+
+def _store_file(store, abs_path, previous, policy):
+    """Chunk one file into the store. Returns (entry, new_chunks, new_bytes); OSError = source unreadable."""
+    st = os.stat(abs_path)
+    if previous and previous.get('size') == st.st_size and previous.get('mtime') == st.st_mtime \
+            and isinstance(previous.get('chunks'), list):
+        return dict(previous, mode=st.st_mode), 0, 0
+    compress = policy is None or policy.compress_type(abs_path, st.st_size) != zipfile.ZIP_STORED
+    chunks = []
+    size = new_chunks = new_bytes = 0
+    with open(abs_path, 'rb') as f:
+        for raw in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h = hashlib.sha256(raw).hexdigest()
+            if store.add_chunk(h, raw, compress):
+                new_chunks += 1
+                new_bytes += len(raw)
+            chunks.append(h)
+            size += len(raw)
+    return {'size': size, 'mtime': st.st_mtime, 'mode': st.st_mode, 'chunks': chunks}, new_chunks, new_bytes
+
+
+def create_snapshot(store, items, name, meta=None, progress_callback=None, policy=None, workers=STORE_WORKERS):
+    """
+    Store items [(abs_path, arcname)] as snapshot `name`; meta is merged into the manifest.
+    progress_callback(i, total, arcname) -> True = cancel. Unreadable files are logged and skipped.
+    Returns (True, stats) or (False, None) if cancelled; raises StoreError if the store fails.
+    stats: {'files', 'new_chunks', 'new_bytes'}.
+    """
+    previous_name = store.latest_snapshot()
+    previous = {}
+    if previous_name:
+        previous = (store.load_snapshot(previous_name) or {}).get('files') or {}
+        for entry in previous.values():
+            store.mark_known(entry.get('chunks') or ())
+
+    total = len(items)
+    files = {}
+    stats = {'files': 0, 'new_chunks': 0, 'new_bytes': 0}
+    jobs = iter(enumerate(items))
+    pending = deque()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def refill():
+            while len(pending) < workers * 2:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                i, (abs_path, arcname) = job
+                arcname = arcname.replace(os.sep, '/')
+                pending.append((i, arcname, pool.submit(_store_file, store, abs_path, previous.get(arcname), policy)))
+
+        refill()
+        while pending:
+            i, arcname, future = pending.popleft()
+            if progress_callback and progress_callback(i, total, arcname):
+                for _i, _a, f in pending:
+                    f.cancel()
+                return False, None
+            try:
+                entry, new_chunks, new_bytes = future.result()
+            except OSError as e:
+                log("Skip %s: %s" % (arcname, e), xbmc.LOGERROR)
+                refill()
+                continue
+            files[arcname] = entry
+            stats['files'] += 1
+            stats['new_chunks'] += new_chunks
+            stats['new_bytes'] += new_bytes
+            refill()
+
+    data = dict(meta or {})
+    data.update({'store_version': STORE_VERSION, 'chunk_size': CHUNK_SIZE, 'files': files})
+    store.save_snapshot(name, data)
+    log("Snapshot %s: %d files, %d new chunks (%d bytes)" % (name, stats['files'], stats['new_chunks'], stats['new_bytes']), xbmc.LOGINFO)
+    return True, stats
+
+
+def extract_file(store, entry, target):
+    """Rebuild one file from its chunks (temp file + os.replace) and restore its mtime."""
+    tmp = target + '.part'
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    try:
+        with open(tmp, 'wb') as f:
+            for h in entry.get('chunks') or ():
+                f.write(store.get_chunk(h))
+        os.replace(tmp, target)
+    finally:
+        _remove_quietly(tmp)
+    mtime = entry.get('mtime')
+    if mtime:
+        try:
+            os.utime(target, (mtime, mtime))
+        except OSError:
+            pass
+
+
+def _remove_quietly(path):
+    try:
+        if os.path.isfile(path):
+            os.remove(path)
+    except OSError:
+        pass
@@ -3,7 +3,8 @@
 Shared addon base – single place for all modules.
 
 Modules can use: ADDON, ADDON_ID, ADDON_PATH; L(msg_id) for localization;
-log(msg, level) with unified prefix; safe_get_string/safe_get_bool for settings (with repair on error);
+log(msg, level) with unified prefix; safe_get_string/safe_get_bool for settings (with repair on error,
+served from the shared snapshot in resources.lib.settings_snapshot);
 paths: HOME, USERDATA, TEMP, ADDON_DATA.
 No xbmcplugin; only xbmc/xbmcaddon/xbmcvfs – usable from service, plugin and all libs.
 """
@@ -11,6 +12,8 @@ import xbmc
 import xbmcaddon
 import xbmcvfs
 
+from resources.lib.settings_snapshot import SNAPSHOT
+
 # Addon object and base info (once per addon)
 ADDON = xbmcaddon.Addon()
 ADDON_ID = ADDON.getAddonInfo('id')
@@ -38,42 +41,23 @@ def log(msg, level=xbmc.LOGINFO):
 def safe_get_string(setting_id, default=''):
     """
     Read string setting. On error (e.g. Invalid setting type): write default back, then return default.
+    Served from the shared settings snapshot (resources.lib.settings_snapshot) where a SettingsMonitor runs.
     """
-    try:
-        return ADDON.getSettingString(setting_id) or default
-    except (TypeError, Exception):
-        try:
-            ADDON.setSettingString(setting_id, default)
-        except Exception:
-            pass
-        return default
+    return SNAPSHOT.get_string(setting_id, default)
 
 
 def safe_get_bool(setting_id, default=False):
     """
     Liest Bool-Setting. Bei Fehler: Default zurückschreiben, dann default zurückgeben.
     """
-    try:
-        return ADDON.getSettingBool(setting_id)
-    except (TypeError, Exception):
-        try:
-            ADDON.setSettingBool(setting_id, default)
-        except Exception:
-            pass
-        return default
+    return SNAPSHOT.get_bool(setting_id, default)
 
 
 def safe_set_string(setting_id, value):
     """Write string setting. On error: silent."""
-    try:
-        ADDON.setSettingString(setting_id, str(value) if value is not None else '')
-    except (TypeError, Exception):
-        pass
+    SNAPSHOT.set_string(setting_id, value)
 
 
 def safe_set_bool(setting_id, value):
     """Write bool setting. On error: silent."""
-    try:
-        ADDON.setSettingBool(setting_id, bool(value))
-    except (TypeError, Exception):
-        pass
+    SNAPSHOT.set_bool(setting_id, value)
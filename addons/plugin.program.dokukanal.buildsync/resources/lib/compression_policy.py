@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+"""
+Compression policy for backup/sync ZIPs: decide per file between ZIP_STORED and ZIP_DEFLATED.
+Known-incompressible extensions (images, video, archives) are stored; files above probe_min_size
+get a quick probe: the first block is deflated at level 1 and stored if it does not shrink enough.
+Configurable via the "compression" object in resources/backup_restore.json.
+Uses resources.lib.common for ADDON_PATH, log.
+"""
+import json
+import os
+import zipfile
+import zlib
+
+import xbmc
+
+from resources.lib.common import ADDON_PATH, log
+
+DEFAULT_STORE_EXTENSIONS = (
+    '.jpg', '.jpeg', '.png', '.webp', '.gif',
+    '.zip', '.gz', '.tgz', '.bz2', '.xz', '.7z', '.rar',
+    '.mp4', '.mkv', '.avi', '.mp3', '.aac', '.ogg', '.flac',
+)
+DEFAULT_PROBE_MIN_SIZE = 1024 * 1024
+DEFAULT_PROBE_BLOCK_SIZE = 65536
+DEFAULT_PROBE_MAX_RATIO = 0.95
+
+
+class CompressionPolicy:
+    """store_extensions: lower-case suffixes; probe_max_ratio: store if deflated/raw >= this."""
+    def __init__(self, store_extensions=DEFAULT_STORE_EXTENSIONS, probe_min_size=DEFAULT_PROBE_MIN_SIZE,
+                 probe_block_size=DEFAULT_PROBE_BLOCK_SIZE, probe_max_ratio=DEFAULT_PROBE_MAX_RATIO):
+        self.store_extensions = tuple(e.lower() for e in store_extensions)
+        self.probe_min_size = probe_min_size
+        self.probe_block_size = probe_block_size
+        self.probe_max_ratio = probe_max_ratio
+
+    @classmethod
+    def from_config(cls, cfg):
+        """Build from the "compression" object; missing/invalid keys keep their defaults."""
+        policy = cls()
+        if not isinstance(cfg, dict):
+            return policy
+        exts = cfg.get('store_extensions')
+        if isinstance(exts, list):
+            policy.store_extensions = tuple(str(e).lower() for e in exts if e)
+        for key, conv in (('probe_min_size', int), ('probe_block_size', int), ('probe_max_ratio', float)):
+            if key in cfg:
+                try:
+                    setattr(policy, key, conv(cfg[key]))
+                except (TypeError, ValueError):
+                    log("compression policy: invalid %s=%r" % (key, cfg[key]), xbmc.LOGWARNING)
+        return policy
+
+    def compress_type(self, path, size=None):
+        """zipfile.ZIP_STORED or zipfile.ZIP_DEFLATED for a local file."""
+        if path.lower().endswith(self.store_extensions):
+            return zipfile.ZIP_STORED
+        if size is None:
+            try:
+                size = os.path.getsize(path)
+            except OSError:
+                return zipfile.ZIP_DEFLATED
+        if self.probe_min_size > 0 and size >= self.probe_min_size and self._incompressible(path):
+            return zipfile.ZIP_STORED
+        return zipfile.ZIP_DEFLATED
+
+    def _incompressible(self, path):
+        try:
+            with open(path, 'rb') as f:
+                block = f.read(self.probe_block_size)
+        except OSError:
+            return False
+        if not block:
+            return False
+        return len(zlib.compress(block, 1)) >= len(block) * self.probe_max_ratio
+
+
+def load_policy():
+    """Policy from resources/backup_restore.json ({"compression": {...}}); defaults if absent."""
+    try:
+        with open(os.path.join(ADDON_PATH, 'resources', 'backup_restore.json'), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return CompressionPolicy.from_config(data.get('compression'))
+    except (OSError, ValueError) as e:
+        log("compression policy: %s" % e, xbmc.LOGDEBUG)
+    return CompressionPolicy()
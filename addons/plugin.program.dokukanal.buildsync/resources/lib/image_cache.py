@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+On-disk ring cache of prefetched background images in the addon profile.
+The service refills it in the background (fetch_url with timeouts and a size cap); image rotation
+only picks a cached file, so a change is instant and works offline. Shown images are evicted first
+(LRU by last use), bounded by max_items and max_bytes. Index stored as JSON next to the files, together
+with the source location (list URL / network path); a changed location clears the cache. Use get_cache():
+one shared instance per folder, so all threads of the process use the same lock and index.
+fetch_image_list: [img] URLs of a list page, persisted with ETag/Last-Modified and revalidated conditionally.
+Uses resources.lib.common for log.
+"""
+import json
+import os
+import random
+import threading
+import time
+import re
+import urllib.error
+import urllib.request
+import uuid
+
+import xbmc
+
+from resources.lib.common import log
+
+INDEX_FILENAME = 'index.json'
+FETCH_TIMEOUT = 15
+FETCH_CHUNK_SIZE = 65536
+MAX_IMAGE_BYTES = 20 * 1024 * 1024
+MAX_LIST_BYTES = 4 * 1024 * 1024
+IMG_TAG_RE = re.compile(r'\[img\](.*?)\[/img\]')
+USER_AGENT = 'Kodi-AutoFTPSync/1.0'
+# .part files older than this are left over from a killed download and are removed on load
+STALE_PART_AGE = 3600
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+def fetch_url(url, target_path, timeout=FETCH_TIMEOUT, max_bytes=MAX_IMAGE_BYTES):
+    """Stream url to target_path (timeout per socket op, abort above max_bytes). Returns bytes written."""
+    req = urllib.request.Request(url, headers={'User-Agent': USER_AGENT})
+    written = 0
+    with urllib.request.urlopen(req, timeout=timeout) as response, open(target_path, 'wb') as f:
+        length = response.headers.get('Content-Length')
+        if length and length.isdigit() and int(length) > max_bytes:
+            raise ImageTooLarge("%s: %s bytes" % (url, length))
+        for chunk in iter(lambda: response.read(FETCH_CHUNK_SIZE), b''):
+            written += len(chunk)
+            if written > max_bytes:
+                raise ImageTooLarge("%s: more than %d bytes" % (url, max_bytes))
+            f.write(chunk)
+    return written
+
+
+def _load_list_cache(cache_path, url):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict) and data.get('url') == url and isinstance(data.get('urls'), list):
+            return data
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def fetch_image_list(url, cache_path, timeout=FETCH_TIMEOUT, max_bytes=MAX_LIST_BYTES):
+    """
+    [img]…[/img] URLs from the list page at url. The parsed list is stored in cache_path together with
+    ETag/Last-Modified; later calls send If-None-Match/If-Modified-Since and reuse it on 304.
+    Pages above max_bytes are rejected. If the server is unreachable, the cached list is returned.
+    Returns: list of URLs (empty if nothing is available).
+    """
+    cached = _load_list_cache(cache_path, url)
+    headers = {'User-Agent': USER_AGENT}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+    try:
+        req = urllib.request.Request(url, headers=headers)
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            length = response.headers.get('Content-Length')
+            if length and length.isdigit() and int(length) > max_bytes:
+                raise ImageTooLarge("%s: %s bytes" % (url, length))
+            body = response.read(max_bytes + 1)
+            if len(body) > max_bytes:
+                raise ImageTooLarge("%s: more than %d bytes" % (url, max_bytes))
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            charset = response.headers.get_content_charset() or 'utf-8'
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            log("Image list not modified: %s" % url, xbmc.LOGDEBUG)
+            return cached['urls']
+        log("Image list %s: HTTP %s" % (url, e.code), xbmc.LOGWARNING)
+        return cached['urls'] if cached else []
+    except Exception as e:
+        log("Image list %s: %s" % (url, e), xbmc.LOGWARNING)
+        return cached['urls'] if cached else []
+    urls = IMG_TAG_RE.findall(body.decode(charset, errors='replace'))
+    try:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        with open(cache_path + '.tmp', 'w', encoding='utf-8') as f:
+            json.dump({'url': url, 'etag': etag, 'last_modified': last_modified,
+                       'fetched': time.time(), 'urls': urls}, f)
+        os.replace(cache_path + '.tmp', cache_path)
+    except OSError as e:
+        log("image list cache: %s" % e, xbmc.LOGDEBUG)
+    return urls
+
+
+def get_cache(root, location='', max_items=8, max_bytes=64 * 1024 * 1024):
+    """Shared ImageRingCache for root; a new one (clearing the folder) if location changed."""
+    with _caches_lock:
+        cache = _caches.get(root)
+        if cache is None or cache.location != location:
+            cache = ImageRingCache(root, location, max_items, max_bytes)
+            _caches[root] = cache
+        return cache
+
+
+class ImageRingCache:
+    """
+    Index: {'location': str, 'entries': {file_name: {'source': str, 'size': int, 'fetched': float,
+    'last_used': float or None}}}. Files in root that are not in the index are deleted on load.
+    """
+    def __init__(self, root, location='', max_items=8, max_bytes=64 * 1024 * 1024):
+        self.root = root
+        self.location = location
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = {}
+        data = None
+        try:
+            with open(os.path.join(root, INDEX_FILENAME), 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            pass
+        if isinstance(data, dict) and data.get('location') == location and isinstance(data.get('entries'), dict):
+            self._entries = {n: e for n, e in data['entries'].items() if os.path.isfile(os.path.join(root, n))}
+        elif data is not None:
+            log("Image cache %s: source changed, clearing" % root, xbmc.LOGINFO)
+        self._remove_orphans()
+        if data is not None:
+            self._save()
+
+    def _remove_orphans(self):
+        """Delete files not in the index (old location, lost index writes, stale .part downloads)."""
+        try:
+            names = os.listdir(self.root)
+        except OSError:
+            return
+        now = time.time()
+        for name in names:
+            if name in self._entries or name.startswith(INDEX_FILENAME):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith('.part') and now - os.path.getmtime(path) < STALE_PART_AGE:
+                    continue
+                os.remove(path)
+            except OSError:
+                pass
+
+    def _save(self):
+        path = os.path.join(self.root, INDEX_FILENAME)
+        try:
+            with open(path + '.tmp', 'w', encoding='utf-8') as f:
+                json.dump({'location': self.location, 'entries': self._entries}, f)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            log("image cache index: %s" % e, xbmc.LOGDEBUG)
+
+    def sources(self):
+        with self._lock:
+            return set(e.get('source') for e in self._entries.values())
+
+    def unused_count(self):
+        """Prefetched images not shown yet."""
+        with self._lock:
+            return sum(1 for e in self._entries.values() if not e.get('last_used'))
+
+    def needs_refill(self):
+        """True while fewer than max_items images are waiting to be shown."""
+        return self.unused_count() < self.max_items
+
+    def pick(self):
+        """
+        Next image to show: a random unshown one, otherwise the least recently shown.
+        Marks it used. Returns (path, source) or (None, None) if the cache is empty.
+        """
+        with self._lock:
+            if not self._entries:
+                return None, None
+            fresh = [n for n, e in self._entries.items() if not e.get('last_used')]
+            name = random.choice(fresh) if fresh else min(self._entries, key=lambda n: self._entries[n]['last_used'])
+            self._entries[name]['last_used'] = time.time()
+            self._save()
+            return os.path.join(self.root, name), self._entries[name].get('source')
+
+    def new_path(self, source):
+        """Temp path in the cache dir for a download; pass it to add() when complete."""
+        os.makedirs(self.root, exist_ok=True)
+        ext = os.path.splitext(source.split('?', 1)[0])[1].lower()
+        return os.path.join(self.root, '%s%s.part' % (uuid.uuid4().hex, ext if len(ext) <= 5 else ''))
+
+    def add(self, temp_path, source):
+        """Commit a finished download (from new_path) and evict down to the budget."""
+        name = os.path.basename(temp_path)[:-len('.part')]
+        os.replace(temp_path, os.path.join(self.root, name))
+        with self._lock:
+            self._entries[name] = {'source': source, 'size': os.path.getsize(os.path.join(self.root, name)),
+                                   'fetched': time.time(), 'last_used': None}
+            self._evict(keep=name)
+            self._save()
+
+    def _evict(self, keep=None):
+        """Drop shown images (oldest use first), then the oldest unshown ones, until within budget."""
+        def over():
+            return (len(self._entries) > self.max_items
+                    or sum(e.get('size', 0) for e in self._entries.values()) > self.max_bytes)
+        order = sorted((n for n in self._entries if n != keep),
+                       key=lambda n: (self._entries[n].get('last_used') is None,
+                                      self._entries[n].get('last_used') or self._entries[n].get('fetched', 0)))
+        for name in order:
+            if not over():
+                break
+            self._entries.pop(name, None)
+            try:
+                os.remove(os.path.join(self.root, name))
+            except OSError:
+                pass
+
+    def discard(self, temp_path):
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+"""
+Persistent image catalog for the local-folder and network-path (SMB/NFS) image sources.
+The folder is scanned once (optionally recursive); afterwards a rotation reads a small cursor and one
+line of the current round. Local catalogs are invalidated by directory mtimes, network catalogs are
+rescanned every REFRESH_INTERVAL seconds (listing a NAS share takes seconds). Random selection without
+repeats: the round is a shuffled list read sequentially, reshuffled when exhausted; a rescan keeps the
+unshown rest of the round (plus new files), so images do not repeat before all were shown.
+Uses resources.lib.common for log.
+"""
+import json
+import os
+import random
+import threading
+import time
+
+import xbmc
+import xbmcvfs
+
+from resources.lib.common import log
+
+CATALOG_VERSION = 2
+REFRESH_INTERVAL = 6 * 3600
+MAX_DEPTH = 8
+
+_LOCK = threading.Lock()
+
+
+def _is_vfs(root):
+    return '://' in root
+
+
+def _scan_local(root, extensions, recursive):
+    """Returns (files, {dir: mtime})."""
+    files = []
+    dirs = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        try:
+            dirs[dirpath] = os.stat(dirpath).st_mtime
+        except OSError:
+            continue
+        files.extend(os.path.join(dirpath, f) for f in filenames if f.lower().endswith(extensions))
+        dirnames[:] = [d for d in dirnames if not d.startswith('.')] if recursive else []
+    return files, dirs
+
+
+def _scan_vfs(root, extensions, recursive):
+    """Returns (files, {}); directories deeper than MAX_DEPTH are skipped."""
+    files = []
+    pending = [(root.rstrip('/') + '/', 0)]
+    while pending:
+        path, depth = pending.pop()
+        dirs, names = xbmcvfs.listdir(path)
+        files.extend(path + n for n in names if n.lower().endswith(extensions))
+        if recursive and depth < MAX_DEPTH:
+            pending.extend((path + d + '/', depth + 1) for d in dirs if not d.startswith('.'))
+    return files, {}
+
+
+class ImageCatalog:
+    """
+    Files next to path: path (meta JSON: 'version', 'root', 'recursive', 'scanned', 'dirs', 'count'),
+    path.files (all images, one per line, read on rescan/new round only), path.list (current round in
+    random order, one per line) and path.pos ({'offset': byte offset of the next line in path.list}).
+    """
+    def __init__(self, path, root, extensions, recursive=True):
+        self.path = path
+        self.root = root
+        self.extensions = tuple(extensions)
+        self.recursive = bool(recursive)
+        self.files_path = path + '.files'
+        self.list_path = path + '.list'
+        self.pos_path = path + '.pos'
+
+    def _load_json(self, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def _write(self, path, text):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'w', encoding='utf-8', newline='\n') as f:
+                f.write(text)
+            os.replace(path + '.tmp', path)
+        except OSError as e:
+            log("image catalog %s: %s" % (path, e), xbmc.LOGDEBUG)
+
+    def _read_lines(self, path, offset=0):
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            return [line for line in f.read().decode('utf-8').split('\n') if line]
+
+    def _start_round(self, paths):
+        order = list(paths)
+        random.shuffle(order)
+        self._write(self.list_path, ''.join(p + '\n' for p in order))
+        self._write(self.pos_path, json.dumps({'offset': 0}))
+
+    def _is_stale(self, meta):
+        if (not meta or meta.get('version') != CATALOG_VERSION or meta.get('root') != self.root
+                or meta.get('recursive') != self.recursive):
+            return True
+        if _is_vfs(self.root):
+            return time.time() - meta.get('scanned', 0) > REFRESH_INTERVAL
+        for dirpath, mtime in (meta.get('dirs') or {}).items():
+            try:
+                if os.stat(dirpath).st_mtime != mtime:
+                    return True
+            except OSError:
+                return True
+        return False
+
+    def _rescan(self, meta):
+        """Scan; the next round continues with the unshown rest of the current one plus new files."""
+        scan = _scan_vfs if _is_vfs(self.root) else _scan_local
+        started = time.time()
+        files, dirs = scan(self.root, self.extensions, self.recursive)
+        files = [f for f in files if '\n' not in f]
+        log("Image catalog: %d images in %s (%.1fs)" % (len(files), self.root, time.time() - started), xbmc.LOGINFO)
+        previous = remaining = ()
+        if meta and meta.get('root') == self.root and meta.get('recursive') == self.recursive:
+            try:
+                previous = set(self._read_lines(self.files_path))
+                remaining = self._read_lines(self.list_path, (self._load_json(self.pos_path) or {}).get('offset', 0))
+            except (OSError, ValueError):
+                previous = remaining = ()
+        current = set(files)
+        round_rest = [f for f in remaining if f in current] + [f for f in files if f not in previous]
+        self._write(self.files_path, ''.join(f + '\n' for f in files))
+        self._start_round(round_rest or files)
+        meta = {'version': CATALOG_VERSION, 'root': self.root, 'recursive': self.recursive,
+                'scanned': time.time(), 'dirs': dirs, 'count': len(files)}
+        self._write(self.path, json.dumps(meta))
+        return meta
+
+    def refresh(self, force=False):
+        """Rescan if forced or stale. Returns number of cataloged images."""
+        with _LOCK:
+            meta = self._load_json(self.path)
+            if force or self._is_stale(meta):
+                meta = self._rescan(meta)
+            return meta.get('count', 0)
+
+    def next(self, exclude=None):
+        """
+        Random image not shown in the current round (rescans first if stale).
+        exclude: paths to skip (e.g. already cached). Returns path or None.
+        """
+        exclude = exclude or ()
+        with _LOCK:
+            meta = self._load_json(self.path)
+            if self._is_stale(meta):
+                meta = self._rescan(meta)
+            for _ in range(2):
+                offset = (self._load_json(self.pos_path) or {}).get('offset', 0)
+                try:
+                    with open(self.list_path, 'rb') as f:
+                        f.seek(offset)
+                        for line in iter(f.readline, b''):
+                            offset += len(line)
+                            candidate = line.decode('utf-8').rstrip('\n')
+                            if candidate and candidate not in exclude:
+                                self._write(self.pos_path, json.dumps({'offset': offset}))
+                                return candidate
+                except OSError:
+                    pass
+                # Round exhausted: all images again in a new random order
+                try:
+                    self._start_round(self._read_lines(self.files_path))
+                except OSError:
+                    meta = self._rescan(None)
+            return None
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+Parallel ZIP writer for build backups.
+Files are split into chunks that worker threads deflate independently (zlib releases the GIL).
+Every chunk after the first is primed with the preceding 32 KiB as dictionary and ends with a
+sync flush, so the chunks concatenate to one valid deflate stream (same technique as pigz).
+A single writer (the calling thread) emits the entries in input order as a ZIP64-capable archive;
+multi-chunk entries carry sizes/CRC in a data descriptor, so the output only needs write().
+If a source file becomes unreadable mid-entry, the partial entry is truncated away (seekable output) or
+closed with an accurate descriptor and left out of the central directory (stream, e.g. upload pipe).
+An optional CompressionPolicy picks ZIP_STORED for incompressible files (no deflate work at all).
+Uses resources.lib.common for log.
+"""
+import os
+import struct
+import time
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import xbmc
+
+from resources.lib.common import log
+
+CHUNK_SIZE = 1024 * 1024
+DICT_SIZE = 32768
+MAX_WORKERS = 8
+COMPRESS_LEVEL = zlib.Z_DEFAULT_COMPRESSION
+
+ZIP_STORED = 0
+ZIP_DEFLATED = 8
+ZIP64_LIMIT = (1 << 31) - 1
+ZIP_FILECOUNT_LIMIT = (1 << 16) - 1
+_FLAG_DATA_DESCRIPTOR = 0x08
+_FLAG_UTF8 = 0x800
+_CREATE_SYSTEM = 0 if os.name == 'nt' else 3
+
+
+def default_workers():
+    """Worker threads: one per core, capped at MAX_WORKERS."""
+    return max(1, min(MAX_WORKERS, os.cpu_count() or 1))
+
+
+def _dos_datetime(mtime):
+    dt = time.localtime(mtime)[:6]
+    if dt[0] < 1980:
+        dt = (1980, 1, 1, 0, 0, 0)
+    return (dt[3] << 11 | dt[4] << 5 | (dt[5] // 2)), ((dt[0] - 1980) << 9 | dt[1] << 5 | dt[2])
+
+
+def _encode_name(arcname):
+    name = arcname.replace(os.sep, '/').lstrip('/')
+    try:
+        return name.encode('ascii'), 0
+    except UnicodeEncodeError:
+        return name.encode('utf-8'), _FLAG_UTF8
+
+
+def _deflate(raw, zdict, last, level=COMPRESS_LEVEL):
+    """Raw deflate of one chunk; non-final chunks end byte-aligned (Z_SYNC_FLUSH)."""
+    if zdict:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15, zdict=zdict)
+    else:
+        c = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return c.compress(raw) + c.flush(zlib.Z_FINISH if last else zlib.Z_SYNC_FLUSH)
+
+
+def _read_and_deflate(path, offset, length, last, level, method=ZIP_DEFLATED):
+    """Worker: read one chunk (plus the preceding dictionary window) and deflate it; STORED chunks pass through."""
+    if method == ZIP_STORED:
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            raw = f.read(length)
+        return raw, None, raw
+    with open(path, 'rb') as f:
+        start = max(0, offset - DICT_SIZE)
+        f.seek(start)
+        zdict = f.read(offset - start) if offset else b''
+        raw = f.read(length)
+    return raw, zdict, _deflate(raw, zdict, last, level)
+
+
+class _Entry:
+    """Central directory record of one written entry."""
+    __slots__ = ('arcname', 'name', 'flags', 'method', 'dostime', 'dosdate', 'crc', 'comp_size', 'raw_size',
+                 'offset', 'external_attr', 'zip64_local')
+
+    def __init__(self, arcname, name, flags, method, dostime, dosdate, offset, external_attr):
+        self.arcname = arcname
+        self.name = name
+        self.flags = flags
+        self.method = method
+        self.dostime = dostime
+        self.dosdate = dosdate
+        self.offset = offset
+        self.external_attr = external_attr
+        self.crc = 0
+        self.comp_size = 0
+        self.raw_size = 0
+        self.zip64_local = False
+
+
+class ParallelZipWriter:
+    """
+    ZIP writer with parallel deflate. target: file path or writable binary file object.
+    policy: optional compression_policy.CompressionPolicy (default: deflate everything).
+    add_files() compresses on `workers` threads; writestr() adds small in-memory entries.
+    close() writes the central directory (and ZIP64 end records when needed).
+    """
+    def __init__(self, target, workers=None, level=COMPRESS_LEVEL, chunk_size=CHUNK_SIZE, policy=None):
+        if isinstance(target, str):
+            self._fp = open(target, 'wb')
+            self._own_fp = True
+        else:
+            self._fp = target
+            self._own_fp = False
+        self.workers = workers or default_workers()
+        self.level = level
+        self.chunk_size = chunk_size
+        self.policy = policy
+        self._pos = 0
+        self._entries = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _write(self, data):
+        self._fp.write(data)
+        self._pos += len(data)
+
+    def _abandon(self, entry):
+        """
+        Close a half-written streamed entry that cannot be rolled back: end its deflate stream and write
+        a descriptor matching the bytes written. It is not added to the central directory, so the archive
+        does not contain it (sequential readers see a consistent, truncated entry).
+        """
+        if entry.method == ZIP_DEFLATED:
+            tail = zlib.compressobj(self.level, zlib.DEFLATED, -15).flush(zlib.Z_FINISH)
+            self._write(tail)
+            entry.comp_size += len(tail)
+        self._write(struct.pack('<4sLQQ', b'PK\007\010', entry.crc, entry.comp_size, entry.raw_size))
+
+    def _rollback(self, offset):
+        """Drop a half-written entry (only possible on seekable output)."""
+        seekable = getattr(self._fp, 'seekable', None)
+        if not (callable(seekable) and seekable()):
+            return False
+        self._fp.seek(offset)
+        self._fp.truncate()
+        self._pos = offset
+        return True
+
+    def _local_header(self, entry, streamed):
+        if streamed:
+            crc, comp_size, raw_size = 0, 0xFFFFFFFF, 0xFFFFFFFF
+            extra = struct.pack('<HHQQ', 1, 16, 0, 0)
+            entry.zip64_local = True
+        elif entry.raw_size > ZIP64_LIMIT or entry.comp_size > ZIP64_LIMIT:
+            crc, comp_size, raw_size = entry.crc, 0xFFFFFFFF, 0xFFFFFFFF
+            extra = struct.pack('<HHQQ', 1, 16, entry.raw_size, entry.comp_size)
+            entry.zip64_local = True
+        else:
+            crc, comp_size, raw_size = entry.crc, entry.comp_size, entry.raw_size
+            extra = b''
+        version = 45 if entry.zip64_local else 20
+        return struct.pack('<4s2B4HL2L2H', b'PK\003\004', version, 0, entry.flags, entry.method,
+                           entry.dostime, entry.dosdate, crc, comp_size, raw_size,
+                           len(entry.name), len(extra)) + entry.name + extra
+
+    def _write_complete(self, arcname, mtime, mode, raw, comp, method=ZIP_DEFLATED):
+        """Write an entry whose data is fully known (sizes in the local header, no descriptor)."""
+        name, flags = _encode_name(arcname)
+        dostime, dosdate = _dos_datetime(mtime)
+        entry = _Entry(name.decode('utf-8'), name, flags, method, dostime, dosdate, self._pos, (mode & 0xFFFF) << 16)
+        entry.crc = zlib.crc32(raw) & 0xFFFFFFFF
+        entry.raw_size = len(raw)
+        entry.comp_size = len(comp)
+        self._write(self._local_header(entry, streamed=False))
+        self._write(comp)
+        self._entries.append(entry)
+
+    def writestr(self, arcname, data, level=None):
+        """Add an in-memory entry (str is encoded as UTF-8), deflated in the calling thread."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        comp = _deflate(data, b'', True, self.level if level is None else level)
+        self._write_complete(arcname, time.time(), 0o100644, data, comp)
+
+    @property
+    def bytes_written(self):
+        return self._pos
+
+    def written(self):
+        """{arcname ('/' separated): (crc32, size)} of all entries written so far."""
+        return {e.arcname: (e.crc, e.raw_size) for e in self._entries}
+
+    def _iter_jobs(self, items):
+        """Yield (file_index, abs_path, arcname, stat, method, chunk_index, chunk_count, offset, length)."""
+        for i, (abs_path, arcname) in enumerate(items):
+            try:
+                st = os.stat(abs_path)
+            except OSError as e:
+                log("Skip %s: %s" % (arcname, e), xbmc.LOGERROR)
+                continue
+            method = self.policy.compress_type(abs_path, st.st_size) if self.policy else ZIP_DEFLATED
+            count = max(1, -(-st.st_size // self.chunk_size))
+            for k in range(count):
+                offset = k * self.chunk_size
+                length = st.st_size - offset if k == count - 1 else self.chunk_size
+                yield i, abs_path, arcname, st, method, k, count, offset, length
+
+    def add_files(self, items, progress_callback=None):
+        """
+        Compress and write items [(abs_path, arcname)] in order.
+        progress_callback(i, total, arcname) is called before each file; True = cancel.
+        Unreadable files are logged and skipped. Returns False if cancelled, else True.
+        """
+        total = len(items)
+        window = self.workers * 2
+        jobs = self._iter_jobs(items)
+        pending = deque()
+        current = None  # (entry, tail) of the multi-chunk entry being written
+        skip_index = None
+
+        def refill():
+            while len(pending) < window:
+                job = next(jobs, None)
+                if job is None:
+                    return
+                _i, path, _a, _st, method, k, count, offset, length = job
+                pending.append((job, pool.submit(_read_and_deflate, path, offset, length, k == count - 1,
+                                                 self.level, method)))
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            refill()
+            while pending:
+                job, future = pending.popleft()
+                refill()
+                i, abs_path, arcname, st, method, k, count, offset, length = job
+                if k == 0:
+                    if progress_callback and progress_callback(i, total, arcname):
+                        for _job, f in pending:
+                            f.cancel()
+                        return False
+                    skip_index = None
+                elif i == skip_index:
+                    continue
+                try:
+                    raw, zdict, comp = future.result()
+                except Exception as e:
+                    log("Skip %s: %s" % (arcname, e), xbmc.LOGERROR)
+                    skip_index = i
+                    if current is not None:
+                        if not self._rollback(current[0].offset):
+                            self._abandon(current[0])
+                        current = None
+                    continue
+                if count == 1:
+                    self._write_complete(arcname, st.st_mtime, st.st_mode, raw, comp, method)
+                    continue
+                if k == 0:
+                    name, flags = _encode_name(arcname)
+                    dostime, dosdate = _dos_datetime(st.st_mtime)
+                    entry = _Entry(name.decode('utf-8'), name, flags | _FLAG_DATA_DESCRIPTOR, method, dostime, dosdate,
+                                   self._pos, (st.st_mode & 0xFFFF) << 16)
+                    self._write(self._local_header(entry, streamed=True))
+                    current = (entry, b'')
+                entry, tail = current
+                if method == ZIP_DEFLATED and zdict != tail:
+                    # File changed under us (short read): the worker's dictionary does not match
+                    # the bytes actually written before this chunk, so recompress here.
+                    comp = _deflate(raw, tail, k == count - 1, self.level)
+                self._write(comp)
+                entry.crc = zlib.crc32(raw, entry.crc) & 0xFFFFFFFF
+                entry.raw_size += len(raw)
+                entry.comp_size += len(comp)
+                current = (entry, (tail + raw)[-DICT_SIZE:])
+                if k == count - 1:
+                    self._write(struct.pack('<4sLQQ', b'PK\007\010', entry.crc, entry.comp_size, entry.raw_size))
+                    self._entries.append(entry)
+                    current = None
+        return True
+
+    def close(self):
+        """Write central directory and end records; close the file if opened here."""
+        if self._closed:
+            return
+        self._closed = True
+        try:
+            cd_offset = self._pos
+            for e in self._entries:
+                extra_fields = []
+                raw_size, comp_size, offset = e.raw_size, e.comp_size, e.offset
+                if raw_size > ZIP64_LIMIT:
+                    extra_fields.append(raw_size)
+                    raw_size = 0xFFFFFFFF
+                if comp_size > ZIP64_LIMIT:
+                    extra_fields.append(comp_size)
+                    comp_size = 0xFFFFFFFF
+                if offset > ZIP64_LIMIT:
+                    extra_fields.append(offset)
+                    offset = 0xFFFFFFFF
+                extra = struct.pack('<HH' + 'Q' * len(extra_fields), 1, 8 * len(extra_fields), *extra_fields) if extra_fields else b''
+                version = 45 if (extra_fields or e.zip64_local) else 20
+                self._write(struct.pack('<4s4B4HL2L5H2L', b'PK\001\002', version, _CREATE_SYSTEM, version, 0,
+                                        e.flags, e.method, e.dostime, e.dosdate, e.crc, comp_size, raw_size,
+                                        len(e.name), len(extra), 0, 0, 0, e.external_attr, offset) + e.name + extra)
+            cd_size = self._pos - cd_offset
+            count = len(self._entries)
+            if count > ZIP_FILECOUNT_LIMIT or cd_offset > ZIP64_LIMIT or cd_size > ZIP64_LIMIT:
+                eocd64_offset = self._pos
+                self._write(struct.pack('<4sQ2H2L4Q', b'PK\006\006', 44, 45, 45, 0, 0, count, count, cd_size, cd_offset))
+                self._write(struct.pack('<4sLQL', b'PK\006\007', 0, eocd64_offset, 1))
+                count = min(count, 0xFFFF)
+                cd_size = min(cd_size, 0xFFFFFFFF)
+                cd_offset = min(cd_offset, 0xFFFFFFFF)
+            self._write(struct.pack('<4s4H2LH', b'PK\005\006', 0, 0, count, count, cd_size, cd_offset, 0))
+            self._fp.flush()
+        finally:
+            if self._own_fp:
+                self._fp.close()
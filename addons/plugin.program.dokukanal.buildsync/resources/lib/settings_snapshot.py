@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+Gemeinsamer Settings-Snapshot für core.settings und resources.lib.common.
+Werte werden einmal über die Kodi-API gelesen und bis Monitor.onSettingsChanged aus dem Speicher
+geliefert. Aktiv nur in Prozessen mit SettingsMonitor (Service); Plugin-Aufrufe lesen direkt.
+Schreiben geht immer an Kodi und aktualisiert den Snapshot (write-through).
+"""
+import threading
+
+import xbmc
+import xbmcaddon
+
+
+class SettingsSnapshot(object):
+    """Typed, thread-safe setting cache: get_string/get_bool/get_int with repair on invalid type."""
+    def __init__(self, addon):
+        self._addon = addon
+        self._values = {}
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.active = False
+
+    def invalidate(self):
+        """Drop all cached values (settings changed outside this process or via the settings dialog)."""
+        with self._lock:
+            self._values.clear()
+            self._generation += 1
+
+    def _read(self, kind, setting_id, reader):
+        key = (kind, setting_id)
+        with self._lock:
+            if self.active and key in self._values:
+                return self._values[key]
+            generation = self._generation
+        value = reader(setting_id)
+        with self._lock:
+            # Not cached if invalidated while reading (value may already be outdated)
+            if self.active and generation == self._generation:
+                self._values[key] = value
+        return value
+
+    def _store(self, kind, setting_id, value):
+        with self._lock:
+            if self.active:
+                self._values[(kind, setting_id)] = value
+
+    def get_string(self, setting_id, default=''):
+        """
+        Read string setting. On error (e.g. Invalid setting type): write default back, then return default.
+        """
+        try:
+            return self._read('string', setting_id, self._addon.getSettingString) or default
+        except (TypeError, Exception):
+            self.set_string(setting_id, default)
+            return default
+
+    def get_bool(self, setting_id, default=False):
+        """
+        Liest Bool-Setting. Bei Fehler: Default zurückschreiben, dann default zurückgeben.
+        """
+        try:
+            return self._read('bool', setting_id, self._addon.getSettingBool)
+        except (TypeError, Exception):
+            self.set_bool(setting_id, default)
+            return default
+
+    def get_int(self, setting_id, default=0):
+        """String setting as int (spinner values); default if empty or not a number."""
+        try:
+            return int(self.get_string(setting_id, str(default)) or default)
+        except (ValueError, TypeError):
+            return default
+
+    def set_string(self, setting_id, value):
+        """Write string setting. On error: silent."""
+        value = str(value) if value is not None else ''
+        try:
+            self._addon.setSettingString(setting_id, value)
+            self._store('string', setting_id, value)
+        except (TypeError, Exception):
+            pass
+
+    def set_bool(self, setting_id, value):
+        """Write bool setting. On error: silent."""
+        try:
+            self._addon.setSettingBool(setting_id, bool(value))
+            self._store('bool', setting_id, bool(value))
+        except (TypeError, Exception):
+            pass
+
+
+SNAPSHOT = SettingsSnapshot(xbmcaddon.Addon())
+
+
+class SettingsMonitor(xbmc.Monitor):
+    """
+    xbmc.Monitor that invalidates SNAPSHOT on onSettingsChanged. Creating one enables caching in
+    this process; callbacks arrive while its thread waits in waitForAbort.
+    """
+    def __init__(self):
+        super(SettingsMonitor, self).__init__()
+        SNAPSHOT.active = True
+
+    def onSettingsChanged(self):
+        SNAPSHOT.invalidate()
@@ -1,15 +1,36 @@
 # -*- coding: utf-8 -*-
 """
 Sync backends: FTP, SFTP (via xbmcvfs if vfs.sftp present), SMB (via xbmcvfs).
-Each backend provides: upload, download, folder_exists(remote_path), ensure_folder(remote_path).
+Each backend provides: upload, download, folder_exists(remote_path), ensure_folder(remote_path), listdir,
+stat(remote_path) -> (size, mtime) or None, close().
+upload_resumable/download_resumable write to a .part name, resume after interruptions and rename when complete.
+upload_stream uploads whatever a file-like source yields (e.g. a BoundedPipe fed by a ZIP writer).
 """
 import ftplib
+import os
+import threading
+import time
+from collections import deque
 from urllib.parse import quote
 import xbmc
 import xbmcvfs
 
 from resources.lib.common import log
 
+# FTP session pool: socket timeout, idle lifetime, NOOP probe threshold (seconds), max idle sessions
+FTP_TIMEOUT = 30
+FTP_IDLE_TIMEOUT = 300
+FTP_KEEPALIVE_INTERVAL = 30
+FTP_POOL_SIZE = 4
+# Bounded buffer for streamed transfers (bytes); peak memory per transfer stays at one chunk
+TRANSFER_CHUNK_SIZE = 1024 * 1024
+# Resumable transfers (upload_resumable/download_resumable): attempts, base backoff (s), partial-file suffix
+TRANSFER_RESUME_ATTEMPTS = 5
+TRANSFER_RETRY_DELAY = 2
+PART_SUFFIX = '.part'
+# BoundedPipe: max bytes buffered between producer and upload_stream
+PIPE_CAPACITY = 8 * TRANSFER_CHUNK_SIZE
+
 
 def _norm_ftp_path(path):
     """Ensure path starts with / for FTP."""
@@ -17,48 +38,525 @@ def _norm_ftp_path(path):
     return path if path.startswith('/') else '/' + path
 
 
+class _TransferCancelled(Exception):
+    """Raised inside a transfer when progress_callback asked to cancel."""
+
+
+def _copy_chunks(read, write, total, chunk_size, progress_callback=None):
+    """
+    Copy read(chunk_size) -> write(chunk) until EOF, holding at most one chunk in memory.
+    progress_callback(bytes_done, bytes_total) -> True = cancel (total 0 if unknown).
+    Returns True when complete, False when cancelled.
+    """
+    done = 0
+    while True:
+        chunk = read(chunk_size)
+        if not chunk:
+            return True
+        if write(chunk) is False:
+            raise IOError("write failed after %d bytes" % done)
+        done += len(chunk)
+        if progress_callback and progress_callback(done, total):
+            return False
+
+
+def _vfs_upload(local_path, url, chunk_size, progress_callback=None):
+    """Stream a local file to an xbmcvfs URL. Returns True when complete, False when cancelled."""
+    total = os.path.getsize(local_path)
+    with open(local_path, 'rb') as src:
+        dst = xbmcvfs.File(url, 'wb')
+        try:
+            ok = _copy_chunks(src.read, dst.write, total, chunk_size, progress_callback)
+        finally:
+            dst.close()
+    if not ok:
+        xbmcvfs.delete(url)
+    return ok
+
+
+def _vfs_download(url, local_path, chunk_size, progress_callback=None):
+    """Stream an xbmcvfs URL to a local file. Returns True when complete, False when cancelled."""
+    src = xbmcvfs.File(url, 'rb')
+    try:
+        total = max(0, src.size())
+        with open(local_path, 'wb') as out:
+            ok = _copy_chunks(src.readBytes, out.write, total, chunk_size, progress_callback)
+    finally:
+        src.close()
+    if not ok:
+        _remove_quietly(local_path)
+    return ok
+
+
+def _retry_transfer(what, attempt):
+    """
+    Run attempt() up to TRANSFER_RESUME_ATTEMPTS times with growing delay; every attempt
+    continues from the partial (.part) file left by the previous one.
+    Cancel and permanent FTP errors (5xx) are not retried. Returns attempt()'s result or False.
+    """
+    for n in range(1, TRANSFER_RESUME_ATTEMPTS + 1):
+        try:
+            return attempt()
+        except _TransferCancelled:
+            log("%s cancelled" % what, xbmc.LOGINFO)
+            return False
+        except ftplib.error_perm as e:
+            log("%s failed: %s" % (what, e), xbmc.LOGERROR)
+            return False
+        except Exception as e:
+            log("%s interrupted (attempt %d/%d): %s" % (what, n, TRANSFER_RESUME_ATTEMPTS, e), xbmc.LOGWARNING)
+            if n < TRANSFER_RESUME_ATTEMPTS and xbmc.Monitor().waitForAbort(TRANSFER_RETRY_DELAY * n):
+                return False
+    log("%s failed after %d attempts" % (what, TRANSFER_RESUME_ATTEMPTS), xbmc.LOGERROR)
+    return False
+
+
+def _local_part_offset(part, total):
+    """Bytes already in a local .part file; 0 (restart) if missing, source size unknown or smaller."""
+    try:
+        offset = os.path.getsize(part)
+    except OSError:
+        return 0
+    return offset if total and offset <= total else 0
+
+
+def _vfs_download_resumable(url, local_path, chunk_size, progress_callback=None):
+    """Download via xbmcvfs into local_path + .part, seeking the source past bytes already present."""
+    part = local_path + PART_SUFFIX
+
+    def attempt():
+        src = xbmcvfs.File(url, 'rb')
+        try:
+            total = max(0, src.size())
+            offset = _local_part_offset(part, total)
+            if offset:
+                src.seek(offset, 0)
+            cb = (lambda done, t: progress_callback(offset + done, total)) if progress_callback else None
+            with open(part, 'ab' if offset else 'wb') as out:
+                ok = _copy_chunks(src.readBytes, out.write, total, chunk_size, cb)
+        finally:
+            src.close()
+        if not ok:
+            return False
+        if total and os.path.getsize(part) != total:
+            raise IOError("incomplete: %d of %d bytes" % (os.path.getsize(part), total))
+        os.replace(part, local_path)
+        return True
+    return _retry_transfer("Download %s" % os.path.basename(local_path), attempt)
+
+
+def _vfs_upload_resumable(local_path, url, chunk_size, progress_callback=None):
+    """
+    Upload via xbmcvfs to url + .part, verify the remote size, then rename into place.
+    xbmcvfs opens write handles with overwrite, so an interrupted attempt restarts the file.
+    """
+    part = url + PART_SUFFIX
+    total = os.path.getsize(local_path)
+
+    def attempt():
+        if not _vfs_upload(local_path, part, chunk_size, progress_callback):
+            return False
+        st = _vfs_stat(part)
+        if st is None or st[0] != total:
+            raise IOError("remote size mismatch after upload")
+        if xbmcvfs.exists(url):
+            xbmcvfs.delete(url)
+        if not xbmcvfs.rename(part, url):
+            raise IOError("rename failed")
+        return True
+    return _retry_transfer("Upload %s" % os.path.basename(local_path), attempt)
+
+
+def _vfs_upload_stream(source, url, chunk_size):
+    """Copy source.read() to url + .part until EOF, then rename into place (single attempt)."""
+    part = url + PART_SUFFIX
+    dst = xbmcvfs.File(part, 'wb')
+    try:
+        _copy_chunks(source.read, dst.write, 0, chunk_size)
+    except Exception:
+        dst.close()
+        xbmcvfs.delete(part)
+        raise
+    dst.close()
+    if xbmcvfs.exists(url):
+        xbmcvfs.delete(url)
+    if not xbmcvfs.rename(part, url):
+        raise IOError("rename failed")
+    return True
+
+
+class BoundedPipe:
+    """
+    In-memory byte pipe between a producer thread (write) and a consumer (read), e.g. a ZIP
+    writer and upload_stream. write() blocks while PIPE_CAPACITY bytes are buffered, read()
+    blocks until data arrives or the producer calls close(). abort() fails both sides.
+    """
+    def __init__(self, capacity=PIPE_CAPACITY):
+        self.capacity = capacity
+        self._chunks = deque()
+        self._size = 0
+        self._closed = False
+        self._error = None
+        self._cond = threading.Condition()
+        self.bytes_written = 0
+
+    def write(self, data):
+        if not data:
+            return 0
+        data = bytes(data)
+        with self._cond:
+            while self._size >= self.capacity and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise IOError(self._error)
+            if self._closed:
+                raise ValueError("write to closed pipe")
+            self._chunks.append(data)
+            self._size += len(data)
+            self.bytes_written += len(data)
+            self._cond.notify_all()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def read(self, n=-1):
+        """Up to n bytes (all buffered if n < 0); b'' once closed and drained."""
+        with self._cond:
+            while not self._chunks and not self._closed and self._error is None:
+                self._cond.wait()
+            if self._error is not None:
+                raise IOError(self._error)
+            out = bytearray()
+            while self._chunks and (n < 0 or len(out) < n):
+                chunk = self._chunks.popleft()
+                if n >= 0 and len(out) + len(chunk) > n:
+                    cut = n - len(out)
+                    self._chunks.appendleft(chunk[cut:])
+                    chunk = chunk[:cut]
+                out += chunk
+            self._size -= len(out)
+            self._cond.notify_all()
+            return bytes(out)
+
+    def close(self):
+        """Producer is done; the reader gets EOF after the remaining data."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self, reason):
+        """Wake and fail both sides (upload failed or backup cancelled)."""
+        with self._cond:
+            if self._error is None:
+                self._error = reason
+            self._cond.notify_all()
+
+
+def _vfs_stat(url):
+    """(size, mtime) of an xbmcvfs URL or None."""
+    try:
+        if not xbmcvfs.exists(url):
+            return None
+        st = xbmcvfs.Stat(url)
+        return st.st_size(), st.st_mtime()
+    except Exception as e:
+        log("stat %s failed: %s" % (url.split('@')[-1], e), xbmc.LOGDEBUG)
+        return None
+
+
+class _FTPSessionPool:
+    """
+    Keeps authenticated FTP control connections of one backend alive between calls.
+    Idle sessions older than FTP_IDLE_TIMEOUT are closed; sessions idle longer than
+    FTP_KEEPALIVE_INTERVAL are probed with NOOP before reuse. Thread-safe.
+    """
+    def __init__(self, connect, max_idle=FTP_POOL_SIZE):
+        self._connect = connect
+        self._max_idle = max_idle
+        self._idle = []  # [(ftp, last_used)], most recently used last
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _take_expired(self):
+        """Remove expired sessions from the idle list (caller holds the lock)."""
+        now = time.monotonic()
+        expired = [ftp for ftp, last_used in self._idle if now - last_used > FTP_IDLE_TIMEOUT]
+        self._idle = [(ftp, last_used) for ftp, last_used in self._idle if now - last_used <= FTP_IDLE_TIMEOUT]
+        return expired
+
+    def acquire(self):
+        """Return an idle live session or open a new one."""
+        while True:
+            with self._lock:
+                expired = self._take_expired()
+                item = self._idle.pop() if self._idle else None
+            for ftp in expired:
+                _ftp_quit(ftp)
+            if item is None:
+                return self._connect()
+            ftp, last_used = item
+            if time.monotonic() - last_used <= FTP_KEEPALIVE_INTERVAL:
+                return ftp
+            try:
+                ftp.voidcmd('NOOP')
+                return ftp
+            except (ftplib.Error, EOFError, OSError) as e:
+                log("FTP session dropped by server (%s), reconnecting" % e, xbmc.LOGDEBUG)
+                _ftp_quit(ftp)
+
+    def release(self, ftp):
+        """Return a healthy session to the pool (or close it if the pool is full/closed)."""
+        with self._lock:
+            if not self._closed and len(self._idle) < self._max_idle:
+                self._idle.append((ftp, time.monotonic()))
+                return
+        _ftp_quit(ftp)
+
+    def discard(self, ftp):
+        """Close a session that is broken or in an unknown state."""
+        _ftp_quit(ftp)
+
+    def close(self):
+        """Close all idle sessions; later releases are closed immediately."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for ftp, _last_used in idle:
+            _ftp_quit(ftp)
+
+
+def _remove_quietly(path):
+    """Delete a local file, ignoring errors (partial download cleanup)."""
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _ftp_quit(ftp):
+    """Close an FTP session politely, falling back to a hard close."""
+    try:
+        ftp.quit()
+    except Exception:
+        try:
+            ftp.close()
+        except Exception:
+            pass
+
+
+def _is_reconnect_error(e):
+    """True for errors after which the control connection is gone (421, EOF, broken pipe, reset)."""
+    if isinstance(e, ftplib.error_temp):
+        return str(e).startswith('421')
+    return isinstance(e, (EOFError, OSError))
+
+
 class FTPBackend:
-    """FTP backend using ftplib."""
-    def __init__(self, host, user, password, base_path):
+    """FTP backend using ftplib. Control connections are pooled per instance; call close() when done."""
+    def __init__(self, host, user, password, base_path, chunk_size=TRANSFER_CHUNK_SIZE):
         self.host = host
         self.user = user
         self.password = password
         self.base_path = _norm_ftp_path(base_path.rstrip('/'))
+        self.chunk_size = chunk_size
+        self._pool = _FTPSessionPool(self._connect)
+
+    def _connect(self):
+        ftp = ftplib.FTP(self.host, timeout=FTP_TIMEOUT)
+        try:
+            ftp.login(self.user, self.password)
+        except Exception:
+            _ftp_quit(ftp)
+            raise
+        return ftp
+
+    def _call(self, op, retry=True):
+        """
+        Run op(ftp) on a pooled session. If the server dropped the connection (421, EOF,
+        broken pipe), the session is discarded and op is retried once on a fresh one
+        (retry=False for ops that cannot be repeated, e.g. consuming a stream).
+        """
+        for attempt in ((0, 1) if retry else (1,)):
+            ftp = self._pool.acquire()
+            try:
+                result = op(ftp)
+            except ftplib.error_perm:
+                self._pool.release(ftp)
+                raise
+            except Exception as e:
+                self._pool.discard(ftp)
+                if attempt or not _is_reconnect_error(e):
+                    raise
+                log("FTP connection lost (%s), retrying with new session" % e, xbmc.LOGDEBUG)
+                continue
+            self._pool.release(ftp)
+            return result
+
+    def close(self):
+        """Close all pooled FTP sessions."""
+        self._pool.close()
+        self._pool = _FTPSessionPool(self._connect)
 
     def _remote(self, path):
         p = path.replace('\\', '/')
         return p if p.startswith('/') else self.base_path + '/' + p.lstrip('/')
 
-    def upload(self, local_path, remote_path):
+    def upload(self, local_path, remote_path, progress_callback=None):
+        """Upload in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         try:
             remote = self._remote(remote_path)
-            with ftplib.FTP(self.host) as ftp:
-                ftp.login(self.user, self.password)
+            total = os.path.getsize(local_path)
+
+            def op(ftp):
+                done = [0]
+
+                def on_block(block):
+                    done[0] += len(block)
+                    if progress_callback and progress_callback(done[0], total):
+                        raise _TransferCancelled()
                 with open(local_path, 'rb') as f:
-                    ftp.storbinary('STOR ' + remote, f)
+                    ftp.storbinary('STOR ' + remote, f, blocksize=self.chunk_size, callback=on_block)
+            self._call(op)
             return True
+        except _TransferCancelled:
+            log("FTP upload cancelled: %s" % remote_path, xbmc.LOGINFO)
+            return False
         except Exception as e:
             log("FTP upload failed: %s" % e, xbmc.LOGERROR)
             return False
 
-    def download(self, remote_path, local_path):
+    def download(self, remote_path, local_path, progress_callback=None):
+        """Download in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         try:
             remote = self._remote(remote_path)
-            with ftplib.FTP(self.host) as ftp:
-                ftp.login(self.user, self.password)
+
+            def op(ftp):
+                total = 0
+                if progress_callback:
+                    try:
+                        ftp.voidcmd('TYPE I')
+                        total = ftp.size(remote) or 0
+                    except ftplib.error_perm:
+                        pass
+                done = [0]
                 with open(local_path, 'wb') as f:
-                    ftp.retrbinary('RETR ' + remote, f.write)
+                    def on_block(block):
+                        f.write(block)
+                        done[0] += len(block)
+                        if progress_callback and progress_callback(done[0], total):
+                            raise _TransferCancelled()
+                    ftp.retrbinary('RETR ' + remote, on_block, blocksize=self.chunk_size)
+            self._call(op)
             return True
+        except _TransferCancelled:
+            log("FTP download cancelled: %s" % remote_path, xbmc.LOGINFO)
+            _remove_quietly(local_path)
+            return False
         except Exception as e:
             log("FTP download failed: %s" % e, xbmc.LOGERROR)
             return False
 
+    def upload_resumable(self, local_path, remote_path, progress_callback=None):
+        """
+        Upload to remote_path + .part, continuing with APPE from the size already on the server
+        (SIZE probe), then rename into place. Retries interrupted transfers from the last offset.
+        """
+        remote = self._remote(remote_path)
+        part = remote + PART_SUFFIX
+        total = os.path.getsize(local_path)
+
+        def op(ftp):
+            ftp.voidcmd('TYPE I')
+            try:
+                offset = ftp.size(part) or 0
+            except ftplib.error_perm:
+                offset = 0
+            if offset > total:
+                offset = 0
+            done = [offset]
+
+            def on_block(block):
+                done[0] += len(block)
+                if progress_callback and progress_callback(done[0], total):
+                    raise _TransferCancelled()
+            if offset < total or not total:
+                with open(local_path, 'rb') as f:
+                    f.seek(offset)
+                    cmd = ('APPE ' if offset else 'STOR ') + part
+                    ftp.storbinary(cmd, f, blocksize=self.chunk_size, callback=on_block)
+            if (ftp.size(part) or 0) != total:
+                raise IOError("remote size mismatch after upload")
+            try:
+                ftp.delete(remote)
+            except ftplib.error_perm:
+                pass
+            ftp.rename(part, remote)
+            return True
+        return _retry_transfer("FTP upload %s" % os.path.basename(local_path), lambda: self._call(op))
+
+    def upload_stream(self, source, remote_path):
+        """
+        Upload source.read() until EOF to remote_path + .part, then rename into place.
+        Single attempt: a consumed stream cannot be replayed. Returns True on success.
+        """
+        remote = self._remote(remote_path)
+        part = remote + PART_SUFFIX
+
+        def op(ftp):
+            ftp.storbinary('STOR ' + part, source, blocksize=self.chunk_size)
+            try:
+                ftp.delete(remote)
+            except ftplib.error_perm:
+                pass
+            ftp.rename(part, remote)
+        try:
+            self._call(op, retry=False)
+            return True
+        except Exception as e:
+            log("FTP stream upload failed: %s" % e, xbmc.LOGERROR)
+            try:
+                self._call(lambda ftp: ftp.delete(part))
+            except Exception:
+                pass
+            return False
+
+    def download_resumable(self, remote_path, local_path, progress_callback=None):
+        """
+        Download to local_path + .part, continuing with REST from the bytes already present,
+        then os.replace into place. Retries interrupted transfers from the last offset.
+        """
+        remote = self._remote(remote_path)
+        part = local_path + PART_SUFFIX
+
+        def op(ftp):
+            ftp.voidcmd('TYPE I')
+            try:
+                total = ftp.size(remote) or 0
+            except ftplib.error_perm as e:
+                if str(e).startswith('550'):
+                    raise
+                total = 0  # SIZE not supported: no resume, no size check
+            offset = _local_part_offset(part, total)
+            done = [offset]
+            if offset < total or not total:
+                with open(part, 'ab' if offset else 'wb') as f:
+                    def on_block(block):
+                        f.write(block)
+                        done[0] += len(block)
+                        if progress_callback and progress_callback(done[0], total):
+                            raise _TransferCancelled()
+                    ftp.retrbinary('RETR ' + remote, on_block, blocksize=self.chunk_size, rest=offset or None)
+            if total and os.path.getsize(part) != total:
+                raise IOError("incomplete: %d of %d bytes" % (os.path.getsize(part), total))
+            os.replace(part, local_path)
+            return True
+        return _retry_transfer("FTP download %s" % os.path.basename(local_path), lambda: self._call(op))
+
     def folder_exists(self, remote_path):
         try:
             remote = self._remote(remote_path)
-            with ftplib.FTP(self.host) as ftp:
-                ftp.login(self.user, self.password)
-                ftp.cwd(remote)
+            self._call(lambda ftp: ftp.cwd(remote))
             return True
         except ftplib.error_perm as e:
             if '550' in str(e):
@@ -76,44 +574,77 @@ class FTPBackend:
             if not remote:
                 return self.folder_exists(remote_path)
             segs = [s for s in remote.split('/') if s]
-            with ftplib.FTP(self.host) as ftp:
-                ftp.login(self.user, self.password)
+
+            def op(ftp):
                 for i in range(len(segs)):
-                    sub = '/'.join(segs[: i + 1])
+                    sub = '/' + '/'.join(segs[: i + 1])
                     try:
-                        ftp.cwd('/' + sub)
+                        ftp.cwd(sub)
                     except ftplib.error_perm as e:
-                        if '550' in str(e):
-                            try:
-                                ftp.mkd(segs[i])
-                            except ftplib.error_perm as mkd_e:
-                                log("FTP mkd failed for %s: %s" % (sub, mkd_e), xbmc.LOGERROR)
-                                return self.folder_exists(remote_path)
-                        else:
+                        if '550' not in str(e):
                             raise
+                        try:
+                            # Absolute path: pooled sessions do not start in the login directory
+                            ftp.mkd(sub)
+                        except ftplib.error_perm as mkd_e:
+                            log("FTP mkd failed for %s: %s" % (sub, mkd_e), xbmc.LOGERROR)
+                            return
+            self._call(op)
             return self.folder_exists(remote_path)
         except Exception as e:
             log("FTP ensure_folder failed: %s" % e, xbmc.LOGERROR)
             return self.folder_exists(remote_path)
 
+    def stat(self, remote_path):
+        """Return (size, mtime) of a remote file via SIZE/MDTM, or None if missing or not supported."""
+        try:
+            remote = self._remote(remote_path)
+
+            def op(ftp):
+                ftp.voidcmd('TYPE I')
+                size = ftp.size(remote)
+                mtime = ftp.voidcmd('MDTM ' + remote)[4:].strip()
+                return size, mtime
+            return self._call(op)
+        except ftplib.error_perm:
+            return None
+        except Exception as e:
+            log("FTP stat failed: %s" % e, xbmc.LOGDEBUG)
+            return None
+
     def listdir(self, remote_path):
         """List names (files and dirs) in remote_path. Returns [] on error."""
         try:
             remote = self._remote(remote_path)
-            with ftplib.FTP(self.host) as ftp:
-                ftp.login(self.user, self.password)
+
+            def op(ftp):
                 ftp.cwd(remote)
                 return ftp.nlst()
+            return self._call(op)
         except Exception as e:
             log("FTP listdir failed: %s" % e, xbmc.LOGDEBUG)
             return []
 
+    def delete(self, remote_path):
+        """Delete a remote file. Returns True on success."""
+        try:
+            remote = self._remote(remote_path)
+
+            def op(ftp):
+                ftp.delete(remote)
+            self._call(op)
+            return True
+        except Exception as e:
+            log("FTP delete failed: %s" % e, xbmc.LOGDEBUG)
+            return False
+
 
 class SFTPBackend:
     """SFTP backend using xbmcvfs (requires vfs.sftp addon). Remote path: absolute path on server."""
-    def __init__(self, host, user, password, base_path, port=22):
+    def __init__(self, host, user, password, base_path, port=22, chunk_size=TRANSFER_CHUNK_SIZE):
         self.host = host
         self.port = int(port) if port else 22
+        self.chunk_size = chunk_size
         self.user = quote(user or '', safe='')
         self.password = quote(password or '', safe='')
         self._prefix = f"sftp://{self.user}:{self.password}@{host}:{self.port}/"
@@ -122,28 +653,44 @@ class SFTPBackend:
         p = (remote_path or '').replace('\\', '/').strip('/')
         return self._prefix + p if p else self._prefix.rstrip('/') + '/'
 
-    def upload(self, local_path, remote_path):
+    def upload(self, local_path, remote_path, progress_callback=None):
+        """Streamed upload in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         url = self._remote_url(remote_path)
         try:
-            with open(local_path, 'rb') as f:
-                data = f.read()
-            f = xbmcvfs.File(url, 'wb')
-            f.write(data)
-            f.close()
-            return True
+            return _vfs_upload(local_path, url, self.chunk_size, progress_callback)
         except Exception as e:
             log("SFTP upload failed: %s" % e, xbmc.LOGERROR)
             return False
 
-    def download(self, remote_path, local_path):
+    def download(self, remote_path, local_path, progress_callback=None):
+        """Streamed download in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         url = self._remote_url(remote_path)
         try:
-            f = xbmcvfs.File(url, 'rb')
-            data = f.read()
-            f.close()
-            with open(local_path, 'wb') as out:
-                out.write(data)
-            return True
+            return _vfs_download(url, local_path, self.chunk_size, progress_callback)
+        except Exception as e:
+            log("SFTP download failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def upload_resumable(self, local_path, remote_path, progress_callback=None):
+        """Upload via .part + rename with retries (see _vfs_upload_resumable)."""
+        try:
+            return _vfs_upload_resumable(local_path, self._remote_url(remote_path), self.chunk_size, progress_callback)
+        except Exception as e:
+            log("SFTP upload failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def upload_stream(self, source, remote_path):
+        """Upload source.read() until EOF via .part + rename (single attempt, see _vfs_upload_stream)."""
+        try:
+            return _vfs_upload_stream(source, self._remote_url(remote_path), self.chunk_size)
+        except Exception as e:
+            log("SFTP stream upload failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def download_resumable(self, remote_path, local_path, progress_callback=None):
+        """Download via .part with seek-based resume and retries (see _vfs_download_resumable)."""
+        try:
+            return _vfs_download_resumable(self._remote_url(remote_path), local_path, self.chunk_size, progress_callback)
         except Exception as e:
             log("SFTP download failed: %s" % e, xbmc.LOGERROR)
             return False
@@ -170,6 +717,10 @@ class SFTPBackend:
             log("SFTP ensure_folder failed: %s" % e, xbmc.LOGERROR)
         return self.folder_exists(remote_path)
 
+    def stat(self, remote_path):
+        """Return (size, mtime) of a remote file via xbmcvfs.Stat, or None if missing."""
+        return _vfs_stat(self._remote_url(remote_path))
+
     def listdir(self, remote_path):
         """List names (files and dirs) in remote_path. Returns [] on error."""
         try:
@@ -182,11 +733,24 @@ class SFTPBackend:
             log("SFTP listdir failed: %s" % e, xbmc.LOGDEBUG)
             return []
 
+    def delete(self, remote_path):
+        """Delete a remote file. Returns True on success."""
+        try:
+            return bool(xbmcvfs.delete(self._remote_url(remote_path)))
+        except Exception as e:
+            log("SFTP delete failed: %s" % e, xbmc.LOGDEBUG)
+            return False
+
+    def close(self):
+        """No pooled state (xbmcvfs manages connections)."""
+        pass
+
 
 class SMBBackend:
     """SMB backend using xbmcvfs. remote_path = share/path (e.g. myshare/kodi/auto_fav_sync/...)."""
-    def __init__(self, host, user, password, base_path):
+    def __init__(self, host, user, password, base_path, chunk_size=TRANSFER_CHUNK_SIZE):
         self.host = host
+        self.chunk_size = chunk_size
         self.user = quote(user or '', safe='')
         self.password = quote(password or '', safe='')
         self._prefix = f"smb://{self.user}:{self.password}@{host}/"
@@ -195,28 +759,44 @@ class SMBBackend:
         p = (remote_path or '').replace('\\', '/').strip('/')
         return self._prefix + p if p else self._prefix.rstrip('/') + '/'
 
-    def upload(self, local_path, remote_path):
+    def upload(self, local_path, remote_path, progress_callback=None):
+        """Streamed upload in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         url = self._remote_url(remote_path)
         try:
-            with open(local_path, 'rb') as f:
-                data = f.read()
-            f = xbmcvfs.File(url, 'wb')
-            f.write(data)
-            f.close()
-            return True
+            return _vfs_upload(local_path, url, self.chunk_size, progress_callback)
         except Exception as e:
             log("SMB upload failed: %s" % e, xbmc.LOGERROR)
             return False
 
-    def download(self, remote_path, local_path):
+    def download(self, remote_path, local_path, progress_callback=None):
+        """Streamed download in chunk_size blocks. progress_callback(done, total) -> True = cancel."""
         url = self._remote_url(remote_path)
         try:
-            f = xbmcvfs.File(url, 'rb')
-            data = f.read()
-            f.close()
-            with open(local_path, 'wb') as out:
-                out.write(data)
-            return True
+            return _vfs_download(url, local_path, self.chunk_size, progress_callback)
+        except Exception as e:
+            log("SMB download failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def upload_resumable(self, local_path, remote_path, progress_callback=None):
+        """Upload via .part + rename with retries (see _vfs_upload_resumable)."""
+        try:
+            return _vfs_upload_resumable(local_path, self._remote_url(remote_path), self.chunk_size, progress_callback)
+        except Exception as e:
+            log("SMB upload failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def upload_stream(self, source, remote_path):
+        """Upload source.read() until EOF via .part + rename (single attempt, see _vfs_upload_stream)."""
+        try:
+            return _vfs_upload_stream(source, self._remote_url(remote_path), self.chunk_size)
+        except Exception as e:
+            log("SMB stream upload failed: %s" % e, xbmc.LOGERROR)
+            return False
+
+    def download_resumable(self, remote_path, local_path, progress_callback=None):
+        """Download via .part with seek-based resume and retries (see _vfs_download_resumable)."""
+        try:
+            return _vfs_download_resumable(self._remote_url(remote_path), local_path, self.chunk_size, progress_callback)
         except Exception as e:
             log("SMB download failed: %s" % e, xbmc.LOGERROR)
             return False
@@ -243,6 +823,10 @@ class SMBBackend:
             log("SMB ensure_folder failed: %s" % e, xbmc.LOGERROR)
         return self.folder_exists(remote_path)
 
+    def stat(self, remote_path):
+        """Return (size, mtime) of a remote file via xbmcvfs.Stat, or None if missing."""
+        return _vfs_stat(self._remote_url(remote_path))
+
     def listdir(self, remote_path):
         """List names (files and dirs) in remote_path. Returns [] on error."""
         try:
@@ -255,14 +839,27 @@ class SMBBackend:
             log("SMB listdir failed: %s" % e, xbmc.LOGDEBUG)
             return []
 
+    def delete(self, remote_path):
+        """Delete a remote file. Returns True on success."""
+        try:
+            return bool(xbmcvfs.delete(self._remote_url(remote_path)))
+        except Exception as e:
+            log("SMB delete failed: %s" % e, xbmc.LOGDEBUG)
+            return False
+
+    def close(self):
+        """No pooled state (xbmcvfs manages connections)."""
+        pass
+
 
-def get_backend(connection_type, host, user, password, base_path, sftp_port='22'):
+def get_backend(connection_type, host, user, password, base_path, sftp_port='22', chunk_size=TRANSFER_CHUNK_SIZE):
     """
     Return a sync backend. connection_type: 'ftp', 'sftp', 'smb'.
+    chunk_size: transfer buffer in bytes for upload/download.
     """
     ct = (connection_type or 'ftp').strip().lower()
     if ct == 'sftp':
-        return SFTPBackend(host, user, password, base_path, port=sftp_port)
+        return SFTPBackend(host, user, password, base_path, port=sftp_port, chunk_size=chunk_size)
     if ct == 'smb':
-        return SMBBackend(host, user, password, base_path)
-    return FTPBackend(host, user, password, base_path)
+        return SMBBackend(host, user, password, base_path, chunk_size=chunk_size)
+    return FTPBackend(host, user, password, base_path, chunk_size=chunk_size)
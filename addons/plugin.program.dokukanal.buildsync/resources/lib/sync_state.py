@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+"""
+Change detection for synced files: per key (remote path) the sha1 of the local file and the
+remote (size, mtime) as seen after the last successful sync. If both are unchanged, a sync
+round trip can be skipped. Stored as JSON in the addon profile. Thread-safe.
+Uses resources.lib.common for log.
+"""
+import hashlib
+import json
+import os
+import threading
+
+import xbmc
+
+from resources.lib.common import log
+
+
+def file_sha1(path):
+    """sha1 of a local file, or None if it does not exist / is unreadable."""
+    try:
+        h = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(65536), b''):
+                h.update(chunk)
+        return h.hexdigest()
+    except OSError:
+        return None
+
+
+class SyncState:
+    """Last synced state per key: {'local_sha1': str, 'remote': [size, mtime]}."""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries = {}
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if isinstance(data, dict):
+                self._entries = data
+        except (OSError, ValueError):
+            pass
+
+    def is_unchanged(self, key, local_path, remote_stat):
+        """True if local_path and remote_stat (size, mtime) match the last recorded sync."""
+        if remote_stat is None:
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+        if not entry or entry.get('remote') != list(remote_stat):
+            return False
+        return entry.get('local_sha1') == file_sha1(local_path)
+
+    def record(self, key, local_path, remote_stat):
+        """Remember state after a successful sync; remote_stat None forgets the key."""
+        with self._lock:
+            if remote_stat is None:
+                self._entries.pop(key, None)
+            else:
+                self._entries[key] = {'local_sha1': file_sha1(local_path), 'remote': list(remote_stat)}
+
+    def save(self):
+        """Write state atomically; errors are logged, not raised."""
+        with self._lock:
+            data = dict(self._entries)
+        tmp = self.path + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, separators=(',', ':'))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            log("SyncState save %s: %s" % (self.path, e), xbmc.LOGDEBUG)
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+Kleiner Task-Scheduler für den Service-Start: Jobs mit Abhängigkeiten laufen parallel auf einem
+Worker-Pool, sobald ihre Vorgänger fertig sind (auch bei Fehler, wie der frühere sequenzielle Ablauf).
+Pro Job eine Deadline; läuft ein Job darüber hinaus, werden seine Nachfolger übersprungen (er arbeitet
+noch auf denselben Daten). Monitor.abortRequested() stoppt das Starten neuer Jobs.
+Dauer und Status je Job werden geloggt. Uses resources.lib.common for log.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import xbmc
+
+from resources.lib.common import log
+
+POLL_INTERVAL = 0.5
+DEFAULT_TIMEOUT = 300
+
+OK = 'ok'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+SKIPPED = 'skipped'
+
+
+class Task:
+    """name, func() (no args), deps: names that must finish first (unknown names are ignored), timeout in s."""
+    def __init__(self, name, func, deps=(), timeout=DEFAULT_TIMEOUT):
+        self.name = name
+        self.func = func
+        self.deps = tuple(deps)
+        self.timeout = timeout
+
+
+def _run(task):
+    started = time.time()
+    try:
+        return OK, task.func(), time.time() - started
+    except Exception as e:
+        log("%s: %s" % (task.name, e), xbmc.LOGERROR)
+        return FAILED, None, time.time() - started
+
+
+def run_pipeline(tasks, monitor=None, workers=3):
+    """
+    Führt tasks aus. Ein Job, der seine Deadline überschreitet, läuft im Hintergrund weiter und belegt
+    seinen Worker; seine (auch indirekten) Nachfolger werden übersprungen. Bei Abbruch oder wenn alle
+    Worker von solchen Jobs belegt sind, werden noch nicht gestartete Jobs übersprungen.
+    Returns: {name: {'status': ok|failed|timeout|skipped, 'result': Rückgabewert, 'duration': s}}.
+    """
+    names = set(t.name for t in tasks)
+    pending = list(tasks)
+    running = {}
+    stalled = set()  # futures past their deadline that still hold a pool worker
+    results = {}
+
+    def skip(task, reason):
+        log("Startup task %s skipped: %s" % (task.name, reason), xbmc.LOGWARNING)
+        results[task.name] = {'status': SKIPPED, 'result': None, 'duration': 0.0}
+        pending.remove(task)
+
+    started_all = time.time()
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        while pending or running:
+            aborted = monitor is not None and monitor.abortRequested()
+            if aborted:
+                for task in pending:
+                    results[task.name] = {'status': SKIPPED, 'result': None, 'duration': 0.0}
+                pending = []
+            # Dependents of jobs past their deadline (or skipped ones) must not run alongside them
+            changed = True
+            while changed:
+                changed = False
+                for task in list(pending):
+                    blocked = [d for d in task.deps if results.get(d, {}).get('status') in (TIMEOUT, SKIPPED)]
+                    if blocked:
+                        skip(task, "%s did not finish" % ', '.join(blocked))
+                        changed = True
+            # Start every job whose dependencies are done (only on free workers, none queued)
+            stalled = set(f for f in stalled if not f.done())
+            free = workers - len(running) - len(stalled)
+            for task in list(pending):
+                if free <= 0:
+                    break
+                if all(dep in results or dep not in names for dep in task.deps):
+                    pending.remove(task)
+                    running[pool.submit(_run, task)] = (task, time.time())
+                    free -= 1
+            if not running:
+                if pending and free <= 0:
+                    for task in list(pending):
+                        skip(task, "all workers busy with jobs past their deadline")
+                    break
+                if pending and not aborted:
+                    # Unknown/cyclic dependencies: run the rest anyway instead of hanging the start
+                    log("Startup tasks with unmet dependencies: %s" % ', '.join(t.name for t in pending), xbmc.LOGWARNING)
+                    for task in pending:
+                        task.deps = ()
+                    continue
+                break
+            done, _ = wait(list(running), timeout=POLL_INTERVAL, return_when=FIRST_COMPLETED)
+            now = time.time()
+            for future in list(running):
+                task, started = running[future]
+                if future in done:
+                    status, result, duration = future.result()
+                    results[task.name] = {'status': status, 'result': result, 'duration': duration}
+                elif task.timeout and now - started > task.timeout:
+                    log("Startup task %s exceeded %ds, skipping its dependents" % (task.name, task.timeout), xbmc.LOGWARNING)
+                    results[task.name] = {'status': TIMEOUT, 'result': None, 'duration': now - started}
+                    stalled.add(future)
+                else:
+                    continue
+                del running[future]
+            if aborted:
+                break
+    finally:
+        # Never wait for hung jobs (network); they finish in the background
+        pool.shutdown(wait=False)
+    log("Startup tasks (%.1fs): %s" % (time.time() - started_all, ', '.join(
+        "%s %s %.1fs" % (name, r['status'], r['duration']) for name, r in results.items())), xbmc.LOGINFO)
+    return results
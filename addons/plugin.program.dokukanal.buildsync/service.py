@@ -16,5 +16,12 @@ if __name__ == "__main__":
         _t.start()
     except Exception:
         pass
+    # Speicherdruck-Reinigung (Watermarks) in eigenem Thread, prüft nur wenn aktiviert
+    try:
+        from services import autoclean_service
+        _p = threading.Thread(target=autoclean_service.run_pressure_loop, daemon=True)
+        _p.start()
+    except Exception:
+        pass
     import auto_ftp_sync
     auto_ftp_sync.run_startup()
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
-"""AutoClean: run_autoclean, set_next_run. Rueckgabe (bool, str)."""
+"""AutoClean: run_autoclean, set_next_run, run_pressure_loop. Rueckgabe (bool, str)."""
+import xbmc
 from core import settings
 from resources.lib import auto_clean
+from resources.lib.common import log
+from resources.lib.settings_snapshot import SettingsMonitor
 
 
 def run_autoclean():
@@ -13,6 +16,30 @@ def run_autoclean():
     return (True, msg)
 
 
+def estimate(refresh=False):
+    """Trockenlauf: pro Kategorie freizugebender Speicher (gecacht). Returns (True, bericht_text)."""
+    result = auto_clean.estimate_auto_clean(max_age=0 if refresh else auto_clean.ESTIMATE_TTL)
+    return (True, auto_clean.format_estimate(result))
+
+
 def set_next_run():
     """Setzt naechsten Laufzeitpunkt."""
     auto_clean.set_next_run()
+
+
+def run_pressure_loop():
+    """
+    Service-Thread: prüft alle PRESSURE_CHECK_INTERVAL Sekunden den Speicherdruck und reinigt bei
+    Überschreiten der High-Watermark (nur wenn autoclean_pressure aktiv; Umschalten ohne Neustart).
+    """
+    monitor = SettingsMonitor()
+    while not monitor.waitForAbort(auto_clean.PRESSURE_CHECK_INTERVAL):
+        if not settings.get_bool('autoclean_pressure', False):
+            continue
+        try:
+            statistik = auto_clean.run_pressure_clean()
+        except Exception as e:
+            log("Disk pressure clean: %s" % e, xbmc.LOGERROR)
+            continue
+        if statistik:
+            log("Disk pressure clean done: %s" % statistik.replace("\n", "; "), xbmc.LOGINFO)
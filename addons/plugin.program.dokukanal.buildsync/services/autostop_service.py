@@ -3,14 +3,25 @@
 Autostop: stop paused playback after X minutes; sleep timer for playing playback.
 Migrated from service.autostop (jbinkley60), integrated into BuildSync.
 Uses Kodi Player API (works with xstream and all sources using Kodi player).
+Event-driven: player callbacks and Monitor.onSettingsChanged update the state, the loop sleeps
+until the next deadline (pause stop, sleep-timer notify start / expiry) instead of ticking every second.
 """
 import time
 import xbmc
 import xbmcgui
 from resources.lib.common import ADDON_PATH, L, log, safe_get_string, safe_get_bool, safe_set_string
+from resources.lib.settings_snapshot import SettingsMonitor
 
 ADDON_ICON = ADDON_PATH + '/resources/images/icon.png'
-NOTIFYCOUNT = [0]  # list so it's mutable in nested scope
+# Longest sleep between checks. Kodi delivers player/settings callbacks inside waitForAbort without
+# ending it, so a shortened deadline (settings change) is picked up after at most this many seconds.
+MAX_WAIT = 300
+# Countdown dialog refresh while the sleep-timer notification is shown
+NOTIFY_INTERVAL = 1
+
+STOPPED = 0
+PLAYING = 1
+PAUSED = 2
 
 
 def _get(setting_id, default=''):
@@ -25,95 +36,39 @@ def _set(setting_id, value):
     safe_set_string(setting_id, str(value) if value is not None else '')
 
 
-def play_count(plcount, padjust, plflag, paflag, asevlog):
-    """Compute play counter (seconds) depending on pause/play and padjust."""
-    match = 0
-    if plflag == 0 and paflag == 0:
-        plcount = 0
-        match = 1
-    elif padjust == 'None':
-        plcount += 1
-        match = 2
-    elif padjust == 'Pause' and plflag == 1:
-        plcount += 1
-        match = 3
-    elif padjust == 'Pause' and paflag == 1:
-        pass  # plcount = plcount
-        match = 4
-    elif padjust == 'Reset' and plflag == 1:
-        plcount += 1
-        match = 5
-    elif padjust == 'Reset' and paflag == 1:
-        plcount = 0
-        match = 6
-
-    if asevlog and plcount % 10 == 0:
-        log('Autostop playCount: %s %s %s %s %s' % (plcount, padjust, plflag, paflag, match), xbmc.LOGINFO)
-    return plcount
-
-
-def sleep_notify(plcount, plstoptime, plflag, plnotify, plextend, asevlog, paflag):
-    """Show sleep-timer notification and extension dialog."""
-    extime = float(_get('autostop_extime', '0') or '0')
-    notifyset = _get('autostop_notifyset', 'no')
-    varextnotify = _get('autostop_varextnotify', 'no')
-    totalstoptime = plstoptime + extime
-    msgdialogprogress = xbmcgui.DialogProgress()
-
-    if plstoptime > 0 and plcount + plnotify >= totalstoptime * 60 and (plflag > 0 or (plflag == 0 and paflag == 1)):
-        if notifyset == 'no' and varextnotify == 'no':
-            msgdialogprogress.create(L(30367), L(30368))
-            _set('autostop_notifyset', 'yes')
-            NOTIFYCOUNT[0] = 0
-            log('Autostop notify counter started.', xbmc.LOGINFO)
-        elif notifyset == 'yes':
-            NOTIFYCOUNT[0] += 1
-            if NOTIFYCOUNT[0] >= plnotify:
-                percent = 0
-                msgdialogprogress.close()
-            else:
-                percent = 100 - int(float(NOTIFYCOUNT[0]) / float(plnotify) * 100)
-                tremain = str(plnotify - NOTIFYCOUNT[0])
-                message = L(30368) + tremain + L(30369)
-                msgdialogprogress.update(percent, message)
-            if asevlog and plcount % 10 == 0:
-                log('Autostop notify counter: %s %s %s %s %s %s' % (
-                    plcount, plnotify, totalstoptime * 60, percent, NOTIFYCOUNT[0], plstoptime), xbmc.LOGINFO)
-            if msgdialogprogress.iscanceled():
-                if plextend > 0:
-                    extime = extime + plextend
-                    _set('autostop_extime', str(extime))
-                    extmins = str(plextend)
-                else:
-                    extmins = var_extension(totalstoptime, plcount, asevlog)
-                    extime = extime + float(extmins)
-                    _set('autostop_extime', str(extime))
-                msgdialogprogress.close()
-                dialog = xbmcgui.Dialog()
-                mgenlog = L(30370) + extmins + L(30371)
-                log(mgenlog, xbmc.LOGINFO)
-                dialog.notification(L(30372), mgenlog, ADDON_ICON, 3000)
-                _set('autostop_notifyset', 'no')
-        elif notifyset == 'yes' and plflag == 0 and paflag == 0:
-            msgdialogprogress.close()
-            _set('autostop_notifyset', 'no')
-
-    if plflag > 0 and asevlog and plcount % 10 == 0:
-        log('Autostop sleepNotify counter: %s %s %s' % (plcount + plnotify, plstoptime * 60, totalstoptime * 60), xbmc.LOGINFO)
-    if plflag == 0 and paflag == 0 and extime > 0:
-        _set('autostop_extime', '0')
-
-
-def var_extension(plstoptime, plcount, asevlog):
-    """Dialog for variable extension (minutes or end of file)."""
+def _get_int(setting_id, default=0):
+    try:
+        return int(_get(setting_id, str(default)) or default)
+    except ValueError:
+        return default
+
+
+def load_settings():
+    """Autostop settings read once (and again on onSettingsChanged)."""
+    return {
+        'enabled': _get_bool('autostop_enabled', False),
+        'pastop': _get_int('autostop_pastop', 0),
+        'plstop': _get_int('autostop_plstop', 0),
+        'plnotify': _get_int('autostop_plnotify', 0),
+        'plextend': _get_int('autostop_plextend', 10),
+        'padjust': _get('autostop_padjust', 'None'),
+        'stopplay': _get_bool('autostop_stopplay', False),
+        'screensaver': _get_bool('autostop_screensaver', False),
+        'asreset': _get_bool('autostop_asreset', False),
+        'asevlog': _get_bool('autostop_asevlog', False),
+    }
+
+
+def var_extension(remaining, asevlog, stopplay):
+    """Dialog for variable extension (minutes or end of file). Returns (minutes str, until_end_of_file)."""
     pselect = [
         "10 minutes", "20 minutes", "30 minutes", "40 minutes",
         "50 minutes", "60 minutes", "90 minutes"
     ]
-    remtime = check_time(plstoptime, plcount, asevlog)
+    remtime = check_time(remaining, asevlog)
     if float(remtime) > 0:
         pselect.append("End of current file (" + remtime + " mins)")
-    if _get_bool('autostop_stopplay', False):
+    if stopplay:
         pselect.append("[COLOR blue]Stop Playback Now[/COLOR]")
 
     ddialog = xbmcgui.Dialog()
@@ -125,17 +80,15 @@ def var_extension(plstoptime, plcount, asevlog):
         if not extension.isdigit():
             extension = '10'
     elif 'End' in pselect[selection]:
-        extension = check_time(plstoptime, plcount, asevlog)
+        return remtime, True
     elif 'Stop' in pselect[selection]:
-        extension = '0'
-        stop_playback(L(30372), L(30374))
-        return '0'
+        return '0', False
     else:
         extension = '5'
-    return extension
+    return extension, False
 
 
-def stop_playback(notifymsg, logmsg):
+def stop_playback(notifymsg, logmsg, screensaver=False, asreset=False):
     """Stop playback, show notification, optional screensaver."""
     try:
         player = xbmc.Player()
@@ -153,133 +106,230 @@ def stop_playback(notifymsg, logmsg):
         log(mgenlog, xbmc.LOGINFO)
         dialog = xbmcgui.Dialog()
         dialog.notification(notifymsg, mgenlog, ADDON_ICON, 5000)
-        if _get_bool('autostop_screensaver', False):
+        if screensaver:
             xbmc.executebuiltin('ActivateScreensaver')
-        if _get_bool('autostop_asreset', False):
+        if asreset:
             _set('autostop_plstop', '0')
             log('Autostop sleep timer reset to 0.', xbmc.LOGINFO)
-        _set('autostop_notifyset', 'no')
-        _set('autostop_varextnotify', 'no')
     except Exception as e:
         log('Autostop error when stopping playback: %s' % e, xbmc.LOGINFO)
 
 
-def check_time(plstoptime, plcount, asevlog):
-    """Remaining play time until end of file (for extension option)."""
+def check_time(remaining, asevlog):
+    """Play time left after the sleep timer until end of file, in minutes (for extension option)."""
     try:
         player = xbmc.Player()
         currpos = player.getTime()
         endpos = int(player.getTotalTime())
-        remaintime = endpos - currpos - (plstoptime * 60 - plcount) - (10 - plcount % 10) - 1
+        remaintime = endpos - currpos - remaining - 1
         if remaintime > 10800:
             remaintime = 10800
         extension = '{:.2f}'.format(remaintime / float(60))
         if asevlog:
-            log('Autostop extension time: %s %s %s %s %s' % (currpos, endpos, plcount, remaintime, extension), xbmc.LOGINFO)
-        _set('autostop_varextnotify', 'yes')
+            log('Autostop extension time: %s %s %s %s' % (currpos, endpos, remaintime, extension), xbmc.LOGINFO)
         return extension
     except Exception as e:
         log('Autostop error getting remaining time: %s' % e, xbmc.LOGINFO)
     return '-1'
 
 
-def check_notify():
+def check_notify(cfg):
     """Ensure notification time and stop time are not identical."""
     try:
-        plnotify = int(_get('autostop_plnotify', '0') or '0')
-        plstoptime = int(_get('autostop_plstop', '0') or '0')
-        if plstoptime > 0 and plnotify == plstoptime * 60:
+        if cfg['plstop'] > 0 and cfg['plnotify'] == cfg['plstop'] * 60:
             _set('autostop_plnotify', '300')
+            cfg['plnotify'] = 300
             dialog = xbmcgui.Dialog()
             dialog.notification(L(30372), L(30375), ADDON_ICON, 5000)
     except Exception as e:
         log('Autostop checkNotify error: %s' % e, xbmc.LOGINFO)
 
 
-class AutostopPlayer(xbmc.Player):
+class AutostopEngine(object):
+    """
+    Playback state and timers. Sleep-timer seconds are accumulated per padjust:
+    'None' counts while playing and paused, 'Pause' only while playing, 'Reset' restarts on pause.
+    """
     def __init__(self):
+        self.cfg = load_settings()
+        check_notify(self.cfg)
+        self.state = STOPPED
+        self.counted = 0.0
+        self.since = None
+        self.paused_at = None
+        self.extime = 0.0
+        self.until_end = False
+        self.dialog = None
+
+    def reload_settings(self):
+        self.cfg = load_settings()
+        check_notify(self.cfg)
+        self._set_state(self.state, transition=False)
+        if self.cfg['asevlog']:
+            log('Autostop settings reloaded: %s' % self.cfg, xbmc.LOGINFO)
+
+    def _counting(self):
+        return self.state == PLAYING or (self.state == PAUSED and self.cfg['padjust'] == 'None')
+
+    def elapsed(self, now):
+        return self.counted + (now - self.since if self.since is not None else 0)
+
+    def _set_state(self, state, transition=True):
+        now = time.monotonic()
+        self.counted = self.elapsed(now)
+        self.since = None
+        if transition:
+            if state == STOPPED:
+                self.counted = 0.0
+                self.extime = 0.0
+                self.until_end = False
+                self._close_dialog()
+            elif state == PAUSED and self.cfg['padjust'] == 'Reset':
+                self.counted = 0.0
+            if state == PAUSED:
+                self.paused_at = now
+            elif state != self.state:
+                self.paused_at = None
+        self.state = state
+        if self._counting():
+            self.since = now
+
+    def on_play(self):
+        self._set_state(PLAYING)
+
+    def on_pause(self):
+        self._set_state(PAUSED)
+
+    def on_stop(self):
+        self._set_state(STOPPED)
+
+    def _close_dialog(self):
+        if self.dialog is not None:
+            try:
+                self.dialog.close()
+            except Exception:
+                pass
+            self.dialog = None
+
+    def _stop(self, notifymsg, logmsg):
+        self._close_dialog()
+        stop_playback(notifymsg, logmsg, self.cfg['screensaver'], self.cfg['asreset'])
+        if self.cfg['asreset']:
+            self.cfg['plstop'] = 0
+        self._set_state(STOPPED)
+
+    def _notify(self, remaining):
+        """Countdown dialog before the sleep timer fires; cancel = extend."""
+        plnotify = self.cfg['plnotify']
+        if self.dialog is None:
+            self.dialog = xbmcgui.DialogProgress()
+            self.dialog.create(L(30367), L(30368))
+            log('Autostop notify counter started.', xbmc.LOGINFO)
+        percent = max(0, min(100, int(remaining / float(plnotify) * 100)))
+        self.dialog.update(percent, L(30368) + str(int(remaining)) + L(30369))
+        if not self.dialog.iscanceled():
+            return
+        self._close_dialog()
+        if self.cfg['plextend'] > 0:
+            extmins = str(self.cfg['plextend'])
+        else:
+            extmins, self.until_end = var_extension(remaining, self.cfg['asevlog'], self.cfg['stopplay'])
+            if extmins == '0' and not self.until_end:
+                self._stop(L(30372), L(30374))
+                return
+        self.extime += float(extmins)
+        mgenlog = L(30370) + extmins + L(30371)
+        log(mgenlog, xbmc.LOGINFO)
+        xbmcgui.Dialog().notification(L(30372), mgenlog, ADDON_ICON, 3000)
+
+    def tick(self):
+        """Act on due deadlines; returns seconds until the next one (bounded by MAX_WAIT)."""
+        cfg = self.cfg
+        if not cfg['enabled']:
+            self._close_dialog()
+            return MAX_WAIT
+        now = time.monotonic()
+        waits = [MAX_WAIT]
+        pastop = cfg['pastop'] * 60
+        if pastop > 0:
+            if self.state == PAUSED and self.paused_at is not None:
+                if now - self.paused_at >= pastop:
+                    self._stop(L(30376), L(30377))
+                    return self.tick()
+                waits.append(self.paused_at + pastop - now)
+            else:
+                # A pause starting now is due in pastop at the earliest
+                waits.append(pastop)
+        plnotify = cfg['plnotify'] if not self.until_end else 0
+        if cfg['plstop'] > 0:
+            total = (cfg['plstop'] + self.extime) * 60
+            if self.state == STOPPED:
+                waits.append(max(total - plnotify, 1))
+            else:
+                elapsed = self.elapsed(now)
+                if elapsed >= total:
+                    self._stop(L(30372), L(30378))
+                    return self.tick()
+                if plnotify > 0 and elapsed + plnotify >= total:
+                    self._notify(total - elapsed)
+                    waits.append(NOTIFY_INTERVAL)
+                else:
+                    waits.append(total - plnotify - elapsed if plnotify > 0 else total - elapsed)
+                if cfg['asevlog']:
+                    log('Autostop sleep timer: %d / %d s' % (elapsed, total), xbmc.LOGINFO)
+        else:
+            self._close_dialog()
+        return max(min(waits), 0.1)
+
+
+class AutostopPlayer(xbmc.Player):
+    def __init__(self, engine):
         super(AutostopPlayer, self).__init__()
-        self.paflag = 0
-        self.plflag = 0
+        self.engine = engine
 
     def onPlayBackStarted(self):
-        self.paflag = 0
-        self.plflag = 1
+        self.engine.on_play()
 
     def onPlayBackPaused(self):
-        self.paflag = 1
-        self.plflag = 0
+        self.engine.on_pause()
 
     def onPlayBackResumed(self):
-        self.paflag = 0
-        self.plflag = 1
+        self.engine.on_play()
 
     def onPlayBackEnded(self):
-        self.paflag = 0
-        self.plflag = 0
+        self.engine.on_stop()
 
     def onPlayBackStopped(self):
-        self.paflag = 0
-        self.plflag = 0
+        self.engine.on_stop()
+
+
+class AutostopMonitor(SettingsMonitor):
+    def __init__(self, engine):
+        super(AutostopMonitor, self).__init__()
+        self.engine = engine
+
+    def onSettingsChanged(self):
+        super(AutostopMonitor, self).onSettingsChanged()
+        self.engine.reload_settings()
 
 
 def run_loop():
-    """Main loop: run only when autostop_enabled. Runs in its own thread."""
-    if not _get_bool('autostop_enabled', False):
-        return
-    _set('autostop_extime', '0')
-    _set('autostop_notifyset', 'no')
-    _set('autostop_varextnotify', 'no')
-    check_notify()
-
-    player = AutostopPlayer()
-    monitor = xbmc.Monitor()
-    pacount = 0
-    plcount = 0
+    """Main loop in its own thread: sleeps until the next deadline; settings changes apply without restart."""
+    engine = AutostopEngine()
+    player = AutostopPlayer(engine)
+    monitor = AutostopMonitor(engine)
+    if player.isPlaying():
+        engine.on_play()
 
     log('Autostop service loop started.', xbmc.LOGINFO)
 
     while not monitor.abortRequested():
-        pacount += 1
-        padjust = _get('autostop_padjust', 'None')
-        plstoptime = int(_get('autostop_plstop', '0') or '0')
-        plnotify = int(_get('autostop_plnotify', '0') or '0')
-        plextend = int(_get('autostop_plextend', '10') or '10')
-        asevlog = 'true' if _get_bool('autostop_asevlog', False) else 'false'
-
-        if pacount % 10 == 0:
-            try:
-                pastoptime = int(_get('autostop_pastop', '0') or '0')
-                if pastoptime > 0 and pacount >= pastoptime * 60 and player.paflag == 1:
-                    pacount = 0
-                    stop_playback(L(30376), L(30377))
-                elif player.paflag == 0:
-                    pacount = 0
-            except Exception as e:
-                log('Autostop pause check error: %s' % e, xbmc.LOGINFO)
-
-        plcount = play_count(plcount, padjust, player.plflag, player.paflag, asevlog)
-        sleep_notify(plcount, plstoptime, player.plflag, plnotify, plextend, asevlog, player.paflag)
-
-        if plcount % 10 == 0:
-            try:
-                plstoptime = int(_get('autostop_plstop', '0') or '0')
-                padjust = _get('autostop_padjust', 'None')
-                plnotify = int(_get('autostop_plnotify', '0') or '0')
-                plextend = int(_get('autostop_plextend', '10') or '10')
-                extime = float(_get('autostop_extime', '0') or '0')
-                totalstoptime = plstoptime + extime
-                if plstoptime > 0 and plcount >= totalstoptime * 60 and (
-                    player.plflag > 0 or (player.plflag == 0 and player.paflag == 1)
-                ):
-                    plcount = 0
-                    stop_playback(L(30372), L(30378))
-                if plstoptime == 0:
-                    plcount = 0
-            except Exception as e:
-                log('Autostop play stop check error: %s' % e, xbmc.LOGINFO)
-
-        if monitor.waitForAbort(1):
+        try:
+            wait = engine.tick()
+        except Exception as e:
+            log('Autostop check error: %s' % e, xbmc.LOGINFO)
+            wait = MAX_WAIT
+        if monitor.waitForAbort(wait):
             break
 
     log('Autostop service loop stopped.', xbmc.LOGINFO)
@@ -9,10 +9,16 @@ from resources.lib import backup_restore
 def create_backup(progress_callback=None):
     """
     Erstellt Build-Backup (ZIP). Bei Einstellung „Auf Verbindung speichern“: ZIP in Temp, dann Upload.
+    Bei backup_format = Snapshot-Store: Dedup-Snapshot lokal bzw. direkt auf die Verbindung.
+    Bei backup_stream_upload: ZIP wird ohne Temp-Datei direkt auf die Verbindung gestreamt.
     progress_callback(i, total, arcname) -> True = cancel.
     Returns: (success, message).
     """
     include_addon_data = settings.get_bool('backup_include_addon_data', True)
+    if backup_restore.use_backup_store():
+        return backup_restore.create_store_backup(include_addon_data, progress_callback=progress_callback)
+    if backup_restore.use_stream_upload():
+        return backup_restore.create_stream_backup(include_addon_data, progress_callback=progress_callback)
     save_to_connection = settings.get_bool('backup_save_to_connection', False)
     target_base = None
     if save_to_connection:
@@ -33,6 +39,7 @@ def create_backup(progress_callback=None):
     except (ValueError, TypeError):
         conn_int = 1
     remote_path = (settings.get_string('backup_remote_path') or 'backups').strip().rstrip('/') or 'backups'
+    backend = None
     try:
         import auto_ftp_sync
         backend = auto_ftp_sync.get_backend_for_connection(conn_int)
@@ -42,10 +49,12 @@ def create_backup(progress_callback=None):
                     os.remove(zip_path)
                 except OSError:
                     pass
+            backup_restore.discard_backup_index(zip_path)
             return (False, backup_restore.ADDON.getLocalizedString(30043) + " (Verbindung %s)" % conn_num)
         backend.ensure_folder(remote_path)
         remote_file = remote_path + '/' + os.path.basename(zip_path)
-        if backend.upload(zip_path, remote_file):
+        if backend.upload_resumable(zip_path, remote_file):
+            backup_restore.publish_backup_metadata(backend, remote_path, zip_path)
             size_str = backup_restore._format_size(os.path.getsize(zip_path)) if zip_path and os.path.exists(zip_path) else ""
             try:
                 os.remove(zip_path)
@@ -54,19 +63,25 @@ def create_backup(progress_callback=None):
             return (True, backup_restore.ADDON.getLocalizedString(30041).format(
                 path="Verbindung %s: %s" % (conn_num, remote_file),
                 size=size_str))
+        backup_restore.discard_backup_index(zip_path)
         return (False, backup_restore.ADDON.getLocalizedString(30068))
     except Exception as e:
+        backup_restore.discard_backup_index(zip_path)
         from core import logging_utils
         logging_utils.log("Backup upload: %s" % e, 3)
         return (False, backup_restore.ADDON.getLocalizedString(30068) + "\n%s" % str(e))
+    finally:
+        backup_restore.close_backend(backend)
 
 
-def restore_backup(zip_path, wipe_first=False, is_from_url=False, progress_callback=None):
+def restore_backup(zip_path, wipe_first=False, is_from_url=False, progress_callback=None, fetch_archive=None,
+                   subtrees=None):
     """
-    Stellt aus ZIP wieder her. progress_callback(i, total, name) -> True = cancel.
+    Stellt aus ZIP wieder her (inkrementelle/differenzielle Backups als Kette).
+    progress_callback(i, total, name) -> True = cancel. subtrees: nur diese Pfade (None = alles).
     Returns: (success, message).
     """
     return backup_restore.restore_from_zip_core(
         zip_path, wipe_first=wipe_first, is_from_url=is_from_url,
-        progress_callback=progress_callback,
+        progress_callback=progress_callback, fetch_archive=fetch_archive, subtrees=subtrees,
     )